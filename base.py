@@ -1,16 +1,38 @@
 import os
-import shutil
+import re
+import functools
+import copy
+import json
+import pickle
+import collections.abc
 import yaml
 import datetime
+import zipfile
 import dill
 from natsort import natsorted
 
+import storage
+
+RUN_FORMAT_VERSION = 2
+RUN_COUNTER_FILE = "run_counter.json"
+ARCHIVE_FILE = "archive.zip"
+ARCHIVE_INDEX_FILE = "archive.jsonl"
+METADATA_TYPES = (type(None), bool, int, float, str, datetime.date)
+LOCALES_FOLDER = "locales"
+COMPILED_LOCALES_FOLDER = os.path.join(LOCALES_FOLDER, ".compiled")
+LOCALE_BUNDLE_FORMAT_VERSION = 1
+CACHE_FOLDER = ".cache" # per instance, hidden so it is not listed as a configuration
+
 class Run:
     """
     An instance of a script execution.
+    A run is identified by foodcoop, configuration and name only, its path is derived from them.
     """
+    metadata_attributes = ["foodcoop", "configuration", "name", "log", "next_possible_methods", "completion_percentage"]
+    category_lists = {} # {attribute: whether its categories are ignored} of the attributes holding a CategoryList, set by scripts which use them
+
     def __init__(self, foodcoop, configuration, log=None, name="", next_possible_methods=None):
-        self.path, self.name = prepare_output(foodcoop=foodcoop, configuration=configuration, name=name)
+        path, self.name = prepare_output(foodcoop=foodcoop, configuration=configuration, name=name)
         self.foodcoop = foodcoop
         self.configuration = configuration
         if log:
@@ -23,15 +45,114 @@ class Run:
             self.next_possible_methods = []
         self.completion_percentage = 0
 
+    @property
+    def path(self):
+        return storage.current().run_path(self.foodcoop, self.configuration, self.name)
+
+    def __getattr__(self, attribute):
+        # only called if the attribute isn't set yet: load bulky payloads lazily on first access
+        unloaded_payloads = self.__dict__.get("_unloaded_payloads")
+        if unloaded_payloads and attribute in unloaded_payloads:
+            value = self._upgrade_payload(attribute, storage.current().load_payload(self.foodcoop, self.configuration, self.name, attribute))
+            unloaded_payloads.discard(attribute)
+            setattr(self, attribute, value)
+            return value
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{attribute}'")
+
+    def __setattr__(self, attribute, value):
+        # a payload replaced before it was loaded must not be kept in the storage, where it would shadow the new value
+        unloaded_payloads = self.__dict__.get("_unloaded_payloads")
+        if unloaded_payloads:
+            unloaded_payloads.discard(attribute)
+        super().__setattr__(attribute, value)
+
+    def __delattr__(self, attribute):
+        unloaded_payloads = self.__dict__.get("_unloaded_payloads")
+        if unloaded_payloads and attribute in unloaded_payloads:
+            unloaded_payloads.discard(attribute)
+            if attribute not in self.__dict__:
+                return
+        super().__delattr__(attribute)
+
+    def _upgrade_payload(self, attribute, value):
+        # runs saved before categories were indexed hold plain lists instead of CategoryLists
+        if attribute in self.category_lists and isinstance(value, list) and not isinstance(value, CategoryList):
+            value = CategoryList(value, ignored=self.category_lists[attribute])
+        return value
+
     def save(self):
-        file_path = os.path.join(self.path, "run.obj")
-        with open(file_path, 'wb') as file:
-            dill.dump(self, file)
+        """
+        Saves the run in the versioned run format: small attributes (name, log, next possible methods, progress etc.) go into one
+        metadata file, bulky attributes (articles, categories, products etc.) into one payload file each.
+        Payloads which have not been accessed since loading the run are left untouched in the storage, those which were replaced or deleted are removed.
+        """
+        unloaded_payloads = self.__dict__.get("_unloaded_payloads", set())
+        attributes = {}
+        payloads = {}
+        for attribute, value in self.__dict__.items():
+            if attribute == "_unloaded_payloads" or attribute == "path": # path: absolute paths stored by older versions
+                continue
+            if attribute in self.metadata_attributes or isinstance(value, METADATA_TYPES):
+                attributes[attribute] = value
+            else:
+                payloads[attribute] = value
+        snapshot = {"format": RUN_FORMAT_VERSION, "attributes": attributes, "payloads": sorted((set(payloads) | unloaded_payloads) - set(attributes))}
+        storage.current().save_run(self.foodcoop, self.configuration, self.name, snapshot, payloads)
+        update_run_index(self)
 
     @classmethod
     def load(cls, path):
-        with open(os.path.join(path, "run.obj"), 'rb') as file:
-            return dill.load(file)
+        """
+        Loads the metadata of a run from the given run folder path. Payloads are loaded as soon as they are accessed.
+        Runs saved as a whole pickled object (before the versioned run format was introduced) are loaded completely.
+        The run's identity is taken from where it is loaded from, so runs stay valid when their configuration is renamed.
+        """
+        foodcoop, configuration, run_name = os.path.normpath(path).split(os.path.sep)[-3:]
+        snapshot = storage.current().load_run(foodcoop, configuration, run_name)
+        if snapshot is None:
+            run = storage.current().load_legacy_run(foodcoop, configuration, run_name)
+        else:
+            run = cls._from_snapshot(snapshot, path)
+        return run._loaded_as(foodcoop, configuration, run_name)
+
+    @classmethod
+    def load_archived(cls, foodcoop, configuration, run_name):
+        """
+        Loads an archived run including its payloads from the archive without restoring it, e.g. to display it.
+        Returns None if the run isn't archived.
+        """
+        files = read_archived_files(foodcoop, configuration, run_name)
+        if storage.RUN_METADATA_FILE in files:
+            run = cls._from_snapshot(dill.loads(files[storage.RUN_METADATA_FILE]), run_name)
+            for attribute in run._unloaded_payloads:
+                data = files.get(f"{storage.PAYLOAD_FOLDER}/{attribute}.obj")
+                if data is not None:
+                    run.__dict__[attribute] = run._upgrade_payload(attribute, dill.loads(data))
+            run._unloaded_payloads = set()
+        elif storage.LEGACY_RUN_FILE in files:
+            run = dill.loads(files[storage.LEGACY_RUN_FILE])
+        else:
+            return None
+        return run._loaded_as(foodcoop, configuration, run_name)
+
+    @classmethod
+    def _from_snapshot(cls, snapshot, path):
+        if snapshot.get("format") != RUN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported run format {snapshot.get('format')} of run {path}")
+        run = cls.__new__(cls)
+        run.__dict__.update(snapshot["attributes"])
+        run._unloaded_payloads = set(snapshot["payloads"]) - set(snapshot["attributes"]) # runs saved before payloads were dropped on assignment may list both
+        return run
+
+    def _loaded_as(self, foodcoop, configuration, run_name):
+        self.__dict__.pop("path", None)
+        for attribute in self.category_lists:
+            if attribute in self.__dict__:
+                self.__dict__[attribute] = self._upgrade_payload(attribute, self.__dict__[attribute])
+        self.foodcoop = foodcoop
+        self.configuration = configuration
+        self.name = run_name
+        return self
 
 class ScriptMethod:
     """
@@ -83,14 +204,192 @@ class Input:
 class Category:
     """
     Nestable categories e.g. for articles, for usage within a script.
+    Subcategories are kept in a CategoryList, which indexes them by name and number and links them to this category as their parent.
     """
-    def __init__(self, number=None, name="", subcategories=None):
-        self.number = number
-        self.name = name
-        if subcategories:
-            self.subcategories = subcategories
+    parent = None
+    ignored = False
+    _container = None
+
+    def __init__(self, number=None, name="", subcategories=None, ignored=False):
+        self._number = number
+        self._name = name
+        self.ignored = ignored
+        self.subcategories = subcategories
+
+    def __getstate__(self):
+        # the links to the parent and the containing list are restored by the CategoryList when it is unpickled
+        state = self.__dict__.copy()
+        state.pop("parent", None)
+        state.pop("_container", None)
+        return state
+
+    def __setstate__(self, state):
+        # runs saved before categories were indexed hold plain attributes and lists
+        state = dict(state)
+        for attribute in ["number", "name", "subcategories"]:
+            if attribute in state:
+                state["_" + attribute] = state.pop(attribute)
+        self.__dict__.update(state)
+        if not isinstance(self.__dict__.get("_subcategories"), CategoryList):
+            self.subcategories = self.__dict__.get("_subcategories")
+
+    @property
+    def number(self):
+        return self._number
+
+    @number.setter
+    def number(self, number):
+        old_number = self._number
+        self._number = number
+        if self._container is not None:
+            self._container._reindex_category(self, old_number=old_number)
+
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        old_name = self._name
+        self._name = name
+        if self._container is not None:
+            self._container._reindex_category(self, old_name=old_name)
+
+    @property
+    def subcategories(self):
+        return self._subcategories
+
+    @subcategories.setter
+    def subcategories(self, subcategories):
+        self._subcategories = CategoryList(subcategories or [], parent=self)
+
+    def path(self):
+        """
+        Returns the names of this category's ancestors and its own name, starting from the top level.
+        """
+        names = []
+        category = self
+        while category is not None:
+            names.insert(0, category.name)
+            category = category.parent
+        return names
+
+class CategoryList(list):
+    """
+    List of categories with constant-time lookup by name and number.
+    Categories added to the list get its parent as their parent; a list created with ignored=True flags its categories as ignored.
+    If several categories share a name or number, find() returns the first one.
+    """
+    def __init__(self, categories=(), parent=None, ignored=False):
+        super().__init__()
+        self.parent = parent
+        self.ignored = ignored
+        self._by_name = {}
+        self._by_number = {}
+        self._positions = {}
+        self.extend(categories)
+
+    def __reduce__(self):
+        # list subclasses are unpickled by calling extend() before their attributes are restored, so rebuild them via __init__ instead
+        return (self.__class__, (list(self), self.parent, self.ignored))
+
+    def _adopt(self, category):
+        category._container = self
+        category.parent = self.parent
+        if self.ignored:
+            category.ignored = True
+
+    def _index(self, category, position):
+        self._by_name.setdefault(category.name, category)
+        self._by_number.setdefault(category.number, category)
+        self._positions.setdefault(id(category), position)
+
+    def _reindex(self):
+        self._by_name = {}
+        self._by_number = {}
+        self._positions = {}
+        for position, category in enumerate(self):
+            self._index(category, position)
+
+    def _reindex_category(self, category, old_name=None, old_number=None):
+        if self._by_name.get(old_name) is category or self._by_number.get(old_number) is category:
+            self._reindex()
         else:
-            self.subcategories = []
+            self._by_name.setdefault(category.name, category)
+            self._by_number.setdefault(category.number, category)
+
+    def _release(self, categories):
+        for category in categories:
+            if category._container is self:
+                category._container = None
+
+    def append(self, category):
+        self._adopt(category)
+        super().append(category)
+        self._index(category, len(self) - 1)
+
+    def extend(self, categories):
+        for category in categories:
+            self.append(category)
+
+    def insert(self, position, category):
+        self._adopt(category)
+        super().insert(position, category)
+        self._reindex()
+
+    def remove(self, category):
+        super().remove(category)
+        self._release([category])
+        self._reindex()
+
+    def pop(self, position=-1):
+        category = super().pop(position)
+        self._release([category])
+        self._reindex()
+        return category
+
+    def clear(self):
+        self._release(self)
+        super().clear()
+        self._reindex()
+
+    def __setitem__(self, key, value):
+        self._release(self[key] if isinstance(key, slice) else [self[key]])
+        for category in (value if isinstance(key, slice) else [value]):
+            self._adopt(category)
+        super().__setitem__(key, value)
+        self._reindex()
+
+    def __delitem__(self, key):
+        self._release(self[key] if isinstance(key, slice) else [self[key]])
+        super().__delitem__(key)
+        self._reindex()
+
+    def __iadd__(self, categories):
+        self.extend(categories)
+        return self
+
+    def index(self, category, *args):
+        position = self._positions.get(id(category))
+        if position is not None and not args:
+            return position
+        return super().index(category, *args)
+
+    def find(self, name=None, number=None):
+        """
+        Returns the category with the given name or number, or None if there is none.
+        """
+        if number is not None:
+            return self._by_number.get(number)
+        return self._by_name.get(name)
+
+    def walk(self):
+        """
+        Yields all categories of the tree, each followed by its subcategories.
+        """
+        for category in self:
+            yield category
+            yield from category.subcategories.walk()
 
 def prepare_string_for_comparison(string, case_sensitive, strip):
     if not case_sensitive:
@@ -99,52 +398,84 @@ def prepare_string_for_comparison(string, case_sensitive, strip):
         string = string.strip()
     return string
 
+class StringMatcher:
+    """
+    A list of strings (e.g. strings to ignore from a configuration) compiled once to check many other strings against it.
+    Exact matches are looked up in a set, substrings are prefiltered with one combined regex, prefixes and suffixes with one tuple.
+    """
+    def __init__(self, strings, case_sensitive=False, strip=True):
+        self.strings = list(strings)
+        self.case_sensitive = case_sensitive
+        self.strip = strip
+        self.compare_strings = [self.prepare(string) for string in self.strings]
+        self.originals = {} # {compare string: first original string}
+        for compare_string, string in zip(self.compare_strings, self.strings):
+            self.originals.setdefault(compare_string, string)
+        self.exact = set(self.compare_strings)
+        self.affixes = tuple(self.compare_strings)
+        if self.compare_strings:
+            self.regex = re.compile("|".join(re.escape(string) for string in sorted(self.exact, key=len, reverse=True)))
+        else:
+            self.regex = None
+
+    def prepare(self, string):
+        return prepare_string_for_comparison(string, self.case_sensitive, self.strip)
+
+    def equal(self, strings):
+        # returns list of strings which equal any string of the matcher
+        compare_strings = [self.prepare(string) for string in strings]
+        return [strings[compare_strings.index(string)] for string in compare_strings if string in self.exact]
+
+    def containing(self, strings):
+        # returns list of strings of the matcher which are contained in any of the strings
+        matches = []
+        for string in strings:
+            string = self.prepare(string)
+            if self.regex and self.regex.search(string):
+                matches.extend(self.originals[query_string] for query_string in self.compare_strings if query_string in string)
+        return matches
+
+    def startswith(self, strings):
+        # returns list of strings of the matcher which any of the strings starts with
+        matches = []
+        for string in strings:
+            string = self.prepare(string)
+            if string.startswith(self.affixes):
+                matches.extend(self.originals[query_string] for query_string in self.compare_strings if string.startswith(query_string))
+        return matches
+
+    def endswith(self, strings):
+        # returns list of strings of the matcher which any of the strings ends with
+        matches = []
+        for string in strings:
+            string = self.prepare(string)
+            if string.endswith(self.affixes):
+                matches.extend(self.originals[query_string] for query_string in self.compare_strings if string.endswith(query_string))
+        return matches
+
+@functools.lru_cache(maxsize=256)
+def _compiled_string_matcher(strings, case_sensitive, strip):
+    return StringMatcher(strings, case_sensitive=case_sensitive, strip=strip)
+
+def string_matcher(strings, case_sensitive=False, strip=True):
+    # returns a (cached) StringMatcher for the list of strings, so rule lists are only compiled once per process
+    return _compiled_string_matcher(tuple(strings), case_sensitive, strip)
+
 def equal_strings_check(list1, list2, case_sensitive=False, strip=True):
     # compares strings of two lists for matches and returns list of matching strings
-    matches = []
-    compare_list1 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list1]
-    compare_list2 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list2]
-
-    for string in compare_list1:
-        if string in compare_list2:
-            matches.append(list1[compare_list1.index(string)])
-    return matches
+    return string_matcher(list2, case_sensitive, strip).equal(list1)
 
 def containing_strings_check(list1, list2, case_sensitive=False, strip=True):
     # checks if any string of list1 contains any string of list2 and returns list of matching strings of list2
-    matches = []
-    compare_list1 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list1]
-    compare_list2 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list2]
-
-    for string in compare_list1:
-        for query_string in compare_list2:
-            if query_string in string:
-                matches.append(list2[compare_list2.index(query_string)])
-    return matches
+    return string_matcher(list2, case_sensitive, strip).containing(list1)
 
 def startswith_strings_check(list1, list2, case_sensitive=False, strip=True):
     # checks if any string of list1 starts with any string of list2 and returns list of matching strings of list2
-    matches = []
-    compare_list1 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list1]
-    compare_list2 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list2]
-
-    for string in compare_list1:
-        for query_string in compare_list2:
-            if string.startswith(query_string):
-                matches.append(list2[compare_list2.index(query_string)])
-    return matches
+    return string_matcher(list2, case_sensitive, strip).startswith(list1)
 
 def endswith_strings_check(list1, list2, case_sensitive=False, strip=True):
     # checks if any string of list1 ends with any string of list2 and returns list of matching strings of list2
-    matches = []
-    compare_list1 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list1]
-    compare_list2 = [prepare_string_for_comparison(string, case_sensitive, strip) for string in list2]
-
-    for string in compare_list1:
-        for query_string in compare_list2:
-            if string.endswith(query_string):
-                matches.append(list2[compare_list2.index(query_string)])
-    return matches
+    return string_matcher(list2, case_sensitive, strip).endswith(list1)
 
 def replace_in_string(string: str, strings_to_replace: dict) -> str:
     # strings_to_replace must be a dictionary of {"string to replace": "by another string"}
@@ -152,24 +483,77 @@ def replace_in_string(string: str, strings_to_replace: dict) -> str:
         string = string.replace(string_tuple[0], string_tuple[1])
     return string
 
-def remove_double_strings_loop(text, string, description=None, number_of_runs=100):
-    loop_count = 0
-    while string+string in text:
-        text = text.replace(string+string, string)
-        loop_count += 1
-        if loop_count > number_of_runs:
-            if not description:
-                description = "'" + string + "'"
-            print("\nLoop to replace double " + description + " ran " + number_of_runs + " times for following text:")
-            print(text)
-            break
-    return text
+class Normalizer:
+    """
+    Compiles text cleanup rules into precompiled regexes, so each string is cleaned up in one replacing pass (plus one collapsing pass)
+    instead of a chain of str.replace calls.
+    replacements: {"string to replace": "by another string"}; if several strings match at the same position, the longest one wins
+    removals: list of strings to remove
+    collapse: list of strings of which repetitions are reduced to a single occurrence, e.g. [" ", "\n"]
+    strip: whether to strip leading and trailing whitespaces from the result
+    sequential: apply the removals and replacements one after another in the given order, like a chain of str.replace calls.
+        Use this for rules from configs and for rules which overlap or build on each other (e.g. removing "Lit." can leave "Lit"),
+        as one pass would change their results.
+    Results are cached, so normalizing repeated inputs (e.g. units or origins) is a dictionary lookup.
+    """
+    def __init__(self, replacements=None, removals=None, collapse=None, strip=False, sequential=False, cache_size=4096):
+        self.rules = dict.fromkeys(removals or [], "")
+        self.rules.update(replacements or {})
+        self.collapse = [string for string in collapse or [] if string]
+        self.sequential = sequential
+        if not sequential:
+            for string in self.collapse:
+                self.rules.setdefault(string, string)
+        self.strip = strip
+        rule_strings = sorted([string for string in self.rules if string], key=len, reverse=True)
+        self.targets = [self.rules[string] for string in rule_strings]
+        if rule_strings and not sequential:
+            self.regex = re.compile("|".join(f"({self._rule_pattern(string)})" for string in rule_strings))
+        else:
+            self.regex = None
+        if self.collapse:
+            self.collapse_regex = re.compile("|".join(f"((?:{re.escape(string)}){{2,}})" for string in self.collapse))
+        else:
+            self.collapse_regex = None
+        self.normalize = functools.lru_cache(maxsize=cache_size)(self._normalize)
+
+    def __call__(self, text):
+        return self.normalize(text)
+
+    def _rule_pattern(self, string):
+        # collapsible strings within a rule also match their repetitions, e.g. ".\n" matches ".\n\n" if line breaks are collapsed
+        if not self.collapse:
+            return re.escape(string)
+        collapse_pattern = "|".join(re.escape(c) for c in sorted(self.collapse, key=len, reverse=True))
+        parts = re.split(f"({collapse_pattern})", string)
+        return "".join(f"(?:{re.escape(part)})+" if part in self.collapse else re.escape(part) for part in parts)
+
+    def _normalize(self, text):
+        if self.sequential:
+            for string, target in self.rules.items():
+                if string:
+                    text = text.replace(string, target)
+        elif self.regex:
+            text = self.regex.sub(lambda match: self.targets[match.lastindex - 1], text)
+        if self.collapse_regex: # repetitions which only arose by replacing
+            text = self.collapse_regex.sub(lambda match: self.collapse[match.lastindex - 1], text)
+        if self.strip:
+            text = text.strip()
+        return text
+
+@functools.lru_cache(maxsize=64)
+def _collapsing_normalizer(string):
+    return Normalizer(collapse=[string])
+
+def remove_double_strings_loop(text, string):
+    # legacy name, reduces repetitions of string in text to a single occurrence
+    return _collapsing_normalizer(string)(text)
 
 def find_available_locales():
     available_locales = []
-    for package in os.listdir("locales"):
-        package_path = os.path.join("locales", package)
-        if not os.path.isdir(package_path):
+    for package in os.listdir(LOCALES_FOLDER):
+        package_path = os.path.join(LOCALES_FOLDER, package)
+        if package.startswith(".") or not os.path.isdir(package_path):
             continue
         for file in [f for f in os.listdir(package_path) if os.path.isfile(os.path.join(package_path, f))]:
             if file.endswith(".yaml"):
@@ -179,22 +563,14 @@ def find_available_locales():
     return available_locales
 
 def find_instances():
-    root_path = "data"
-    if os.path.isdir(root_path):
-        return [d for d in os.listdir(root_path) if os.path.isfile(os.path.join(root_path, d, "settings.yaml"))]
-    else:
-        return []
+    return storage.current().find_instances()
 
 def find_configurations(foodcoop):
-    root_path = os.path.join("data", foodcoop)
-    return [d for d in os.listdir(root_path) if os.path.isdir(os.path.join(root_path, d))]
+    return storage.current().find_configurations(foodcoop)
 
 def read_config(foodcoop, configuration):
-    filename = os.path.join("data", foodcoop, configuration, "config.yaml")
-    if os.path.isfile(filename):
-        with open(filename, encoding="UTF8") as yaml_file:
-            configuration = yaml.safe_load(yaml_file)
-    else:
+    configuration = storage.current().read_config(foodcoop, configuration)
+    if configuration is None:
         configuration = {}
     return configuration
 
@@ -206,118 +582,390 @@ def read_in_config(config, detail, alternative=None):
         return alternative
 
 def save_config(foodcoop, configuration, config):
-    config_path = os.path.join("data", foodcoop, configuration)
-    os.makedirs(config_path, exist_ok=True)
-    filename = os.path.join(config_path, "config.yaml")
-    with open(filename, "w", encoding="UTF8") as yaml_file:
-        yaml.safe_dump(config, yaml_file, allow_unicode=True, indent=4, sort_keys=False)
+    storage.current().save_config(foodcoop, configuration, config)
+
+def update_config(foodcoop, configuration, update):
+    """
+    Locked read-modify-write of a configuration's config: update is called with the current config and may modify it in place.
+    Use this instead of read_config and save_config if other runs could change the config in the meantime.
+    """
+    return storage.current().update_config(foodcoop, configuration, update)
+
+def read_manual_changes(foodcoop, configuration, order_number=None):
+    # returns {order number: manual changes} of a configuration, or only the manual changes of the article with the given order number
+    return storage.current().read_manual_changes(foodcoop, configuration, order_number)
 
 def set_config_detail(foodcoop, configuration, detail, value):
-    config = read_config(foodcoop, configuration)
-    config[detail] = value
-    save_config(foodcoop, configuration, config)
+    update_config(foodcoop, configuration, lambda config: config.update({detail: value}))
 
 def rename_configuration(foodcoop, old_configuration_name, new_configuration_name):
+    """
+    Renames a configuration, or merges it into the configuration of the new name if that already exists.
+    Runs don't store their path, so none of them has to be loaded or saved for this.
+    """
     configurations = find_configurations(foodcoop)
     if old_configuration_name in configurations:
-        # rename folder
-        existing_output_path = output_path(foodcoop, old_configuration_name)
-        new_output_path = output_path(foodcoop, new_configuration_name)
-        if os.path.exists(new_output_path): # TODO: ask if user really wants to merge configurations and which config.yaml should be kept; then keep that config.yaml resp. overwrite it, instead of creating config.yaml*
-            for entry in os.scandir(existing_output_path):
-                new_entry_name = entry.name
-                while os.path.exists(os.path.join(new_output_path, new_entry_name)):
-                    new_entry_name += "*"
-                os.rename(os.path.join(existing_output_path, entry.name), os.path.join(new_output_path, new_entry_name))
-            os.rmdir(existing_output_path)
+        if new_configuration_name in configurations or os.path.exists(output_path(foodcoop, new_configuration_name)):
+            merge_configurations(foodcoop, old_configuration_name, new_configuration_name)
         else:
-            os.rename(existing_output_path, new_output_path)
-
-        # update path attribute in run objects
-        run_folders = [d for d in os.listdir(new_output_path) if os.path.isdir(os.path.join(new_output_path, d))]
-        for run_folder in run_folders:
-            run = run.load(path=os.path.join(new_output_path, run_folder))
-            run.path = new_output_path
-            run.save()
-
+            storage.current().rename_configuration(foodcoop, old_configuration_name, new_configuration_name)
         return new_configuration_name
     else:
         return None
 
+def merge_configurations(foodcoop, old_configuration_name, new_configuration_name):
+    """
+    Moves the runs and other files of a configuration into another one and removes it. Runs which exist in both get an asterisk appended.
+    The run indexes are merged without loading any runs, only archived runs of the old configuration are restored first.
+    """
+    # TODO: ask if user really wants to merge configurations and which config.yaml should be kept; then keep that config.yaml resp. overwrite it, instead of creating config.yaml*
+    for run_name in read_archive_index(foodcoop, old_configuration_name):
+        restore_run(foodcoop, old_configuration_name, run_name)
+    old_runs = read_run_index(foodcoop, old_configuration_name)
+    new_runs = read_run_index(foodcoop, new_configuration_name)
+    existing_output_path = output_path(foodcoop, old_configuration_name)
+    new_output_path = output_path(foodcoop, new_configuration_name)
+    os.makedirs(new_output_path, exist_ok=True)
+    configuration_files = [storage.RUN_INDEX_FILE, RUN_COUNTER_FILE, ARCHIVE_FILE, ARCHIVE_INDEX_FILE]
+    for entry in os.scandir(existing_output_path):
+        if entry.name.endswith(".lock") or [f for f in configuration_files if entry.name.startswith(f)]:
+            continue
+        new_entry_name = entry.name
+        while os.path.exists(os.path.join(new_output_path, new_entry_name)) or new_entry_name in new_runs:
+            new_entry_name += "*"
+        if entry.name in old_runs:
+            storage.current().move_run(foodcoop, old_configuration_name, entry.name, new_configuration_name, new_entry_name)
+            new_runs[new_entry_name] = dict(old_runs[entry.name], name=new_entry_name)
+        else:
+            os.rename(os.path.join(existing_output_path, entry.name), os.path.join(new_output_path, new_entry_name))
+    storage.current().write_run_index(foodcoop, new_configuration_name, [new_runs[name] for name in natsorted(new_runs)])
+    storage.current().delete_configuration(foodcoop, old_configuration_name)
+
 def delete_configuration(foodcoop, configuration):
     configuration_path = os.path.join("data", foodcoop, configuration)
     success = None
     feedback = None
-    if os.path.exists(configuration_path):
+    if configuration in find_configurations(foodcoop):
         try:
-            shutil.rmtree(configuration_path)
+            storage.current().delete_configuration(foodcoop, configuration)
             success = True
         except OSError as e:
             success = False
             feedback = f"Error: {configuration_path} : {e.strerror}"
     return success, feedback
 
-def read_settings(foodcoop):
-    settings_path = os.path.join("data", foodcoop)
-    os.makedirs(settings_path, exist_ok=True)
-    filename = os.path.join(settings_path, "settings.yaml")
-    if os.path.isfile(filename):
-        with open(filename, encoding="UTF8") as yaml_file:
-            settings = yaml.safe_load(yaml_file)
-    else:
-        settings = {
-            "default_locale": "de_AT",
-            "configuration_groups": {
-            }
+def default_settings():
+    return {
+        "default_locale": "de_AT",
+        "configuration_groups": {
         }
+    }
+
+def read_settings(foodcoop):
+    settings = storage.current().read_settings(foodcoop)
+    if settings is None:
+        settings = default_settings()
     return settings
 
 def save_settings(foodcoop, settings):
-    settings_path = os.path.join("data", foodcoop)
-    os.makedirs(settings_path, exist_ok=True)
-    filename = os.path.join(settings_path, "settings.yaml")
-    with open(filename, "w", encoding="UTF8") as yaml_file:
-        yaml.safe_dump(settings, yaml_file, allow_unicode=True, indent=4, sort_keys=False)
+    storage.current().save_settings(foodcoop, settings)
 
 def set_setting(foodcoop, setting, value):
-    settings = read_settings(foodcoop)
-    settings[detail] = value
-    save_settings(foodcoop, settings)
+    storage.current().update_settings(foodcoop, lambda settings: settings.update({setting: value}), default=default_settings())
 
 def read_locales(foodcoop, locale=None):
+    """
+    Returns a LocaleBundle with the strings of every package in the given locale (or the foodcoop's default locale).
+    The bundle is compiled once from the YAML sources and only rebuilt when one of them changes.
+    """
     if not locale:
         locale = read_settings(foodcoop)["default_locale"]
-    locales = {}
-    for package in os.listdir("locales"):
-        if not os.path.isdir(os.path.join("locales", package)):
+    sources = locale_sources(locale)
+    bundle = _locale_bundles.get(locale)
+    if not bundle or bundle.sources != sources:
+        bundle = load_compiled_locale_bundle(locale, sources)
+        _locale_bundles[locale] = bundle
+    return bundle
+
+class LocaleBundle(collections.abc.Mapping):
+    """
+    Read-only mapping {package: strings} of a compiled locale.
+    Packages are stored pickled and only unpickled on first access.
+    """
+    def __init__(self, locale, sources, compiled_packages):
+        self.locale = locale
+        self.sources = sources
+        self.compiled_packages = compiled_packages
+        self._packages = {}
+
+    def __getitem__(self, package):
+        if package not in self._packages:
+            self._packages[package] = pickle.loads(self.compiled_packages[package])
+        return self._packages[package]
+
+    def __iter__(self):
+        return iter(self.compiled_packages)
+
+    def __len__(self):
+        return len(self.compiled_packages)
+
+_locale_bundles = {} # {locale: LocaleBundle}
+
+def locale_sources(locale):
+    """
+    Resolves the source file of every package in one pass over the locales folder: requested locale -> en -> first file.
+    Returns {package: (file path, mtime, size, inode)}.
+    """
+    sources = {}
+    for package in sorted(os.listdir(LOCALES_FOLDER)):
+        package_path = os.path.join(LOCALES_FOLDER, package)
+        if package.startswith(".") or not os.path.isdir(package_path):
             continue
-        if os.path.isfile(os.path.join("locales", package, locale)):
-            locale_package = locale + ".yaml"
-        elif os.path.isfile(os.path.join("locales", package, "en")):
-            locale_package = "en.yaml"
-        else:
-            files = os.listdir(os.path.join("locales", package))
-            if files:
-                locale_package = files[0]
-            else:
-                continue
-        with open(os.path.join("locales", package, locale_package), encoding="UTF8") as yaml_file:
-            locales[package] = yaml.safe_load(yaml_file)
-    return locales
+        files = sorted(f for f in os.listdir(package_path) if f.endswith(".yaml"))
+        if not files:
+            continue
+        for file in (locale + ".yaml", "en.yaml", files[0]):
+            if file in files:
+                break
+        file_path = os.path.join(package_path, file)
+        sources[package] = (file_path,) + storage.file_signature(file_path)
+    return sources
+
+def compiled_locale_bundle_path(locale):
+    return os.path.join(COMPILED_LOCALES_FOLDER, locale + ".pickle")
+
+def load_compiled_locale_bundle(locale, sources):
+    bundle_path = compiled_locale_bundle_path(locale)
+    if os.path.isfile(bundle_path):
+        try:
+            with open(bundle_path, "rb") as bundle_file:
+                compiled = pickle.load(bundle_file)
+            if compiled.get("format") == LOCALE_BUNDLE_FORMAT_VERSION and compiled.get("sources") == sources:
+                return LocaleBundle(locale, sources, compiled["packages"])
+        except Exception as e:
+            print(f"Could not read compiled locale bundle {bundle_path}: {e}")
+    return compile_locale_bundle(locale, sources)
+
+def compile_locale_bundle(locale, sources):
+    compiled_packages = {}
+    for package, source in sources.items():
+        with open(source[0], encoding="UTF8") as yaml_file:
+            compiled_packages[package] = pickle.dumps(yaml.safe_load(yaml_file))
+    compiled = {"format": LOCALE_BUNDLE_FORMAT_VERSION, "sources": sources, "packages": compiled_packages}
+    bundle_path = compiled_locale_bundle_path(locale)
+    try:
+        os.makedirs(COMPILED_LOCALES_FOLDER, exist_ok=True)
+        tmp_path = bundle_path + ".tmp"
+        with open(tmp_path, "wb") as bundle_file:
+            pickle.dump(compiled, bundle_file)
+        os.replace(tmp_path, bundle_path)
+    except OSError as e:
+        print(f"Could not write compiled locale bundle {bundle_path}: {e}")
+    return LocaleBundle(locale, sources, compiled_packages)
+
+def cache_path(foodcoop, name):
+    return os.path.join(storage.current().instance_path(foodcoop), CACHE_FOLDER, name)
 
 def output_path(foodcoop, configuration):
-    return os.path.join("data", foodcoop, configuration)
+    return storage.current().configuration_path(foodcoop, configuration)
 
 def get_outputs(foodcoop, configuration):
-    path = output_path(foodcoop, configuration)
-    if os.path.exists(path):
-        return [d for d in natsorted(os.listdir(path)) if os.path.isdir(os.path.join(path, d))]
+    return list(read_run_index(foodcoop, configuration))
+
+def run_index_entry(run):
+    """
+    Summary of a run as stored in the run index of its configuration.
+    """
+    download_path = os.path.join(run.path, "download")
+    if os.path.isdir(download_path):
+        files = sorted(os.listdir(download_path))
+    else:
+        files = []
+    last_log_entry = None
+    if run.log:
+        entry = run.log[-1]
+        last_log_entry = {"action": entry.action, "done_by": entry.done_by, "datetime": entry.datetime.isoformat()}
+    if run.next_possible_methods:
+        status = "open"
     else:
+        status = "finished"
+    return {"name": run.name, "status": status, "completion_percentage": run.completion_percentage, "last log entry": last_log_entry, "files": files}
+
+def update_run_index(run):
+    # stores the current state of the run in the run index of its configuration
+    add_run_index_entry(run.foodcoop, run.configuration, run_index_entry(run))
+
+def add_run_index_entry(foodcoop, configuration, entry):
+    storage.current().add_run_index_entry(foodcoop, configuration, entry, rebuild=rebuild_run_index)
+
+def read_run_index(foodcoop, configuration):
+    """
+    Returns a dictionary of {run name: run index entry} for all runs of a configuration, naturally sorted by run name.
+    """
+    runs = storage.current().read_run_index(foodcoop, configuration, rebuild=rebuild_run_index)
+    return {name: runs[name] for name in natsorted(runs)}
+
+def rebuild_run_index(foodcoop, configuration):
+    """
+    Creates the run index of a configuration from its runs, e.g. for data created before run indexes were introduced.
+    """
+    path = output_path(foodcoop, configuration)
+    if not os.path.isdir(path):
+        return {}
+    runs = {}
+    for run_name, archive_entry in read_archive_index(foodcoop, configuration).items():
+        runs[run_name] = archive_entry["run index entry"]
+    for run_name in storage.current().find_runs(foodcoop, configuration):
+        run_path = os.path.join(path, run_name)
+        try:
+            runs[run_name] = run_index_entry(Run.load(run_path))
+        except Exception as e: # e.g. legacy run objects of scripts which can't be imported anymore
+            print(f"Could not add run {run_path} to run index: {e}")
+    runs = {name: runs[name] for name in natsorted(runs)}
+    storage.current().write_run_index(foodcoop, configuration, runs.values())
+    return runs
+
+def apply_retention(foodcoop, configuration):
+    """
+    Archives the runs of a configuration which none of its retention policies keeps:
+    "keep last runs" (number), "keep runs for days" (maximum age), "keep last imported run" (default: True).
+    Without "keep last runs" and "keep runs for days" in the config, all runs are kept. Only finished runs are archived,
+    runs which still have next possible methods are kept regardless of the policies.
+    Returns the names of the archived runs.
+    """
+    config = read_config(foodcoop, configuration)
+    archived_runs = []
+    for run_name in runs_to_archive(foodcoop, configuration, config):
+        try:
+            archive_run(foodcoop, configuration, run_name)
+            archived_runs.append(run_name)
+        except OSError as e:
+            print(f"Could not archive run {run_name} of {configuration}: {e}")
+    return archived_runs
+
+def runs_to_archive(foodcoop, configuration, config):
+    keep_last_runs = config.get("keep last runs")
+    keep_runs_for_days = config.get("keep runs for days")
+    if keep_last_runs is None and keep_runs_for_days is None:
         return []
+    runs = [entry for entry in read_run_index(foodcoop, configuration).values() if not entry.get("archived")]
+    run_names = [entry["name"] for entry in runs]
+    runs_to_keep = set()
+    if keep_last_runs:
+        runs_to_keep.update(run_names[-int(keep_last_runs):])
+    if keep_runs_for_days is not None:
+        oldest_datetime_to_keep = datetime.datetime.now() - datetime.timedelta(days=float(keep_runs_for_days))
+        runs_to_keep.update(entry["name"] for entry in runs if run_datetime(foodcoop, configuration, entry) >= oldest_datetime_to_keep)
+    if config.get("keep last imported run", True) and config.get("last imported run"):
+        runs_to_keep.add(config["last imported run"])
+    runs_to_keep.update(entry["name"] for entry in runs if entry.get("status") != "finished") # still in progress
+    return [run_name for run_name in run_names if run_name not in runs_to_keep]
+
+def run_datetime(foodcoop, configuration, run_entry):
+    # time of the last log entry, otherwise of the last change of the run folder
+    last_log_entry = run_entry.get("last log entry")
+    if last_log_entry and last_log_entry.get("datetime"):
+        return datetime.datetime.fromisoformat(last_log_entry["datetime"])
+    return datetime.datetime.fromtimestamp(os.path.getmtime(os.path.join(output_path(foodcoop, configuration), run_entry["name"])))
+
+def archive_run(foodcoop, configuration, run_name):
+    """
+    Moves a run folder into the compressed archive of its configuration, indexed in an archive index of JSON lines.
+    ZIP files of the downloads are left out, as they are created again on demand.
+    Run data kept outside of the folder (e.g. in the SQLite storage) is archived as files and removed from the storage.
+    """
+    path = output_path(foodcoop, configuration)
+    run_path = os.path.join(path, run_name)
+    archive_path = os.path.join(path, ARCHIVE_FILE)
+    with storage.file_lock(archive_path):
+        files = []
+        for folder, subfolders, file_names in os.walk(run_path):
+            for file_name in file_names:
+                file_path = os.path.join(folder, file_name)
+                if folder == run_path and file_name.endswith(".zip"):
+                    continue
+                files.append(os.path.relpath(file_path, run_path).replace(os.path.sep, "/"))
+        exported_files = storage.current().export_run(foodcoop, configuration, run_name)
+        with zipfile.ZipFile(archive_path, "a", compression=zipfile.ZIP_DEFLATED) as archive:
+            for file in files:
+                if file not in exported_files:
+                    archive.write(os.path.join(run_path, file), run_name + "/" + file)
+            for file, content in exported_files.items():
+                archive.writestr(run_name + "/" + file, content)
+        files = sorted(set(files) | set(exported_files))
+        entry = read_run_index(foodcoop, configuration).get(run_name) or {"name": run_name}
+        entry["archived"] = True
+        archive_entry = {"name": run_name, "archived": datetime.datetime.now().isoformat(), "files": files, "run index entry": entry}
+        with open(os.path.join(path, ARCHIVE_INDEX_FILE), "a", encoding="UTF8") as index_file:
+            index_file.write(json.dumps(archive_entry, ensure_ascii=False) + "\n")
+        storage.current().remove_run(foodcoop, configuration, run_name)
+        add_run_index_entry(foodcoop, configuration, entry)
+
+def restore_run(foodcoop, configuration, run_name):
+    """
+    Extracts an archived run into its run folder again and removes it from the archive.
+    Returns the path of the run folder, or None if the run is neither on disk nor archived.
+    """
+    path = output_path(foodcoop, configuration)
+    run_path = os.path.join(path, run_name)
+    archive_path = os.path.join(path, ARCHIVE_FILE)
+    if not os.path.isfile(archive_path):
+        return run_path if os.path.isdir(run_path) else None
+    with storage.file_lock(archive_path):
+        if os.path.isdir(run_path):
+            return run_path
+        archive_entries = read_archive_index(foodcoop, configuration)
+        archive_entry = archive_entries.pop(run_name, None)
+        if not archive_entry:
+            return None
+        prefix = run_name + "/"
+        temp_path = archive_path + ".tmp"
+        with zipfile.ZipFile(archive_path) as archive, zipfile.ZipFile(temp_path, "w", compression=zipfile.ZIP_DEFLATED) as new_archive:
+            for member in archive.infolist():
+                if member.filename.startswith(prefix):
+                    archive.extract(member, path)
+                else:
+                    new_archive.writestr(member, archive.read(member))
+        os.replace(temp_path, archive_path)
+        os.makedirs(run_path, exist_ok=True) # in case the run folder was empty
+        storage.write_json_lines(os.path.join(path, ARCHIVE_INDEX_FILE), archive_entries.values())
+        entry = archive_entry["run index entry"]
+        entry.pop("archived", None)
+        add_run_index_entry(foodcoop, configuration, entry)
+    return run_path
+
+def read_archived_files(foodcoop, configuration, run_name, folder=None):
+    """
+    Returns {path relative to the run folder: content} of the files of an archived run, or only of those in the given folder,
+    without extracting them. Returns {} if the run isn't archived.
+    """
+    archive_path = os.path.join(output_path(foodcoop, configuration), ARCHIVE_FILE)
+    if not os.path.isfile(archive_path):
+        return {}
+    prefix = run_name + "/"
+    if folder:
+        prefix += folder + "/"
+    files = {}
+    with storage.file_lock(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                if member.filename.startswith(prefix) and not member.is_dir():
+                    files[member.filename[len(run_name) + 1:]] = archive.read(member)
+    return files
+
+def read_archive_index(foodcoop, configuration):
+    # returns {run name: archive entry} of the archived runs of a configuration
+    index_path = os.path.join(output_path(foodcoop, configuration), ARCHIVE_INDEX_FILE)
+    if not os.path.isfile(index_path):
+        return {}
+    archive_entries, number_of_lines = storage.read_json_lines(index_path)
+    return archive_entries
 
 def get_file_path(foodcoop, configuration, run, folder, ending="", notifications=None):
     if not notifications:
         notifications = []
+    if not os.path.isdir(os.path.join(output_path(foodcoop, configuration), run)):
+        restore_run(foodcoop, configuration, run)
     path = os.path.join(output_path(foodcoop, configuration), run, folder)
     if os.path.isdir(path) and ending:
         files = [os.path.join(path, f) for f in os.listdir(path) if f.endswith(ending)]
@@ -335,38 +983,57 @@ def list_categories(locales, categories):
             txt += str(category.number)
         if category.name:
             txt += " " + category.name
-        if category.subcategories:
-            subcats = category.subcategories.copy()
-            txt += f' ({locales["base"]["incl. subcategories"]} ' + subcats[0].name
-            subcats.pop(0)
-            for sc in subcats:
-                txt += ", " + sc.name
-            txt += ")"
+        subcategories = [sc.name for sc in category.subcategories if not sc.ignored]
+        if subcategories:
+            txt += f' ({locales["base"]["incl. subcategories"]} ' + ", ".join(subcategories) + ")"
         txt += "\n"
     return txt
 
 def prepare_output(foodcoop, configuration, name=""):
-    path = "data"
-    os.makedirs(path, exist_ok=True)
-    path = os.path.join(path, foodcoop)
-    os.makedirs(path, exist_ok=True)
-    path = os.path.join(path, configuration)
+    path = output_path(foodcoop, configuration)
     os.makedirs(path, exist_ok=True)
     if name:
         path = os.path.join(path, name)
         os.makedirs(path, exist_ok=True)
     else:
-        name = datetime.date.today().isoformat()
-        path = os.path.join(path, name)
-        number = 1
-        while os.path.isdir(path + "_" + str(number)):
-            number += 1
-        path += "_" + str(number)
-        name += "_" + str(number)
-        os.makedirs(path, exist_ok=True)
+        path, name = allocate_run_folder(path)
 
     return path, name
 
+def allocate_run_folder(configuration_path):
+    """
+    Creates the folder for a new run, named <date>_<number>, and returns its path and name.
+    The last number is kept in a counter file, so existing folders don't have to be probed one by one.
+    As os.mkdir fails for existing folders, runs started at the same time never get the same folder.
+    """
+    date = datetime.date.today().isoformat()
+    counter_path = os.path.join(configuration_path, RUN_COUNTER_FILE)
+    with storage.file_lock(counter_path):
+        counter = {}
+        if os.path.isfile(counter_path):
+            try:
+                with open(counter_path, encoding="UTF8") as counter_file:
+                    counter = json.load(counter_file)
+            except ValueError:
+                pass
+        if counter.get("date") == date:
+            number = counter.get("number", 0) + 1
+        else:
+            number = 1
+        while True:
+            name = f"{date}_{number}"
+            path = os.path.join(configuration_path, name)
+            try:
+                os.mkdir(path)
+                break
+            except FileExistsError:
+                number += 1
+        temp_path = counter_path + ".tmp"
+        with open(temp_path, "w", encoding="UTF8") as counter_file:
+            json.dump({"date": date, "number": number}, counter_file)
+        os.replace(temp_path, counter_path)
+    return path, name
+
 def file_path(path, folder, file_name):
     path = os.path.join(path, folder)
     os.makedirs(path, exist_ok=True)
@@ -0,0 +1,74 @@
+"""
+End-to-end benchmark of foodsoft.FSConnector against the local Foodsoft stand-in (see foodsoft_standin.py), for 10, 100 and 1000 suppliers.
+For each flow (login, supplier data, articles CSVs via foodsoft_article_import.get_articles_from_foodsoft, stock articles, article categories, last closed orders)
+prints wall time, pages served, pages/s and, from the connector's request_stats, bytes received, the time spent waiting for responses and parsing them
+and the retries (waiting and parsing are summed over all threads, so they can exceed the wall time). With --endpoints, also per endpoint.
+
+The stand-in only serves synthetic pages, so the numbers show the connector's own overhead rather than the timings of a real instance.
+
+With --api, foodsoft_api.FSApiConnector is benchmarked instead, which reads the article categories without keywords from the stand-in's API.
+
+Run from the repository root: python benchmarks/bench_connector.py [--suppliers 10 100 1000] [--latency 0.02] [--failure-rate 0.01] [--api] [--endpoints]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import foodsoft
+import foodsoft_api
+import foodsoft_article_import
+from foodsoft_standin import StandIn
+
+SUPPLIER_FIELDS = dict(name_fields=["custom_fields_public_name", "name"], address_fields=["custom_fields_public_address", "address"], origin_fields=["custom_fields_origin"], website_fields=["url"], category_fields=["supplier_category_id"])
+
+def flows(connector, supplier_ids):
+    return {
+        "login": lambda: connector.login(connector._user, "password"),
+        "supplier data": lambda: connector.get_supplier_data(**SUPPLIER_FIELDS),
+        "articles CSVs": lambda: connector.map_concurrently(lambda supplier_id: foodsoft_article_import.get_articles_from_foodsoft(locales={}, supplier_id=supplier_id, foodsoft_connector=connector), supplier_ids),
+        "stock articles": lambda: connector.get_stock_articles_and_suppliers(**SUPPLIER_FIELDS),
+        "article categories": lambda: connector.get_article_categories(),
+        "categories without keywords": lambda: connector.get_article_categories(keywords=False),
+        "last closed orders": lambda: connector.map_concurrently(connector.get_last_closed_order_id, supplier_ids),
+    }
+
+def run(standin, number_of_suppliers, max_concurrent_requests, connector_class=foodsoft.FSConnector):
+    connector = connector_class(url=standin.url, user="benchmark", password="password", max_concurrent_requests=max_concurrent_requests)
+    results = []
+    for name, flow in flows(connector, range(1, number_of_suppliers + 1)).items():
+        standin.reset_counters()
+        with connector.request_stats.recording() as stats, contextlib.redirect_stdout(io.StringIO()): # get_data_of_supplier prints every supplier
+            start = time.perf_counter()
+            flow()
+            wall_time = time.perf_counter() - start
+        results.append((name, wall_time, standin.requests, standin.failures_injected, stats))
+    connector.logout()
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark FSConnector against a local Foodsoft stand-in")
+    parser.add_argument("--suppliers", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--articles-per-supplier", type=int, default=50)
+    parser.add_argument("--stock-articles", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0, help="seconds each response is delayed")
+    parser.add_argument("--failure-rate", type=float, default=0, help="fraction of requests answered with 503")
+    parser.add_argument("--max-concurrent-requests", type=int, default=foodsoft.DEFAULT_MAX_CONCURRENT_REQUESTS)
+    parser.add_argument("--api", action="store_true", help="benchmark foodsoft_api.FSApiConnector")
+    parser.add_argument("--endpoints", action="store_true", help="also print the statistics per endpoint of each flow")
+    arguments = parser.parse_args()
+    connector_class = foodsoft_api.FSApiConnector if arguments.api else foodsoft.FSConnector
+    print(f"parser: {foodsoft.HTML_PARSER}, latency: {str(arguments.latency)} s, failure rate: {str(arguments.failure_rate)}, concurrent requests: {str(arguments.max_concurrent_requests)}, connector: {connector_class.__name__}")
+    for number_of_suppliers in arguments.suppliers:
+        standin = StandIn(suppliers=number_of_suppliers, articles_per_supplier=arguments.articles_per_supplier, stock_articles=arguments.stock_articles, latency=arguments.latency, failure_rate=arguments.failure_rate)
+        with standin:
+            print(f"\n{str(number_of_suppliers)} suppliers")
+            for name, wall_time, pages, failures, stats in run(standin, number_of_suppliers, arguments.max_concurrent_requests, connector_class=connector_class):
+                totals = stats.totals()
+                print(f"  {name:<28} {wall_time:8.2f} s  {pages:6d} pages {pages / wall_time:8.1f} pages/s  {totals.bytes / 1024:9.0f} KiB {totals.bytes / 1024 / 1024 / wall_time:6.1f} MiB/s  waiting: {totals.wall_time:7.2f} s  parsing: {totals.parse_time:7.2f} s  retries: {str(totals.retries)}  injected failures: {str(failures)}")
+                if arguments.endpoints:
+                    print("    " + stats.summary().replace("\n", "\n    "))
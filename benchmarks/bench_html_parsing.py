@@ -0,0 +1,87 @@
+"""
+Benchmark of parsing Foodsoft pages: a full html.parser tree (as FSConnector used to build) vs. foodsoft.parse_html,
+which only builds the needed part of the page (SoupStrainer) and uses lxml if it is installed.
+Prints parse time and peak memory per page and checks that both find the same data.
+
+By default, all pages are synthetic: they are generated with the structure of Foodsoft's pages (no recorded pages ship with the repository).
+To parse pages saved from a real instance instead, pass a folder with them, named after the page they were saved from:
+stock_articles.html, supplier_edit.html, article_categories.html, profile.html (missing ones are generated).
+
+Run from the repository root: python benchmarks/bench_html_parsing.py [folder with recorded pages]
+"""
+
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import foodsoft
+
+NUMBER_OF_ROWS = 400
+
+def layout(content):
+    navigation = "".join(f'<li class="dropdown"><a href="/foodcoop/menu{str(i)}">Menu {str(i)}</a><ul>' + "".join(f'<li><a href="/foodcoop/menu{str(i)}/{str(j)}">Item {str(j)}</a></li>' for j in range(8)) + "</ul></li>" for i in range(8))
+    return f'<!DOCTYPE html><html><head><meta name="csrf-token" content="token"><title>Foodsoft</title>{"<script>var x = 1;</script>" * 10}</head><body><div class="navbar"><ul class="nav">{navigation}</ul></div><div class="container-fluid"><div class="row-fluid">{content}</div></div><footer>{"<p>Footer text</p>" * 20}</footer></body></html>'
+
+def stock_articles_page():
+    rows = "".join(f'<tr class="{"unavailable" if i % 7 == 0 else ""}" id="stockArticle-{str(i)}"><td><a href="/foodcoop/stock_articles/{str(i)}">Article {str(i)}</a></td><td>{str(i % 10)},0</td><td>0,0</td><td>{str(i % 10)},0</td><td>kg</td><td>{str(i % 30)},50 €</td><td>10,0%</td><td><a href="/foodcoop/suppliers/{str(i % 40)}">Supplier {str(i % 40)}</a></td><td>Category {str(i % 12)}</td><td><a class="btn" href="/foodcoop/stock_articles/{str(i)}/edit">Edit</a> <a class="btn" href="/foodcoop/stock_articles/{str(i)}/copy">Copy</a></td></tr>' for i in range(NUMBER_OF_ROWS))
+    return layout(f'<form class="form-search"><input type="text" name="q"></form><table class="table"><thead><tr>{"<th>Column</th>" * 10}</tr></thead><tbody id="articles-tbody">{rows}</tbody></table>')
+
+def supplier_edit_page():
+    fields = "".join(f'<div class="control-group"><label for="supplier_{name}">{name}</label><div class="controls"><input type="text" id="supplier_{name}" name="supplier[{name}]" value="Value of {name}"></div></div>' for name in ["name", "address", "phone", "phone2", "fax", "email", "url", "contact_person", "customer_number", "delivery_days", "order_howto", "min_order_quantity", "iban", "custom_fields_public_name", "custom_fields_public_address"])
+    fields += '<textarea id="supplier_note" name="supplier[note]">\nSome note</textarea>'
+    fields += '<select id="supplier_supplier_category_id" name="supplier[supplier_category_id]">' + "".join(f'<option value="{str(i)}"{" selected" if i == 3 else ""}>Category {str(i)}</option>' for i in range(20)) + "</select>"
+    return layout(f'<form class="simple_form form-horizontal edit_supplier" id="edit_supplier_3" action="/foodcoop/suppliers/3" method="post"><input type="hidden" name="authenticity_token" value="token">{fields}</form>')
+
+def article_categories_page():
+    rows = "".join(f'<tr><td>Category {str(i)}</td><td>keyword {str(i)}, other keyword</td><td><a href="/foodcoop/article_categories/{str(i)}/edit">Edit</a></td></tr>' for i in range(60))
+    return layout(f'<table class="table"><thead><tr><th>Name</th><th>Description</th><th></th></tr></thead><tbody>{rows}</tbody></table>')
+
+def profile_page():
+    return layout('<form class="simple_form form-horizontal edit_user" id="edit_user_12"><input id="user_first_name" value="Erika"><input id="user_last_name" value="Muster"><input id="user_nick" value="erika"></form>' + "".join(f'<a rel="nofollow" data-method="post" href="/foodcoop/home/cancel_membership?group_id={str(i)}">Leave</a>' for i in range(3)) + '<a href="/foodcoop/foodcoop/invites/new?invite[group_id]=5">Invite</a>')
+
+def extract_stock_articles(soup):
+    return [(row.get("id"), [column.text for column in row.find_all("td")]) for row in soup.find(id="articles-tbody").find_all("tr")]
+
+def extract_supplier(soup):
+    return [(tag.get("id"), tag.get("value") or tag.text) for tag in soup.find_all(id=re.compile("^supplier_"))]
+
+def extract_article_categories(soup):
+    return [[column.text for column in row.find_all("td")] for row in soup.find("tbody").find_all("tr")]
+
+def extract_profile(soup):
+    return soup.find(id="user_first_name").get("value"), soup.find(class_="simple_form form-horizontal edit_user").get("id"), [link["href"] for link in soup.select("[rel='nofollow']")]
+
+PAGES = { # file name: (page generator, strainer FSConnector uses, extraction of the data FSConnector reads)
+    "stock_articles.html": (stock_articles_page, foodsoft.STOCK_ARTICLES_STRAINER, extract_stock_articles),
+    "supplier_edit.html": (supplier_edit_page, foodsoft.SUPPLIER_FORM_STRAINER, extract_supplier),
+    "article_categories.html": (article_categories_page, foodsoft.TABLE_BODY_STRAINER, extract_article_categories),
+    "profile.html": (profile_page, foodsoft.PROFILE_STRAINER, extract_profile),
+}
+
+def measure(function):
+    parse_time = min(timeit.repeat(function, number=1, repeat=5))
+    tracemalloc.start()
+    function()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return parse_time, peak_memory
+
+if __name__ == "__main__":
+    folder = sys.argv[1] if len(sys.argv) > 1 else None
+    print(f"parser: {foodsoft.HTML_PARSER}")
+    for file_name, (generate_page, strainer, extract) in PAGES.items():
+        if folder and os.path.isfile(os.path.join(folder, file_name)):
+            with open(os.path.join(folder, file_name), "rb") as f:
+                page = f.read()
+            source = "recorded"
+        else:
+            page = generate_page().encode("utf-8")
+            source = "generated"
+        assert extract(BeautifulSoup(page, "html.parser")) == extract(foodsoft.parse_html(page, only=strainer)), file_name
+        full_time, full_memory = measure(lambda: BeautifulSoup(page, "html.parser"))
+        strained_time, strained_memory = measure(lambda: foodsoft.parse_html(page, only=strainer))
+        print(f"{file_name:<24} ({source}, {len(page) / 1024:6.1f} KiB)  full tree: {full_time * 1000:7.2f} ms {full_memory / 1024:8.0f} KiB   parse_html: {strained_time * 1000:7.2f} ms {strained_memory / 1024:8.0f} KiB   speedup: {full_time / strained_time:5.1f}x")
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of the string checks in base: the former list-scanning implementation vs. base.StringMatcher.
+Checks 10k article names against 200 rules, as the importers do for their "to ignore" lists.
+
+Run from the repository root: python benchmarks/bench_string_matcher.py
+"""
+
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import base
+
+NUMBER_OF_NAMES = 10000
+NUMBER_OF_RULES = 200
+
+def legacy_equal_strings_check(list1, list2, case_sensitive=False, strip=True):
+    matches = []
+    compare_list1 = [base.prepare_string_for_comparison(string, case_sensitive, strip) for string in list1]
+    compare_list2 = [base.prepare_string_for_comparison(string, case_sensitive, strip) for string in list2]
+    for string in compare_list1:
+        if string in compare_list2:
+            matches.append(list1[compare_list1.index(string)])
+    return matches
+
+def legacy_affix_strings_check(check, list1, list2, case_sensitive=False, strip=True):
+    matches = []
+    compare_list1 = [base.prepare_string_for_comparison(string, case_sensitive, strip) for string in list1]
+    compare_list2 = [base.prepare_string_for_comparison(string, case_sensitive, strip) for string in list2]
+    for string in compare_list1:
+        for query_string in compare_list2:
+            if check(string, query_string):
+                matches.append(list2[compare_list2.index(query_string)])
+    return matches
+
+CHECKS = {
+    "equal": (legacy_equal_strings_check, base.equal_strings_check),
+    "containing": (lambda l1, l2: legacy_affix_strings_check(lambda s, q: q in s, l1, l2), base.containing_strings_check),
+    "startswith": (lambda l1, l2: legacy_affix_strings_check(str.startswith, l1, l2), base.startswith_strings_check),
+    "endswith": (lambda l1, l2: legacy_affix_strings_check(str.endswith, l1, l2), base.endswith_strings_check),
+}
+
+def random_word(rng):
+    return "".join(rng.choice("abcdefghijklmnopqrstuvwxyzäöü") for _ in range(rng.randint(4, 10)))
+
+def sample_data(seed=1):
+    rng = random.Random(seed)
+    words = [random_word(rng) for _ in range(2000)]
+    names = [" ".join(rng.choice(words).capitalize() for _ in range(rng.randint(1, 4))) for _ in range(NUMBER_OF_NAMES)]
+    rules = [rng.choice(words) + (" " + rng.choice(words) if rng.random() < 0.5 else "") for _ in range(NUMBER_OF_RULES)]
+    return names, rules
+
+def run_checks(function, names, rules):
+    return [function([name], rules) for name in names]
+
+if __name__ == "__main__":
+    names, rules = sample_data()
+    print(f"{NUMBER_OF_NAMES} names x {NUMBER_OF_RULES} rules")
+    for check_name, (legacy_function, function) in CHECKS.items():
+        assert run_checks(legacy_function, names, rules) == run_checks(function, names, rules), check_name
+        legacy_time = min(timeit.repeat(lambda: run_checks(legacy_function, names, rules), number=1, repeat=3))
+        matcher_time = min(timeit.repeat(lambda: run_checks(function, names, rules), number=1, repeat=3))
+        print(f"{check_name:<12} legacy: {legacy_time:8.3f} s   matcher: {matcher_time:8.3f} s   speedup: {legacy_time / matcher_time:6.1f}x")
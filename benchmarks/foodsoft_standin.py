@@ -0,0 +1,318 @@
+"""
+Local stand-in for a Foodsoft instance, to exercise foodsoft.FSConnector and the scripts using it without a live instance.
+Serves the pages FSConnector reads (login, sessions, home/profile, suppliers, suppliers/<id>, suppliers/<id>/edit,
+suppliers/<id>/articles.csv, orders/<id>.csv, stock_articles, stock_articles/<id>, article_categories) with the structure of Foodsoft's pages,
+the upload of articles CSVs (suppliers/<id>/articles/upload, parse_upload and update_synchronized; confirmed uploads are collected in synchronized_uploads),
+and the API endpoints foodsoft_api.FSApiConnector reads (oauth/token, api/v1/article_categories).
+All pages are synthetic: they are generated with the structure and markup of Foodsoft's pages, but no recorded pages of a real instance are served,
+so differences to a real instance (e.g. more fields, other themes or plugins) aren't covered.
+
+    with StandIn(suppliers=100, latency=0.02, failure_rate=0.01) as standin:
+        connector = foodsoft.FSConnector(url=standin.url, user="user", password="password")
+
+Run it as a server from the repository root: python benchmarks/foodsoft_standin.py [number of suppliers] [port]
+"""
+
+import io
+import sys
+import csv
+import json
+import time
+import random
+import datetime
+import threading
+import socketserver
+from wsgiref.simple_server import make_server, WSGIServer, WSGIRequestHandler
+import bottle
+
+FOODCOOP = "standin"
+SESSION_COOKIE = "_foodsoft_standin_session"
+API_TOKEN = "standin-token"
+
+class ThreadingWSGIServer(socketserver.ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def layout(content, title="Foodsoft"):
+    navigation = "".join(f'<li class="dropdown"><a href="/{FOODCOOP}/menu{str(i)}">Menu {str(i)}</a><ul>' + "".join(f'<li><a href="/{FOODCOOP}/menu{str(i)}/{str(j)}">Item {str(j)}</a></li>' for j in range(8)) + "</ul></li>" for i in range(8))
+    return f'<!DOCTYPE html><html><head><meta name="csrf-token" content="token"><title>{title}</title></head><body><div class="navbar"><ul class="nav">{navigation}</ul></div><div class="container-fluid"><div class="row-fluid">{content}</div></div><footer><p>Foodsoft stand-in</p></footer></body></html>'
+
+def values_differ(value, other_value):
+    try:
+        return float(value) != float(other_value)
+    except ValueError:
+        return value != other_value
+
+class StandIn:
+    def __init__(self, suppliers=10, articles_per_supplier=50, stock_articles=100, article_categories=20, orders_per_supplier=3, latency=0, latency_jitter=0, failure_rate=0, api=True, port=0, seed=1):
+        """
+        latency: seconds each response is delayed, plus up to latency_jitter seconds
+        failure_rate: fraction of requests answered with 503 Service Unavailable
+        api: serve the API; otherwise its endpoints answer 404, as in Foodsoft versions without them
+        """
+        self.suppliers = suppliers
+        self.articles_per_supplier = articles_per_supplier
+        self.stock_articles = stock_articles
+        self.article_categories = article_categories
+        self.orders_per_supplier = orders_per_supplier
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.failure_rate = failure_rate
+        self.api = api
+        self.port = port
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.bytes_sent = 0
+        self.failures_injected = 0
+        self.synchronized_uploads = [] # {"supplier id": ..., "new": number, "changed": number, "outlisted": number} of each confirmed upload
+        self._lock = threading.Lock()
+        self._server = None
+        self.app = self.create_app()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{str(self._server.server_port)}/{FOODCOOP}/"
+
+    def start(self):
+        self._server = make_server("127.0.0.1", self.port, self.app, server_class=ThreadingWSGIServer, handler_class=QuietRequestHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exception):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests = 0
+            self.bytes_sent = 0
+            self.failures_injected = 0
+
+    def create_app(self):
+        app = bottle.Bottle()
+        prefix = f"/{FOODCOOP}"
+
+        def respond(path, generate, content_type="text/html; charset=utf-8", authentication="session"):
+            def handler(**arguments):
+                with self._lock:
+                    self.requests += 1
+                    fail = self.random.random() < self.failure_rate
+                    delay = self.latency + self.random.random() * self.latency_jitter
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    with self._lock:
+                        self.failures_injected += 1
+                    bottle.response.status = 503
+                    return "Service Unavailable (injected)"
+                if authentication == "session" and not bottle.request.get_cookie(SESSION_COOKIE):
+                    bottle.redirect(f"{prefix}/login")
+                if authentication == "token":
+                    if not self.api:
+                        bottle.response.status = 404
+                        return "Not Found"
+                    if bottle.request.get_header("Authorization") != f"Bearer {API_TOKEN}":
+                        bottle.response.status = 401
+                        return json.dumps({"error": "unauthorized"})
+                body = generate(**arguments).encode("utf-8")
+                bottle.response.content_type = content_type
+                with self._lock:
+                    self.bytes_sent += len(body)
+                return body
+            return handler
+
+        app.route(f"{prefix}/login", "GET", respond("login", self.login_page, authentication=None))
+        app.route(f"{prefix}/sessions", "POST", self.create_session)
+        app.route(f"{prefix}/oauth/token", "POST", self.create_api_token)
+        app.route(f"{prefix}/", "GET", respond("", lambda: layout("<h1>Dashboard</h1>")))
+        app.route(f"{prefix}/home/profile", "GET", respond("home/profile", self.profile_page))
+        app.route(f"{prefix}/suppliers", "GET", respond("suppliers", self.suppliers_page))
+        app.route(f"{prefix}/suppliers/<supplier_id:int>", "GET", respond("suppliers/<id>", self.supplier_page))
+        app.route(f"{prefix}/suppliers/<supplier_id:int>/edit", "GET", respond("suppliers/<id>/edit", self.supplier_edit_page))
+        app.route(f"{prefix}/suppliers/<supplier_id:int>/articles.csv", "GET", respond("articles.csv", self.articles_csv, content_type="text/csv; charset=utf-8"))
+        app.route(f"{prefix}/suppliers/<supplier_id:int>/articles", "GET", respond("suppliers/<id>/articles", lambda supplier_id: layout(f"<h1>Articles of supplier {str(supplier_id)}</h1>")))
+        app.route(f"{prefix}/suppliers/<supplier_id:int>/articles/upload", "GET", respond("suppliers/<id>/articles/upload", self.articles_upload_page))
+        app.route(f"{prefix}/suppliers/<supplier_id:int>/articles/parse_upload", "POST", respond("suppliers/<id>/articles/parse_upload", self.articles_sync_page))
+        app.route(f"{prefix}/suppliers/<supplier_id:int>/articles/update_synchronized", "POST", respond("suppliers/<id>/articles/update_synchronized", self.update_synchronized))
+        app.route(f"{prefix}/orders/<order_id:int>.csv", "GET", respond("orders/<id>.csv", self.order_csv, content_type="text/csv; charset=iso-8859-15"))
+        app.route(f"{prefix}/stock_articles", "GET", respond("stock_articles", self.stock_articles_page))
+        app.route(f"{prefix}/stock_articles/<article_id:int>", "GET", respond("stock_articles/<id>", self.stock_article_page))
+        app.route(f"{prefix}/article_categories", "GET", respond("article_categories", self.article_categories_page))
+        app.route(f"{prefix}/article_categories/<category_id:int>/edit", "GET", respond("article_categories/<id>/edit", self.article_category_edit_page))
+        app.route(f"{prefix}/api/v1/article_categories", "GET", respond("api/v1/article_categories", self.api_article_categories, content_type="application/json", authentication="token"))
+        return app
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def create_session(self):
+        self.count_request()
+        if not bottle.request.forms.get("authenticity_token") or not bottle.request.forms.get("nick"):
+            bottle.response.status = 422
+            return "Login failed"
+        bottle.response.set_cookie(SESSION_COOKIE, "session", path="/")
+        bottle.redirect(f"/{FOODCOOP}/")
+
+    def create_api_token(self):
+        self.count_request()
+        if not self.api:
+            bottle.response.status = 404
+            return "Not Found"
+        bottle.response.content_type = "application/json"
+        if bottle.request.forms.get("grant_type") != "password" or not bottle.request.forms.get("username") or not bottle.request.forms.get("password"):
+            bottle.response.status = 400
+            return json.dumps({"error": "invalid_grant"})
+        return json.dumps({"access_token": API_TOKEN, "token_type": "Bearer", "expires_in": 7200, "scope": bottle.request.forms.get("scope", "")})
+
+    def login_page(self):
+        return layout('<form action="/standin/sessions" method="post"><input type="hidden" name="authenticity_token" value="token"><input name="nick"><input name="password" type="password"></form>', title="Login")
+
+    def profile_page(self):
+        links = "".join(f'<a rel="nofollow" data-method="post" href="/{FOODCOOP}/home/cancel_membership?group_id={str(i)}">Leave</a>' for i in [1, 3])
+        return layout(f'<form class="simple_form form-horizontal edit_user" id="edit_user_12"><input id="user_first_name" value="Erika"><input id="user_last_name" value="Muster"><input id="user_nick" value="erika"></form>{links}<a href="/{FOODCOOP}/foodcoop/invites/new?invite[group_id]=5">Invite</a>')
+
+    def suppliers_page(self):
+        rows = "".join(f'<tr><td><a href="/{FOODCOOP}/suppliers/{str(i)}">Supplier {str(i)}</a></td><td>+43 1 {str(i)}</td><td>supplier{str(i)}@example.org</td><td><a href="/{FOODCOOP}/suppliers/{str(i)}/articles">Articles</a></td></tr>' for i in range(1, self.suppliers + 1))
+        return layout(f'<table class="table"><thead><tr><th>Name</th><th>Phone</th><th>Email</th><th></th></tr></thead><tbody>{rows}</tbody></table>')
+
+    def supplier_page(self, supplier_id):
+        orders = "".join(f'<tr><td>Order {str(j)}</td><td>{self.order_end(j).strftime("%d.%m.%Y %H:%M")}</td><td>' + (f'<a href="/{FOODCOOP}/finance/balancing/new?order_id={str(self.order_id(supplier_id, j))}">Balance</a>' if j > 0 else "") + "</td></tr>" for j in range(self.orders_per_supplier))
+        return layout(f'<div class="span6"><h2>Supplier {str(supplier_id)}</h2><dl><dt>Address</dt><dd>Street {str(supplier_id)}</dd></dl></div><div class="span6"><h2>Orders</h2><table><tbody>{orders}</tbody></table></div>')
+
+    def order_id(self, supplier_id, j):
+        return supplier_id * 100 + j
+
+    def order_end(self, j):
+        # orders of a supplier are listed newest first; only the newest one (j = 0) is still open
+        return datetime.datetime(2024, 1, 20, 18) - datetime.timedelta(days=7 * j)
+
+    def supplier_edit_page(self, supplier_id):
+        values = {"name": f"Supplier {str(supplier_id)}", "address": f"Street {str(supplier_id)}, 1234 Town", "url": f"https://supplier{str(supplier_id)}.example.org", "phone": f"+43 1 {str(supplier_id)}", "email": f"supplier{str(supplier_id)}@example.org", "custom_fields_public_name": "", "custom_fields_public_address": "", "custom_fields_origin": "AT"}
+        fields = "".join(f'<div class="control-group"><label for="supplier_{name}">{name}</label><div class="controls"><input type="text" id="supplier_{name}" name="supplier[{name}]" value="{value}"></div></div>' for name, value in values.items())
+        fields += f'<textarea id="supplier_note" name="supplier[note]">\nNote of supplier {str(supplier_id)}</textarea>'
+        fields += '<select id="supplier_supplier_category_id" name="supplier[supplier_category_id]">' + "".join(f'<option value="{str(i)}"{" selected" if i == supplier_id % 4 else ""}>Category {str(i)}</option>' for i in range(4)) + "</select>"
+        return layout(f'<form class="simple_form form-horizontal edit_supplier" id="edit_supplier_{str(supplier_id)}" method="post"><input type="hidden" name="authenticity_token" value="token">{fields}</form>')
+
+    def supplier_articles(self, supplier_id):
+        # {article ID: fields} of the articles of a supplier, as in the fields of the upload preview
+        return {supplier_id * 1000 + j: {"order_number": f"{str(supplier_id)}_{str(j)}_v1", "availability": "0" if j % 10 == 9 else "1", "name": f"Article {str(j)} of supplier {str(supplier_id)}", "note": "Note; with separator", "manufacturer": f"Producer {str(j % 5)}", "origin": "AT", "unit": ["kg", "500 g", "Stk"][j % 3], "price": f"{str(j % 20)}.50", "tax": "10.0", "deposit": "0.00", "unit_quantity": str(1 + j % 6), "article_category": f"Category {str(j % 8)}"} for j in range(self.articles_per_supplier)}
+
+    def articles_csv(self, supplier_id):
+        rows = ["Verfügbar;Bestellnummer;Name;Notiz;Produzent;Herkunft;Einheit;Preis (netto);MwSt;Pfand;Gebindegröße;(geschützt);(geschützt);Kategorie"]
+        for article in self.supplier_articles(supplier_id).values():
+            rows.append(f'{"Ja" if article["availability"] == "1" else "Nein"};{article["order_number"]};{article["name"]};"{article["note"]}";{article["manufacturer"]};{article["origin"]};{article["unit"]};{article["price"]};{article["tax"]};{article["deposit"]};{article["unit_quantity"]};;;{article["article_category"]}')
+        return "\n".join(rows) + "\n"
+
+    def articles_upload_page(self, supplier_id):
+        return layout(f'<form class="form-horizontal" enctype="multipart/form-data" action="/{FOODCOOP}/suppliers/{str(supplier_id)}/articles/parse_upload" method="post"><input type="hidden" name="authenticity_token" value="token"><input type="file" name="articles[file]" id="articles_file"><input type="hidden" name="articles[outlist_absent]" value="0"><input type="checkbox" name="articles[outlist_absent]" id="articles_outlist_absent" value="1"><input type="hidden" name="articles[convert_units]" value="0"><input type="checkbox" name="articles[convert_units]" id="articles_convert_units" value="1"><input type="submit" name="commit" value="Hochladen"></form>')
+
+    def articles_sync_page(self, supplier_id):
+        # compares the uploaded CSV with the supplier's articles by order number, like Foodsoft's articles/sync view
+        upload = bottle.request.files.get("articles[file]")
+        if bottle.request.forms.get("authenticity_token") != "token" or upload is None:
+            bottle.response.status = 422
+            return "Invalid authenticity token"
+        rows = list(csv.reader(io.TextIOWrapper(upload.file, encoding="utf-8", newline=""), delimiter=";"))[1:]
+        if not rows or any(len(row) < 14 for row in rows):
+            return layout(f'<div class="alert fade in alert-error">Die Datei konnte nicht gelesen werden.</div>{self.articles_upload_page(supplier_id)}')
+        fields = ["name", "note", "manufacturer", "origin", "unit", "price", "tax", "deposit", "unit_quantity", "article_category"]
+        categories = [f"Category {str(i)}" for i in range(8)]
+        current_articles = {article["order_number"]: (article_id, article) for article_id, article in self.supplier_articles(supplier_id).items()}
+        uploaded_articles = []
+        for row in rows:
+            uploaded_articles.append({"order_number": row[1], "availability": "1" if row[0] in ["", "Ja", "x"] else "0", "name": row[2], "note": row[3], "manufacturer": row[4], "origin": row[5], "unit": row[6], "price": row[7], "tax": row[8], "deposit": row[9], "unit_quantity": row[10], "article_category": row[13]})
+
+        def input_cell(field_name, field, value, highlighted=False):
+            style = ' style="border-color: #b94a48"' if highlighted else ""
+            if field == "article_category":
+                options = "".join(f'<option value="{str(i + 1)}"{" selected" if category == value else ""}>{category}</option>' for i, category in enumerate(categories))
+                return f'<td{style}><select name="{field_name}[article_category_id]">{options}</select></td>'
+            return f'<td{style}><input type="text" name="{field_name}[{field}]" value="{value}"></td>'
+
+        changed_rows = ""
+        new_rows = ""
+        for article in uploaded_articles:
+            if article["order_number"] in current_articles:
+                article_id, current_article = current_articles[article["order_number"]]
+                changed_fields = [field for field in fields if values_differ(article[field], current_article[field])]
+                if changed_fields:
+                    changed_rows += '<tr style="color:grey">' + "".join(f"<td>{current_article[field]}</td>" for field in fields) + "<td></td></tr>"
+                    changed_rows += "<tr>" + "".join(input_cell(f"articles[{str(article_id)}]", field, article[field], highlighted=field in changed_fields) for field in fields) + f'<td><input type="hidden" name="articles[{str(article_id)}][availability]" value="{article["availability"]}"></td></tr>'
+            else:
+                new_rows += "<tr>" + "".join(input_cell("new_articles[]", field, article[field]) for field in fields) + f'<td><input type="hidden" name="new_articles[][order_number]" value="{article["order_number"]}"><input type="hidden" name="new_articles[][availability]" value="{article["availability"]}"></td></tr>'
+        uploaded_order_numbers = set(article["order_number"] for article in uploaded_articles)
+        outlisted = ""
+        if bottle.request.forms.getall("articles[outlist_absent]")[-1:] == ["1"]:
+            outlisted = "".join(f'<li><input type="hidden" name="outlisted_articles[{str(article_id)}]" value="1">{article["name"]}</li>' for order_number, (article_id, article) in current_articles.items() if order_number not in uploaded_order_numbers)
+        content = f'<form action="/{FOODCOOP}/suppliers/{str(supplier_id)}/articles/update_synchronized" method="post"><input type="hidden" name="authenticity_token" value="token">'
+        if outlisted:
+            content += f"<h2>Auslisten ...</h2><ul>{outlisted}</ul>"
+        if changed_rows:
+            content += f'<h2>Aktualisieren ...</h2><table class="table">{changed_rows}</table>'
+        if new_rows:
+            content += f'<h2>Neue Artikel ...</h2><table class="table">{new_rows}</table>'
+        return layout(content + '<input type="submit" name="commit" value="Alle löschen/aktualisieren/hinzufügen"></form>')
+
+    def update_synchronized(self, supplier_id):
+        forms = bottle.request.forms
+        if forms.get("authenticity_token") != "token":
+            bottle.response.status = 422
+            return "Invalid authenticity token"
+        keys = list(forms.keys())
+        new_articles = len(forms.getall("new_articles[][name]"))
+        changed_articles = len(set(key.split("]")[0] for key in keys if key.startswith("articles[")))
+        outlisted_articles = len([key for key in keys if key.startswith("outlisted_articles[")])
+        with self._lock:
+            self.synchronized_uploads.append({"supplier id": supplier_id, "new": new_articles, "changed": changed_articles, "outlisted": outlisted_articles})
+        bottle.redirect(f"/{FOODCOOP}/suppliers/{str(supplier_id)}/articles")
+
+    def order_csv(self, order_id):
+        rows = ["Menge;Bestellnummer;Name;Einheit;Gebinde;Preis;Summe"]
+        for j in range(20):
+            rows.append(f"{str(1 + j % 3)};b2b_{str(order_id)}{str(j)};Ordered article {str(j)};1 kg;{str(j % 4) if j % 2 else ''};{str(j)},50;{str(j * 2)},00")
+        return "\n".join(rows) + "\n"
+
+    def stock_articles_page(self):
+        rows = "".join(f'<tr class="{"unavailable" if i % 7 == 0 else ""}" id="stockArticle-{str(i)}"><td><a href="/{FOODCOOP}/stock_articles/{str(i)}">Stock article {str(i)}</a></td><td>{str(i % 10)},0</td><td>0,0</td><td>{str(i % 10)},0</td><td>kg</td><td>{str(i % 30)},50 €</td><td>10,0%</td><td><a href="/{FOODCOOP}/suppliers/{str(1 + i % max(self.suppliers, 1))}">Supplier</a></td><td>Category {str(i % 12)}</td><td><a class="btn" href="/{FOODCOOP}/stock_articles/{str(i)}/edit">Edit</a></td></tr>' for i in range(1, self.stock_articles + 1))
+        return layout(f'<table class="table"><thead><tr>{"<th>Column</th>" * 10}</tr></thead><tbody id="articles-tbody">{rows}</tbody></table>')
+
+    def stock_article_page(self, article_id):
+        details = ["Stock article", "kg", "Supplier", "Category", "1,00 €", "0,30 €", "10,0%", "1,10 €", f"Note of stock article {str(article_id)}"]
+        return layout('<div id="stockArticleDetails"><dl>' + "".join(f"<dt>Field</dt><dd>{value}</dd>" for value in details) + "</dl></div>")
+
+    def article_categories_page(self):
+        rows = "".join(f'<tr><td>Category {str(i)}</td><td>{"keyword, " * 30 + "..." if i % 5 == 0 else f"keyword {str(i)}, other keyword"}</td><td><a href="/{FOODCOOP}/article_categories/{str(i)}/edit">Edit</a></td></tr>' for i in range(1, self.article_categories + 1))
+        return layout(f'<table class="table"><thead><tr><th>Name</th><th>Description</th><th></th></tr></thead><tbody>{rows}</tbody></table>')
+
+    def article_category_edit_page(self, category_id):
+        return layout(f'<form><textarea id="article_category_description">{"keyword, " * 40}last keyword</textarea></form>')
+
+    def paginate(self, key, records):
+        page = int(bottle.request.query.get("page", 1))
+        per_page = int(bottle.request.query.get("per_page", 20))
+        total_pages = max(1, -(-len(records) // per_page))
+        return json.dumps({key: records[(page - 1) * per_page:page * per_page], "meta": {"page": page, "per_page": per_page, "total_pages": total_pages, "total_count": len(records)}})
+
+    def api_article_categories(self):
+        return self.paginate("article_categories", [{"id": i, "name": f"Category {str(i)}"} for i in range(1, self.article_categories + 1)])
+
+if __name__ == "__main__":
+    suppliers = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else 8081
+    standin = StandIn(suppliers=suppliers, port=port).start()
+    print(f"Foodsoft stand-in with {str(suppliers)} suppliers at {standin.url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        standin.stop()
@@ -0,0 +1,234 @@
+"""
+Shared pools of long-lived browsers (Selenium WebDrivers) for the scripts and FSConnector.
+Starting a browser (and checking for the driver download) takes seconds and hundreds of MB, so instead of starting and quitting
+their own browsers, callers borrow one from a pool and return it when done:
+
+    with browser_pool.firefox().borrow(origins=["https://shop.example"]) as driver:
+        driver.get("https://shop.example/products")
+
+Returned browsers are reset (cookies and storage of the given origins and the current page are cleared) and kept running for the next caller.
+Each pool starts at most max_size browsers; further checkouts wait until one is returned.
+Firefox browsers run headless unless the environment variable LIEFERSCRAPING_HEADLESS_BROWSERS is set to 0; undetected Chrome always shows its window,
+as shops blocking automated browsers recognize headless ones.
+By default browsers are only started when a script needs one; set `warm_browsers` in an instance's settings.yaml to a number of Firefox browsers
+web.py starts in the background when switching to the instance, see warm_up_in_background.
+"""
+
+import os
+import time
+import atexit
+import logging
+import threading
+import functools
+import contextlib
+from urllib.parse import urlsplit
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from webdriver_manager.firefox import GeckoDriverManager
+
+DEFAULT_MAX_SIZE = 2
+MAX_USES = 50 # browsers are restarted after this many checkouts, as long-running browsers tend to accumulate memory
+CHECKOUT_TIMEOUT = 600 # seconds to wait for a free browser
+HEADLESS = os.environ.get("LIEFERSCRAPING_HEADLESS_BROWSERS", "1") != "0"
+
+def origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+class BrowserPool:
+    def __init__(self, name, factory, max_size=DEFAULT_MAX_SIZE, max_uses=MAX_USES):
+        """
+        factory: function without arguments returning a new WebDriver
+        """
+        self.name = name
+        self.factory = factory
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self._idle = [] # running browsers not borrowed at the moment
+        self._uses = {} # {id(driver): number of uses} of all running browsers, idle or borrowed
+        self._starting = 0 # browsers being started outside of the lock
+        self._condition = threading.Condition()
+
+    def _quit(self, driver):
+        # call without holding the lock, as quitting a hung browser can take long
+        with self._condition:
+            self._uses.pop(id(driver), None)
+            self._condition.notify()
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logging.warning(f"Could not quit {self.name} browser: {e}")
+
+    def is_healthy(self, driver):
+        try:
+            driver.current_url # fails if the browser crashed or its driver is gone
+            return True
+        except WebDriverException:
+            return False
+
+    def warm_up(self, count=1):
+        """
+        Starts browsers in advance, so the next checkouts don't have to wait for them.
+        """
+        drivers = [self.checkout() for _ in range(min(count, self.max_size))]
+        for driver in drivers:
+            self.checkin(driver)
+
+    def checkout(self, timeout=CHECKOUT_TIMEOUT):
+        """
+        Returns a running browser, starting one if none is idle and the pool isn't full; otherwise waits for one to be returned.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            driver = None
+            with self._condition:
+                while True:
+                    if self._idle:
+                        driver = self._idle.pop()
+                        self._uses[id(driver)] += 1
+                        break
+                    if len(self._uses) + self._starting < self.max_size:
+                        self._starting += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(f"No {self.name} browser became free within {str(timeout)} seconds")
+                    self._condition.wait(remaining)
+            if driver is None:
+                break
+            # check the browser without holding the lock, so a hung browser doesn't block other checkouts
+            if self.is_healthy(driver):
+                return driver
+            self._quit(driver)
+        # start the browser without holding the lock, so other browsers can be returned meanwhile
+        driver = None
+        try:
+            driver = self.factory()
+        finally:
+            with self._condition:
+                self._starting -= 1
+                if driver is not None:
+                    self._uses[id(driver)] = 1
+                self._condition.notify()
+        return driver
+
+    def reset(self, driver, origins=None):
+        """
+        Clears cookies, localStorage and sessionStorage of the current page and the given origins, and leaves the browser on a blank page.
+        WebDriver can only access the cookies of the page it is on, hence each origin is visited.
+        """
+        current_origin = origin(driver.current_url)
+        origins_to_clear = list(dict.fromkeys(([current_origin] if current_origin.startswith("http") else []) + [origin(url) for url in (origins or [])]))
+        for origin_to_clear in origins_to_clear:
+            if origin(driver.current_url) != origin_to_clear:
+                driver.get(origin_to_clear)
+            driver.delete_all_cookies()
+            driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+        driver.get("about:blank")
+
+    def checkin(self, driver, origins=None, discard=False):
+        """
+        Returns a browser to the pool after resetting it (see reset). Broken or worn-out browsers are quit instead.
+        origins: URLs of the sites the borrower used, whose cookies and storage must not leak to the next borrower.
+        """
+        with self._condition:
+            worn_out = self._uses.get(id(driver), self.max_uses) >= self.max_uses
+        if not discard and not worn_out and self.is_healthy(driver):
+            try:
+                self.reset(driver, origins)
+            except WebDriverException as e:
+                logging.warning(f"Could not reset {self.name} browser, quitting it: {e}")
+                discard = True
+        else:
+            discard = True
+        if discard:
+            self._quit(driver)
+        else:
+            with self._condition:
+                self._idle.append(driver)
+                self._condition.notify()
+
+    @contextlib.contextmanager
+    def borrow(self, origins=None):
+        driver = self.checkout()
+        try:
+            yield driver
+        finally:
+            self.checkin(driver, origins=origins)
+
+    def health_check(self):
+        """
+        Quits idle browsers which stopped responding.
+        """
+        with self._condition:
+            drivers = list(self._idle)
+        for driver in drivers:
+            if self.is_healthy(driver):
+                continue
+            with self._condition:
+                if driver not in self._idle: # borrowed in the meantime, checkout checks it again
+                    continue
+                self._idle.remove(driver)
+            self._quit(driver)
+
+    def close(self):
+        """
+        Quits the idle browsers. Borrowed ones are quit when they are returned.
+        """
+        with self._condition:
+            drivers = self._idle
+            self._idle = []
+            self.max_uses = 0
+        for driver in drivers:
+            self._quit(driver)
+
+@functools.lru_cache(maxsize=None)
+def geckodriver_path():
+    return GeckoDriverManager().install() # checks for and downloads the driver, so only once per process
+
+def start_firefox():
+    options = webdriver.FirefoxOptions()
+    if HEADLESS:
+        options.add_argument("-headless")
+    return webdriver.Firefox(service=FirefoxService(geckodriver_path()), options=options)
+
+def start_undetected_chrome():
+    import undetected_chromedriver as uc # only needed by scripts for shops which block automated browsers
+    options = uc.ChromeOptions() # not headless, which would give the browser away again
+    return uc.Chrome(options=options)
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def pool(name, factory, max_size=DEFAULT_MAX_SIZE):
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = BrowserPool(name=name, factory=factory, max_size=max_size)
+        return _pools[name]
+
+def firefox():
+    return pool("firefox", start_firefox)
+
+def undetected_chrome():
+    return pool("undetected chrome", start_undetected_chrome)
+
+def warm_up_in_background(count):
+    """
+    Starts Firefox browsers in a background thread, so the first scripts needing one don't wait for it.
+    Failures (e.g. Firefox not installed) are only logged, as most scripts don't need a browser.
+    """
+    if count <= 0:
+        return
+    def warm_up():
+        try:
+            firefox().warm_up(count)
+        except Exception as e:
+            logging.warning(f"Could not start Firefox browsers in advance: {e}")
+    threading.Thread(target=warm_up, daemon=True).start()
+
+@atexit.register
+def close_all():
+    with _pools_lock:
+        for browser_pool in _pools.values():
+            browser_pool.close()
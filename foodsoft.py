@@ -4,21 +4,137 @@
 import logging
 import requests
 import os
+import io
+import contextlib
 import re
-from bs4 import BeautifulSoup as bs
+from bs4 import BeautifulSoup as bs, SoupStrainer
 import urllib.request
-import copy
+from urllib.parse import urlsplit, urljoin
 import time
-from selenium import webdriver
+import random
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.firefox import GeckoDriverManager
 
 import base
+import browser_pool
 import foodsoft_article
+import http_cache
+import request_stats
+import supplier_cache
+
+try:
+    import lxml # optional (pip install lxml), parses a lot faster than Python's html.parser
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
 
 logging.basicConfig() # level=logging.DEBUG
 
+DEFAULT_MAX_CONCURRENT_REQUESTS = 8 # pages of a Foodsoft instance fetched in parallel by methods which read many pages, e.g. get_supplier_data
+REQUEST_TIMEOUT = (10, 60) # seconds to connect, seconds to wait for the response
+MAX_GET_RETRIES = 4 # GET requests are retried after connection errors, timeouts and these status codes:
+RETRY_STATUS_CODES = [429, 502, 503, 504]
+BACKOFF_BASE = 1 # seconds to wait before the first retry; doubled for each further one, with random jitter
+BACKOFF_MAX = 30
+CIRCUIT_BREAKER_THRESHOLD = 5 # consecutive failed requests after which the instance is considered down
+CIRCUIT_BREAKER_COOLDOWN = 60 # seconds during which requests fail immediately, before one request may test the instance again
+CACHE_ENDPOINT_CLASSES = { # pages which may be cached, by URL path
+    "suppliers": r"/suppliers$",
+    "supplier": r"/suppliers/\d+/edit$",
+    "articles csv": r"/suppliers/\d+/articles\.csv$",
+    "article categories": r"/article_categories(/\d+/edit)?$",
+    "stock articles": r"/stock_articles(/\d+)?$",
+    }
+DEFAULT_CACHE_TTL = { # seconds a cached page is used without revalidation; 0: always revalidate
+    "suppliers": 600,
+    "supplier": 3600,
+    "articles csv": 300,
+    "article categories": 3600,
+    "stock articles": 0,
+    }
+
+def parse_html(content, only=None):
+    """
+    Parses an HTML page with lxml if available, otherwise with html.parser.
+    only: a SoupStrainer to build only the matching elements (with their descendants) instead of the whole page;
+    the result then has no <html>/<body>, so look the elements up directly in it.
+    """
+    try:
+        return bs(content, HTML_PARSER, parse_only=only)
+    except Exception as e: # e.g. lxml failing on a malformed page
+        if HTML_PARSER == "html.parser":
+            raise
+        logging.warning(f"lxml could not parse page ({e}), falling back to html.parser")
+        return bs(content, "html.parser", parse_only=only)
+
+AUTH_TOKEN_STRAINER = SoupStrainer(attrs={"name": "authenticity_token"})
+PROFILE_STRAINER = SoupStrainer(["form", "a"]) # the user form and the links to work groups and the ordergroup
+SUPPLIER_FORM_STRAINER = SoupStrainer(id=re.compile("^supplier_")) # the fields of the supplier form
+TABLE_BODY_STRAINER = SoupStrainer("tbody")
+STOCK_ARTICLES_STRAINER = SoupStrainer(id="articles-tbody")
+STOCK_ARTICLE_DETAILS_STRAINER = SoupStrainer(id="stockArticleDetails")
+ARTICLE_CATEGORY_DESCRIPTION_STRAINER = SoupStrainer(id="article_category_description")
+SUPPLIER_ORDERS_STRAINER = SoupStrainer("div", class_="span6") # the supplier page shows its orders in the last of these columns
+ARTICLES_UPLOAD_FORM_STRAINER = SoupStrainer("form", action=re.compile("parse_upload"))
+ARTICLES_SYNC_FORM_STRAINER = SoupStrainer("form", action=re.compile("update_synchronized")) # Foodsoft's preview of the changes of an upload
+ALERT_STRAINER = SoupStrainer("div", class_=re.compile(r"(^|\s)alert(\s|$)")) # flash messages, e.g. why an upload failed; matched as whole class attribute while parsing
+
+# names of the fields of the preview form
+CHANGED_ARTICLE_FIELD = re.compile(r"^articles\[(\d+)\]\[(\w+)\]$")
+NEW_ARTICLE_FIELD = re.compile(r"^new_articles\[\]\[(\w+)\]$")
+DELETED_ARTICLE_FIELD = re.compile(r"^outlisted_articles\[(\d+)\]$")
+
+def create_response_cache(folder, ttl=None):
+    """
+    Returns an http_cache.ResponseCache for FSConnector, stored in folder.
+    ttl: {endpoint class: seconds} to override DEFAULT_CACHE_TTL, see CACHE_ENDPOINT_CLASSES for the classes
+    """
+    cache_ttl = DEFAULT_CACHE_TTL.copy()
+    if ttl:
+        cache_ttl.update(ttl)
+    return http_cache.ResponseCache(folder=folder, ttl=cache_ttl, endpoint_classes=CACHE_ENDPOINT_CLASSES)
+
+class CircuitBreaker:
+    """
+    Fails fast while a Foodsoft instance is clearly down, instead of letting every request wait for its timeouts and retries.
+    After `threshold` consecutive failures the circuit opens for `cooldown` seconds; afterwards it lets one request through,
+    which closes the circuit again if it succeeds.
+    """
+    def __init__(self, threshold=CIRCUIT_BREAKER_THRESHOLD, cooldown=CIRCUIT_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic() # half-open: let this request through, keep the others waiting for the next cooldown
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        """
+        Returns True if this failure opened the circuit.
+        """
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                opened = self.opened_at is None
+                self.opened_at = time.monotonic()
+                return opened
+            return False
+
 class Supplier:
     def __init__(self, no, name, address="", website="", origin="", category="", additional_fields=None, deleted=False, latitude=None, longitude=None, icon=None, icon_prefix=None, icon_color=None):
         self.no = no # ID from Foodsoft
@@ -45,6 +161,181 @@ class Supplier:
         for d in category_name_suffix_delimiters:
             self.category = self.category.split(d)[0]
 
+def first_field_value(supplier_fields, fields):
+    # checks each field in a list of fields for data and returns the first non-null value
+    if fields:
+        for field in fields:
+            field_value = supplier_fields.get(field)
+            if field_value:
+                return field_value
+
+def supplier_from_fields(supplier_id, supplier_fields, name_fields=None, origin_fields=None, address_fields=None, website_fields=None, category_fields=None, additional_fields=None, exclude_categories=None):
+    """
+    Creates a Supplier from the values of the fields of its edit form (see FSConnector.get_supplier_fields).
+    Returns None if the supplier's category is in exclude_categories.
+    """
+    category = None
+    if category_fields:
+        for field in category_fields:
+            category = supplier_fields.get(field)
+            if category:
+                if exclude_categories:
+                    if category in exclude_categories:
+                        return None
+                break
+    fs_name = first_field_value(supplier_fields, ["name"]) or ""
+    if " †" in fs_name:
+        deleted = True
+    else:
+        deleted = False
+    name = (first_field_value(supplier_fields, name_fields) or "").replace(" †", "")
+    address = first_field_value(supplier_fields, address_fields)
+    origin = first_field_value(supplier_fields, origin_fields)
+    website = first_field_value(supplier_fields, website_fields)
+    if additional_fields:
+        for af in additional_fields:
+            value = first_field_value(supplier_fields, af.get("foodsoft field(s)"))
+            if value:
+                af["value"] = value
+
+    print(f"{name}: {additional_fields}")
+    return Supplier(no=supplier_id, name=name, address=address, origin=origin, website=website, category=category, additional_fields=additional_fields, deleted=deleted)
+
+class ArticleUpload:
+    """
+    Foodsoft's preview of the changes an uploaded articles CSV would make (see FSConnector.upload_articles_CSV),
+    with the form to confirm them (see FSConnector.confirm_article_upload).
+    """
+    def __init__(self, supplier_id, new_articles=None, changed_articles=None, deleted_articles=None, form_action=None, form_data=None, errors=None):
+        self.supplier_id = supplier_id
+        self.new_articles = new_articles or [] # [{field: value}]
+        self.changed_articles = changed_articles or [] # [{"id": article ID, "fields": {field: new value}, "changes": {field: [current value or None if unknown, new value]}}]
+        self.deleted_articles = deleted_articles or [] # [{"id": article ID, "name": name}]
+        self.form_action = form_action # URL the preview form is submitted to; None if Foodsoft didn't show a preview
+        self.form_data = form_data or [] # [(field name, value)] in the order of the form, as a browser would submit it
+        self.errors = errors or [] # Foodsoft's messages if it didn't accept the file
+
+    def has_changes(self):
+        return bool(self.new_articles or self.changed_articles or self.deleted_articles)
+
+    def as_dict(self):
+        return {"supplier id": self.supplier_id, "new articles": self.new_articles, "changed articles": self.changed_articles, "deleted articles": self.deleted_articles, "form action": self.form_action, "form data": [list(item) for item in self.form_data], "errors": self.errors}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(supplier_id=data["supplier id"], new_articles=data["new articles"], changed_articles=data["changed articles"], deleted_articles=data["deleted articles"], form_action=data["form action"], form_data=[tuple(item) for item in data["form data"]], errors=data["errors"])
+
+def form_field_value(field):
+    """
+    Returns (submitted value, shown value) of an input, select or textarea, or None if a browser wouldn't submit it.
+    Selects show the text of the selected option.
+    """
+    if field.name == "textarea":
+        value = field.text[1:] if field.text.startswith("\n") else field.text # Rails adds a newline at the start of textareas
+        return value, value
+    if field.name == "select":
+        selected_option = field.select_one('option:checked') or field.find("option")
+        if not selected_option:
+            return None
+        return selected_option.get("value", selected_option.text), selected_option.text.strip()
+    input_type = field.get("type", "text").lower()
+    if input_type in ["submit", "button", "image", "reset", "file"]:
+        return None
+    if input_type in ["checkbox", "radio"]:
+        if not field.has_attr("checked"):
+            return None
+        return field.get("value", "on"), field.get("value", "on")
+    return field.get("value", ""), field.get("value", "")
+
+def current_article_value(field):
+    """
+    Foodsoft's preview shows the current values of a changed article in the table row above the one with its new values, in the same columns,
+    and highlights changed fields with a style of their cell.
+    Returns (current value or None if it can't be told, whether the field is highlighted).
+    """
+    cell = field.find_parent("td")
+    if cell is None:
+        return None, False
+    highlighted = bool(cell.get("style"))
+    row = cell.find_parent("tr")
+    previous_row = row.find_previous_sibling("tr") if row else None
+    if previous_row is None or len(cell.find_all(["input", "select", "textarea"])) != 1:
+        return None, highlighted
+    cells = row.find_all("td", recursive=False)
+    previous_cells = previous_row.find_all("td", recursive=False)
+    if len(cells) != len(previous_cells):
+        return None, highlighted
+    column = next(index for index, c in enumerate(cells) if c is cell)
+    return previous_cells[column].text.strip(), highlighted
+
+def values_differ(current_value, new_value):
+    try:
+        return float(current_value.replace(",", ".")) != float(new_value.replace(",", "."))
+    except ValueError:
+        return current_value.strip() != new_value.strip()
+
+def parse_article_sync_form(form, page_url, supplier_id):
+    """
+    Reads the preview form Foodsoft shows after uploading an articles CSV into an ArticleUpload.
+    """
+    upload = ArticleUpload(supplier_id=supplier_id, form_action=urljoin(page_url, form.get("action")))
+    changed_articles = {}
+    new_article = None
+    for field in form.find_all(["input", "select", "textarea"]):
+        name = field.get("name")
+        value = form_field_value(field)
+        if not name or value is None:
+            continue
+        submitted_value, shown_value = value
+        upload.form_data.append((name, submitted_value))
+        match = CHANGED_ARTICLE_FIELD.match(name)
+        if match:
+            article_id, attribute = match.groups()
+            if article_id not in changed_articles:
+                changed_articles[article_id] = {"id": article_id, "fields": {}, "changes": {}}
+                upload.changed_articles.append(changed_articles[article_id])
+            changed_articles[article_id]["fields"][attribute] = shown_value
+            if field.get("type", "").lower() != "hidden":
+                current_value, highlighted = current_article_value(field)
+                if highlighted or (current_value is not None and values_differ(current_value, shown_value)):
+                    changed_articles[article_id]["changes"][attribute] = [current_value, shown_value]
+            continue
+        match = NEW_ARTICLE_FIELD.match(name)
+        if match:
+            attribute = match.group(1)
+            if new_article is None or attribute in new_article: # Rails starts the next article of new_articles[] when a field repeats
+                new_article = {}
+                upload.new_articles.append(new_article)
+            new_article[attribute] = shown_value
+            continue
+        match = DELETED_ARTICLE_FIELD.match(name)
+        if match:
+            item = field.find_parent("li")
+            upload.deleted_articles.append({"id": match.group(1), "name": item.text.strip() if item else ""})
+    return upload
+
+class TimedReader(io.RawIOBase):
+    """
+    Reads from a stream (e.g. a streamed response) and sums up the time spent waiting for it,
+    so that it can be told apart from the time spent processing what was read.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+        self.seconds = 0
+        self._pending = b"" # some streams return more decoded bytes than asked for
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self._pending:
+            start = time.perf_counter()
+            self._pending = self.stream.read(len(buffer)) or b""
+            self.seconds += time.perf_counter() - start
+        data, self._pending = self._pending[:len(buffer)], self._pending[len(buffer):]
+        buffer[:len(data)] = data
+        return len(data)
+
 def read_foodsoft_config():
     foodcoop = "unnamed foodcoop"
     foodsoft_url = None
@@ -63,8 +354,21 @@ def read_foodsoft_config():
     return foodcoop, foodsoft_url, foodsoft_user, foodsoft_password
 
 class FSConnector:
-    def __init__(self, url: str, user: str, password: str):
+    USER_DATA_ATTRIBUTES = ["user", "first_name", "last_name", "nick", "workgroups", "ordergroup"] # see add_user_data
+
+    def __init__(self, url: str, user: str, password: str, max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS, cache=None, cookies=None, supplier_cache=None):
+        """
+        cookies: cookies of an existing session (see export_cookies) to use instead of logging in; password may be None then.
+        """
         self._session = None
+        self.cache = cache # optional http_cache.ResponseCache, see create_response_cache
+        self.supplier_cache = supplier_cache # optional supplier_cache.SupplierCache
+        self.max_concurrent_requests = max(1, max_concurrent_requests or 1) # 1 fetches one page after another
+        self.circuit_breaker = CircuitBreaker()
+        self.request_counters = Counter() # requests, retries, timeouts, connection errors, error responses, rejected by circuit breaker, circuit breaker opened, cache hits, cache revalidations
+        self.request_stats = request_stats.RequestStats(base_url=url) # per endpoint, see request_stats
+        self._counters_lock = threading.Lock()
+        self._stock_article_details = {} # {stock article ID: (fingerprint of its overview row, (deposit, note))}, see get_stock_articles_and_suppliers
         if not url.endswith("/"):
             url += "/"
         self._url = url
@@ -72,7 +376,7 @@ class FSConnector:
         self._url_login_post = url + 'sessions'
 
         self._default_header = {
-                'Host': 'app.foodcoops.at',
+                'Host': urlsplit(url).netloc, # requests also takes the domain of session cookies from this
                 'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:69.0) Gecko/20100101 Firefox/69.0',
                 'Content-Type':'application/x-www-form-urlencoded',
                 'Upgrade-Insecure-Requests':'1'
@@ -83,22 +387,120 @@ class FSConnector:
                 'commit' : 'Anmelden'
                 }
 
-        self.login(user, password)
+        if cookies is None:
+            self.login(user, password)
+        else:
+            self._user = user
+            self._new_session()
+            for cookie in cookies:
+                self._session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""), path=cookie.get("path", "/"), expires=cookie.get("expires"), secure=cookie.get("secure", False))
+
+    def _new_session(self):
+        self._session = requests.Session()
+        # keep enough pooled connections open for concurrent fetches, so they don't open a new connection each
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrent_requests)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _count(self, counter):
+        with self._counters_lock:
+            self.request_counters[counter] += 1
+
+    def _request(self, method, url, retries=0, **kwargs):
+        """
+        Sends a request through the connector's session, with a timeout and the circuit breaker.
+        Retries up to `retries` times with jittered exponential backoff, so only pass retries for idempotent requests.
+        Raises ConnectionError if the instance is not reachable; error responses are returned to the caller.
+        """
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        attempt = 0
+        response = None
+        error = "rejected by circuit breaker"
+        start = time.perf_counter()
+        try:
+            while True:
+                if not self.circuit_breaker.allow_request():
+                    self._count("rejected by circuit breaker")
+                    raise ConnectionError(f'Foodsoft at {self._url} seems to be down, not sending {method} {url}')
+                self._count("requests")
+                response = None
+                try:
+                    response = self._session.request(method, url, **kwargs)
+                except requests.exceptions.Timeout:
+                    self._count("timeouts")
+                    error = "timeout"
+                except requests.exceptions.ConnectionError:
+                    self._count("connection errors")
+                    error = "connection error"
+                else:
+                    if response.status_code < 500 and response.status_code != 429:
+                        self.circuit_breaker.record_success()
+                        return response
+                    self._count("error responses")
+                    error = f"status {str(response.status_code)}"
+                if self.circuit_breaker.record_failure():
+                    self._count("circuit breaker opened")
+                    logging.error(f'Foodsoft at {self._url} failed {str(self.circuit_breaker.failures)} times in a row, failing fast for {str(self.circuit_breaker.cooldown)} seconds')
+                retryable = response is None or response.status_code in RETRY_STATUS_CODES
+                if attempt >= retries or not retryable:
+                    if response is not None:
+                        return response
+                    raise ConnectionError(f'Cannot {method} {url}: {error}')
+                attempt += 1
+                self._count("retries")
+                delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))) # "full jitter", so concurrent requests don't retry in lockstep
+                print(f"{error} during {method} {url}, waiting {delay:.1f} seconds and trying again ({str(attempt)}/{str(retries)}) ...")
+                time.sleep(delay)
+        finally:
+            # the body of streamed responses is only read afterwards, see open_articles_CSV
+            size = len(response.content) if response is not None and not kwargs.get("stream") else 0
+            self.request_stats.record_request(method, url, status=response.status_code if response is not None else error, seconds=time.perf_counter() - start, size=size, retries=attempt)
+
+    def _cached_get(self, url, header):
+        cache = self.cache if self.cache and self.cache.cacheable(url) else None
+        metadata = cache.lookup(url) if cache else None
+        if metadata and cache.is_fresh(url, metadata):
+            response = cache.response(url, metadata)
+            if response is not None: # otherwise removed in the meantime
+                self._count("cache hits")
+                self.request_stats.record_cache_hit("GET", url, size=len(response.content))
+                return response
+            metadata = None
+        if metadata:
+            response = self._request("GET", url, retries=MAX_GET_RETRIES, headers=dict(header, **cache.conditional_headers(metadata)))
+            if response.status_code == 304:
+                cached_response = cache.response(url, metadata)
+                if cached_response is not None:
+                    self._count("cache revalidations")
+                    self.request_stats.record_cache_hit("GET", url)
+                    cache.refresh(url, metadata)
+                    return cached_response
+                response = self._request("GET", url, retries=MAX_GET_RETRIES, headers=header)
+        else:
+            response = self._request("GET", url, retries=MAX_GET_RETRIES, headers=header)
+        if cache and response.status_code == 200 and not response.history: # redirected e.g. to the login page if the session expired
+            cache.store(url, response)
+        return response
 
     def _get(self, url, header, response=None):
-        while response is None: # TODO: max retries instead of endless loop?
-            try:
-                response = self._session.get(url, headers=header)
-            except requests.exceptions.ConnectionError:
-                print("requests.exceptions.ConnectionError, waiting 3 seconds and trying again ...")
-                time.sleep(3)
-        if response.status_code != 200: # TODO: I think we should handle errors instead of automatically closing the session & raising an error (also applies to _post function)
-            self._session.close()
+        if response is None:
+            response = self._cached_get(url, header)
+        if response.status_code != 200: # the session is shared by concurrent requests (see map_concurrently), so it stays open until logout
             logging.error('ERROR ' + str(response.status_code) + ' during GET ' + url)
             raise ConnectionError('Cannot get: ' +url)
 
         return response
 
+    def _get_html(self, url, only=None):
+        """
+        Gets and parses a page (see parse_html), recording the parse time in request_stats.
+        """
+        content = self._get(url, self._default_header).content
+        start = time.perf_counter()
+        parsed_html = parse_html(content, only=only)
+        self.request_stats.record_parse("GET", url, time.perf_counter() - start)
+        return parsed_html
+
     def _get_auth_token(self, request_content):
         if request_content is None:
             logging.error('ERROR failed to fetch authenticity_token')
@@ -106,17 +508,28 @@ class FSConnector:
 #        html = bs(response.content, 'html.parser')
 #        auth_token =  html.find(attrs={'name':'authenticity_token'})
 #        return auth_token['value']
-        return bs(request_content, 'html.parser').find(attrs={'name':'authenticity_token'})['value']
+        return parse_html(request_content, only=AUTH_TOKEN_STRAINER).find(attrs={'name':'authenticity_token'})['value']
 
-    def _post(self, url, header, data, request):
+    def _post(self, url, header, data, request, invalidates_cache=True):
+        start = time.perf_counter()
         data['authenticity_token'] = self._get_auth_token(request.content)
-        response = self._session.post(url, headers=header, data=data, cookies=request.cookies)
+        self.request_stats.record_parse("GET", request.url, time.perf_counter() - start)
+        response = self._request("POST", url, headers=header, data=data, cookies=request.cookies)
+        if invalidates_cache:
+            self.invalidate_cache()
         if response.status_code != 200: #302
             logging.error('Error ' + str(response.status_code) + ' during POST ' + url)
             raise ConnectionError('Error cannot post to ' + url)
 
         return response
 
+    def invalidate_cache(self):
+        """
+        Drops all cached pages. Called after posting changes; call it also after changing data in Foodsoft by other means (e.g. a driver from open_driver).
+        """
+        if self.cache:
+            self.cache.invalidate()
+
     def login(self, user, password):
         self._user = user
         self._login_data['nick'] = user
@@ -124,12 +537,12 @@ class FSConnector:
 
         login_header = self._default_header
 
-        self._session = requests.Session()
+        self._new_session()
         request = self._get(self._url_login_request, login_header)
 
         login_header['Referer'] = self._url_login_request
 
-        response = self._post(self._url_login_post, login_header, self._login_data, request)
+        response = self._post(self._url_login_post, login_header, self._login_data, request, invalidates_cache=False)
         # TODO: check if the login was really successful or not (due to false login data), for example by checking status codes?
         # If not, set self._session back to None, or store logged-in status in a boolean variable
         logging.debug(user + ' logged in successfully to ' + self._url)
@@ -137,18 +550,72 @@ class FSConnector:
     def logout(self):
         self._session.close()
 
+    def is_logged_in(self):
+        """
+        Checks cheaply whether the session is (still) logged in: Foodsoft redirects to the login page otherwise,
+        so only the status of the profile page is requested, without following redirects or downloading the page.
+        """
+        if not self._session:
+            return False
+        try:
+            response = self._request("GET", f"{self._url}home/profile", retries=MAX_GET_RETRIES, headers=self._default_header, allow_redirects=False, stream=True)
+        except ConnectionError:
+            return False
+        response.close()
+        return response.status_code == 200
+
+    def export_cookies(self):
+        """
+        Returns the cookies of the session as a list of dicts, to restore the session later with FSConnector(cookies=...).
+        """
+        return [{"name": cookie.name, "value": cookie.value, "domain": cookie.domain, "path": cookie.path, "expires": cookie.expires, "secure": cookie.secure} for cookie in self._session.cookies]
+
+    def export_user_data(self):
+        return {attribute: getattr(self, attribute) for attribute in self.USER_DATA_ATTRIBUTES if hasattr(self, attribute)}
+
+    def import_user_data(self, user_data):
+        for attribute, value in user_data.items():
+            if attribute in self.USER_DATA_ATTRIBUTES:
+                setattr(self, attribute, value)
+
     def open_driver(self):
-        driver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()))
-        driver.get(self._url)
-        for cookie in self._session.cookies:
-            driver.add_cookie({
-                'name': cookie.name,
-                'value': cookie.value,
-                'path': cookie.path,
-                'expiry': cookie.expires,
-            })
+        """
+        Returns a browser from the shared pool, logged in with this connector's session. Hand it back with close_driver.
+        """
+        driver = browser_pool.firefox().checkout()
+        try:
+            driver.get(self._url)
+            for cookie in self._session.cookies:
+                driver.add_cookie({
+                    'name': cookie.name,
+                    'value': cookie.value,
+                    'path': cookie.path,
+                    'expiry': cookie.expires,
+                })
+        except Exception:
+            browser_pool.firefox().checkin(driver, origins=[self._url])
+            raise
         return driver
 
+    def close_driver(self, driver):
+        """
+        Returns a browser from open_driver to the pool, without the session's cookies.
+        As the browser may have changed data in Foodsoft, the cache is cleared too.
+        """
+        browser_pool.firefox().checkin(driver, origins=[self._url])
+        self.invalidate_cache()
+
+    @contextlib.contextmanager
+    def borrowed_driver(self):
+        """
+        Yields a browser from open_driver and hands it back with close_driver, also if the block fails.
+        """
+        driver = self.open_driver()
+        try:
+            yield driver
+        finally:
+            self.close_driver(driver)
+
     def add_user_data(self, first_name=True, last_name=True, nick=False, workgroups=False, ordergroup=False):
         """
         Adds the requested data of the logged-in user to the FSConnector object:
@@ -161,28 +628,28 @@ class FSConnector:
         """
 
         userdata_url = f"{self._url}home/profile"
-        parsed_html = bs(self._get(userdata_url, self._default_header).content, 'html.parser')
-        first_name_field = parsed_html.body.find(id="user_first_name")
+        parsed_html = self._get_html(userdata_url, only=PROFILE_STRAINER)
+        first_name_field = parsed_html.find(id="user_first_name")
         if not first_name_field:
             self._session.close()
             self._session = None
         else:
-            self.user = int(parsed_html.body.find(class_="simple_form form-horizontal edit_user").get("id").split("edit_user_")[-1])
+            self.user = int(parsed_html.find(class_="simple_form form-horizontal edit_user").get("id").split("edit_user_")[-1])
             if first_name:
                 self.first_name = first_name_field.get("value")
             if last_name:
-                self.last_name = parsed_html.body.find(id="user_last_name").get("value")
+                self.last_name = parsed_html.find(id="user_last_name").get("value")
             if nick:
-                nick_tag = parsed_html.body.find(id="user_nick")
+                nick_tag = parsed_html.find(id="user_nick")
                 if nick_tag:
                     self.nick = nick_tag.get("value")
                 else:
                     self.nick = None
             if workgroups:
-                wg_links = parsed_html.body.select("[rel='nofollow']")
+                wg_links = parsed_html.select("[rel='nofollow']")
                 self.workgroups = [int(link["href"].split("=")[-1]) for link in wg_links]
             if ordergroup:
-                links = parsed_html.body.find_all("a")
+                links = parsed_html.find_all("a")
                 self.ordergroup = None
                 for link in links:
                     href = link.get("href")
@@ -197,113 +664,257 @@ class FSConnector:
         decoded_content = request.content.decode('utf-8')
         return decoded_content
 
-    def get_supplier_data(self, name_fields=None, origin_fields=None, address_fields=None, website_fields=None, category_fields=None, additional_fields=None, exclude_categories=None):
-        suppliers = []
-        supplier_ids = []
-        supplier_list_url = f"{self._url}suppliers"
-        parsed_html = bs(self._get(supplier_list_url, self._default_header).content, 'html.parser')
-        for row in parsed_html.body.find("tbody").find_all("tr"):
-            supplier_ids.append(row.find_all("td")[0].find("a").get("href").split("suppliers/")[-1])
-        for supplier_id in supplier_ids:
-            supplier = self.get_data_of_supplier(supplier_id=supplier_id, name_fields=name_fields, origin_fields=origin_fields, address_fields=address_fields, website_fields=website_fields, category_fields=category_fields, additional_fields=copy.deepcopy(additional_fields), exclude_categories=exclude_categories)
-            if supplier:
-                suppliers.append(supplier)
+    @contextlib.contextmanager
+    def open_articles_CSV(self, supplier_id):
+        """
+        Opens the articles CSV of a supplier as a text stream, which is decoded while it is downloaded,
+        so the CSV doesn't have to be held in memory as a whole:
+        with foodsoft_connector.open_articles_CSV(supplier_id) as f:
+            rows = csv.reader(f, delimiter=';')
+        """
+        supplier_url = f"{self._url}suppliers/{str(supplier_id)}/articles.csv"
+        if self.cache and self.cache.cacheable(supplier_url):
+            # cached responses are complete already, but still decode them incrementally instead of copying them into a string
+            response = self._get(supplier_url, self._default_header)
+            yield io.TextIOWrapper(io.BytesIO(response.content), encoding='utf-8', newline='')
+            return
+        response = self._request("GET", supplier_url, retries=MAX_GET_RETRIES, headers=self._default_header, stream=True)
+        try:
+            self._get(supplier_url, self._default_header, response=response) # checks the status
+            response.raw.decode_content = True # undo gzip etc.
+            reader = TimedReader(response.raw)
+            start = time.perf_counter()
+            yield io.TextIOWrapper(io.BufferedReader(reader), encoding='utf-8', newline='')
+            # the caller parses the CSV while it is read, so the time not spent waiting for the stream is parse time
+            self.request_stats.record_stream("GET", supplier_url, seconds=reader.seconds, size=response.raw.tell())
+            self.request_stats.record_parse("GET", supplier_url, time.perf_counter() - start - reader.seconds)
+        finally:
+            response.close()
 
-        return suppliers
+    def _alerts(self, content):
+        return [alert.text.strip() for alert in parse_html(content, only=ALERT_STRAINER).find_all("div", class_="alert") if alert.text.strip()]
 
-    def get_data_of_supplier(self, supplier_id, name_fields=None, origin_fields=None, address_fields=None, website_fields=None, category_fields=None, additional_fields=None, exclude_categories=None):
-        supplier_url = f"{self._url}suppliers/{str(supplier_id)}/edit"
-        parsed_html_body = bs(self._get(supplier_url, self._default_header).content, 'html.parser').body
-        category = None
-        if category_fields:
-            for field in category_fields:
-                category = parsed_html_body.find(id=f"supplier_{field}").select_one('option:checked').text # rewrite so it doesn't crash if no category selected
-                if category:
-                    if exclude_categories:
-                        if category in exclude_categories:
-                            return None
-                    break
-        fs_name = self.get_supplier_field_data(parsed_html_body=parsed_html_body, fields=["name"])
-        if " †" in fs_name:
-            deleted = True
+    def upload_articles_CSV(self, supplier_id, file_path, outlist_absent=True, convert_units=False):
+        """
+        Uploads an articles CSV (see foodsoft_article_import.write_articles_csv) like "Upload articles" in Foodsoft,
+        and returns Foodsoft's preview of the changes as ArticleUpload. Nothing is changed until it is confirmed with confirm_article_upload.
+        outlist_absent: delete the supplier's articles which are not in the file
+        convert_units: let Foodsoft convert the units of the file
+        """
+        upload_url = f"{self._url}suppliers/{str(supplier_id)}/articles/upload"
+        upload_page = self._get(upload_url, self._default_header)
+        form = parse_html(upload_page.content, only=ARTICLES_UPLOAD_FORM_STRAINER).find("form")
+        if form:
+            action = urljoin(upload_url, form.get("action"))
+            file_field = form.find("input", type="file")
+            file_field_name = file_field.get("name") if file_field else "articles[file]"
         else:
-            deleted = False
-        name = self.get_supplier_field_data(parsed_html_body=parsed_html_body, fields=name_fields).replace(" †", "")
-        address = self.get_supplier_field_data(parsed_html_body=parsed_html_body, fields=address_fields)
-        origin = self.get_supplier_field_data(parsed_html_body=parsed_html_body, fields=origin_fields)
-        website = self.get_supplier_field_data(parsed_html_body=parsed_html_body, fields=website_fields)
-        if additional_fields:
-            for af in additional_fields:
-                value = self.get_supplier_field_data(parsed_html_body=parsed_html_body, fields=af.get("foodsoft field(s)"))
-                if value:
-                    af["value"] = value
-
-        print(f"{name}: {additional_fields}")
-        return Supplier(no=supplier_id, name=name, address=address, origin=origin, website=website, category=category, additional_fields=additional_fields, deleted=deleted)
-
-    def get_supplier_field_data(self, parsed_html_body, fields):
-        # checks each field in a list of fields for data and returns the first non-null value
-        if fields:
-            for field in fields:
-                field = parsed_html_body.find(id=f"supplier_{field}")
-                if field.name == "textarea":
-                    field_value = field.text[1:] #get("value")
-                else:
-                    field_value = field.get("value")
-                if field_value:
-                    return field_value
+            action = f"{self._url}suppliers/{str(supplier_id)}/articles/parse_upload"
+            file_field_name = "articles[file]"
+        data = {"authenticity_token": self._get_auth_token(upload_page.content), "articles[outlist_absent]": "1" if outlist_absent else "0", "articles[convert_units]": "1" if convert_units else "0"}
+        header = {key: value for key, value in self._default_header.items() if key != "Content-Type"} # requests sets the multipart boundary
+        header["Referer"] = upload_url
+        with open(file_path, "rb") as f:
+            response = self._request("POST", action, headers=header, data=data, files={file_field_name: (os.path.basename(file_path), f, "text/csv")})
+        if response.status_code != 200:
+            logging.error('Error ' + str(response.status_code) + ' during POST ' + action)
+            raise ConnectionError('Error cannot post to ' + action)
+        start = time.perf_counter()
+        form = parse_html(response.content, only=ARTICLES_SYNC_FORM_STRAINER).find("form")
+        if form:
+            upload = parse_article_sync_form(form, page_url=response.url, supplier_id=supplier_id)
+        else: # Foodsoft redirects back to the upload page if it can't read the file
+            upload = ArticleUpload(supplier_id=supplier_id, errors=self._alerts(response.content) or ["Foodsoft did not show a preview of the changes"])
+        self.request_stats.record_parse("POST", action, time.perf_counter() - start)
+        return upload
+
+    def confirm_article_upload(self, upload):
+        """
+        Submits the preview form of an ArticleUpload, which applies its changes in Foodsoft.
+        Returns Foodsoft's error messages if it didn't save the changes, otherwise an empty list.
+        """
+        if not upload.form_action:
+            raise ValueError("The upload has no preview form to confirm")
+        header = dict(self._default_header, Referer=upload.form_action)
+        response = self._request("POST", upload.form_action, headers=header, data=upload.form_data)
+        if response.status_code == 422: # the authenticity token belongs to another session, e.g. if the upload was done before logging in again
+            upload_page = self._get(f"{self._url}suppliers/{str(upload.supplier_id)}/articles/upload", self._default_header)
+            authenticity_token = self._get_auth_token(upload_page.content)
+            form_data = [(name, authenticity_token if name == "authenticity_token" else value) for name, value in upload.form_data]
+            response = self._request("POST", upload.form_action, headers=header, data=form_data)
+        self.invalidate_cache()
+        if response.status_code != 200:
+            logging.error('Error ' + str(response.status_code) + ' during POST ' + upload.form_action)
+            raise ConnectionError('Error cannot post to ' + upload.form_action)
+        if parse_html(response.content, only=ARTICLES_SYNC_FORM_STRAINER).find("form"): # shown again if Foodsoft couldn't save the articles
+            return self._alerts(response.content) or ["Foodsoft did not save the changes"]
+        return []
+
+    def map_concurrently(self, function, items, max_concurrent_requests=None):
+        """
+        Calls function for each item, with up to max_concurrent_requests (default: the connector's limit) calls in flight at once.
+        Returns the results in the order of the items, regardless of which request finishes first.
+        """
+        items = list(items)
+        max_workers = min(max_concurrent_requests or self.max_concurrent_requests, len(items))
+        if max_workers <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(function, items))
+
+    def get_supplier_list(self):
+        """
+        Returns {supplier ID: checksum of its row} of the suppliers listed in Foodsoft, in the order of the list,
+        and drops the entries of changed suppliers from the supplier cache.
+        """
+        rows = {}
+        parsed_html = self._get_html(f"{self._url}suppliers", only=TABLE_BODY_STRAINER)
+        for row in parsed_html.find("tbody").find_all("tr"):
+            rows[row.find_all("td")[0].find("a").get("href").split("suppliers/")[-1]] = supplier_cache.checksum(str(row))
+        if self.supplier_cache:
+            self.supplier_cache.validate(rows)
+        return rows
+
+    def refresh_supplier_cache(self):
+        """
+        Clears the supplier cache and fills it again with the current data of all listed suppliers. Returns their number,
+        or 0 if the connector has no supplier cache.
+        """
+        if not self.supplier_cache:
+            return 0
+        self.supplier_cache.clear()
+        supplier_ids = list(self.get_supplier_list())
+        self.map_concurrently(self.get_supplier_fields, supplier_ids)
+        return len(supplier_ids)
+
+    def get_supplier_data(self, name_fields=None, origin_fields=None, address_fields=None, website_fields=None, category_fields=None, additional_fields=None, exclude_categories=None, max_concurrent_requests=None):
+        supplier_ids = list(self.get_supplier_list())
+
+        def get_supplier(supplier_id):
+            # each supplier gets its own copies of the field dicts, as get_data_of_supplier stores the values in them
+            supplier_additional_fields = [dict(af) for af in additional_fields] if additional_fields else additional_fields
+            return self.get_data_of_supplier(supplier_id=supplier_id, name_fields=name_fields, origin_fields=origin_fields, address_fields=address_fields, website_fields=website_fields, category_fields=category_fields, additional_fields=supplier_additional_fields, exclude_categories=exclude_categories)
 
-    def get_stock_articles_and_suppliers(self, skip_unavailable_articles=False, suppliers=None, name_fields=None, origin_fields=None, address_fields=None, website_fields=None, category_fields=None, additional_fields=None, exclude_categories=None):
+        suppliers = self.map_concurrently(get_supplier, supplier_ids, max_concurrent_requests=max_concurrent_requests)
+        return [supplier for supplier in suppliers if supplier]
+
+    def get_supplier_fields(self, supplier_id):
+        """
+        Returns the values of the fields of the supplier's edit form as {field id without "supplier_": value},
+        from the supplier cache if possible. Selects have the text of the selected option (None if none is selected) as value.
+        """
+        if self.supplier_cache:
+            fields = self.supplier_cache.get(supplier_id)
+            if fields is not None:
+                self._count("supplier cache hits")
+                return fields
+        parsed_html_body = self._get_html(f"{self._url}suppliers/{str(supplier_id)}/edit", only=SUPPLIER_FORM_STRAINER)
+        fields = {}
+        for field in parsed_html_body.find_all(id=re.compile("^supplier_")):
+            if field.name == "textarea":
+                value = field.text[1:] # Rails adds a newline at the start of textareas
+            elif field.name == "select":
+                selected_option = field.select_one('option:checked')
+                value = selected_option.text if selected_option else None
+            else:
+                value = field.get("value")
+            fields[field.get("id").split("supplier_", 1)[-1]] = value
+        if self.supplier_cache:
+            self.supplier_cache.store(supplier_id, fields)
+        return fields
+
+    def get_data_of_supplier(self, supplier_id, name_fields=None, origin_fields=None, address_fields=None, website_fields=None, category_fields=None, additional_fields=None, exclude_categories=None):
+        supplier_fields = self.get_supplier_fields(supplier_id)
+        return supplier_from_fields(supplier_id=supplier_id, supplier_fields=supplier_fields, name_fields=name_fields, origin_fields=origin_fields, address_fields=address_fields, website_fields=website_fields, category_fields=category_fields, additional_fields=additional_fields, exclude_categories=exclude_categories)
+
+    def get_stock_articles_and_suppliers(self, skip_unavailable_articles=False, suppliers=None, name_fields=None, origin_fields=None, address_fields=None, website_fields=None, category_fields=None, additional_fields=None, exclude_categories=None, reuse_details=False):
         """
         Returns a list of foodsoft_article.StockArticle objects.
         Stock quantity changes not included yet.
+        The pages of suppliers not in suppliers and the detail pages of the articles are fetched concurrently.
+        reuse_details: reuse deposit and note read earlier by this connector for articles whose row in the overview is unchanged.
+            Faster, but misses changes to only the deposit or note, as they are not shown in the overview.
         """
         if not suppliers:
             suppliers = []
-        parsed_html_body = bs(self._get(f"{self._url}stock_articles", self._default_header).content, 'html.parser').body
-        rows = parsed_html_body.find(id="articles-tbody").find_all("tr")
-        stock_articles = []
-        for row in rows:
+        if not exclude_categories:
+            exclude_categories = []
+        parsed_html_body = self._get_html(f"{self._url}stock_articles", only=STOCK_ARTICLES_STRAINER)
+
+        # 1. parse the overview table
+        rows = []
+        for row in parsed_html_body.find(id="articles-tbody").find_all("tr"):
             classes = row.get("class")
-            if classes and classes[-1] == "unavailable":
-                if skip_unavailable_articles:
-                    continue
-                else:
-                    available = False
-            else:
-                available = True
-            no = row.get("id").split("-")[-1]
+            if classes and classes[-1] == "unavailable" and skip_unavailable_articles:
+                continue
             columns = row.find_all("td")
             category = columns[8].text
             if category in exclude_categories:
                 continue
-            name = columns[0].find("a").text
-            in_stock = float(columns[1].text.replace(",", "."))
-            ordered = float(columns[2].text.replace(",", "."))
-            available = float(columns[3].text.replace(",", "."))
-            unit = columns[4].text
-            price_net = float(columns[5].text.replace(",", ".").replace("€", "").strip())
-            vat = float(columns[6].text.replace(",", ".").replace("%", "").strip())
-            supplier_id = columns[7].find("a").get("href").split("/")[-1]
-            matching_suppliers = [s for s in suppliers if s.no == supplier_id]
-            if matching_suppliers:
-                supplier = matching_suppliers[0]
-            else:
-                supplier = self.get_data_of_supplier(supplier_id=supplier_id, name_fields=name_fields, origin_fields=origin_fields, address_fields=address_fields, website_fields=website_fields, category_fields=category_fields, additional_fields=additional_fields)
-                if supplier:
-                    suppliers.append(supplier)
-            article_details_page = bs(self._get(f"{self._url}stock_articles/{no}", self._default_header).content, 'html.parser').body
-            details_dl = article_details_page.find(id="stockArticleDetails").find("dl")
-            deposit = float(details_dl.find_all("dd")[5].text.replace(",", ".").replace("€", "").strip())
-            note = details_dl.find_all("dd")[8].text
-            stock_articles.append(foodsoft_article.StockArticle(no=no, in_stock=in_stock, ordered=ordered, supplier=supplier, name=name, unit=unit, price_net=price_net, available=available, order_number=f"00_{str(no)}", note=note, vat=vat, deposit=deposit))
+            rows.append({
+                "no": row.get("id").split("-")[-1],
+                "name": columns[0].find("a").text,
+                "in_stock": float(columns[1].text.replace(",", ".")),
+                "ordered": float(columns[2].text.replace(",", ".")),
+                "available": float(columns[3].text.replace(",", ".")),
+                "unit": columns[4].text,
+                "price_net": float(columns[5].text.replace(",", ".").replace("€", "").strip()),
+                "vat": float(columns[6].text.replace(",", ".").replace("%", "").strip()),
+                "supplier_id": columns[7].find("a").get("href").split("/")[-1],
+                "fingerprint": tuple(column.text for column in columns[:9]),
+                })
+
+        # 2. fetch the distinct missing supplier pages and the article detail pages in one concurrent batch
+        suppliers_by_id = {supplier.no: supplier for supplier in suppliers}
+        missing_supplier_ids = list(dict.fromkeys(row["supplier_id"] for row in rows if row["supplier_id"] not in suppliers_by_id))
+        if self.supplier_cache and missing_supplier_ids:
+            self.get_supplier_list() # one page to drop changed suppliers from the cache, instead of fetching each supplier's page
+        details_by_no = {}
+        if reuse_details:
+            for row in rows:
+                cached_details = self._stock_article_details.get(row["no"])
+                if cached_details and cached_details[0] == row["fingerprint"]:
+                    details_by_no[row["no"]] = cached_details[1]
+        missing_detail_nos = [row["no"] for row in rows if row["no"] not in details_by_no]
+
+        def get_supplier(supplier_id):
+            supplier_additional_fields = [dict(af) for af in additional_fields] if additional_fields else additional_fields
+            return self.get_data_of_supplier(supplier_id=supplier_id, name_fields=name_fields, origin_fields=origin_fields, address_fields=address_fields, website_fields=website_fields, category_fields=category_fields, additional_fields=supplier_additional_fields)
+
+        tasks = [(get_supplier, supplier_id) for supplier_id in missing_supplier_ids] + [(self.get_stock_article_details, no) for no in missing_detail_nos]
+        results = self.map_concurrently(lambda task: task[0](task[1]), tasks)
+
+        # 3. join them through dictionaries
+        for supplier_id, supplier in zip(missing_supplier_ids, results[:len(missing_supplier_ids)]):
+            suppliers_by_id[supplier_id] = supplier
+            if supplier:
+                suppliers.append(supplier)
+        details_by_no.update(zip(missing_detail_nos, results[len(missing_supplier_ids):]))
+
+        stock_articles = []
+        for row in rows:
+            deposit, note = details_by_no[row["no"]]
+            self._stock_article_details[row["no"]] = (row["fingerprint"], (deposit, note))
+            stock_articles.append(foodsoft_article.StockArticle(no=row["no"], in_stock=row["in_stock"], ordered=row["ordered"], supplier=suppliers_by_id[row["supplier_id"]], name=row["name"], unit=row["unit"], price_net=row["price_net"], available=row["available"], order_number=f"00_{row['no']}", note=note, vat=row["vat"], deposit=deposit))
         return stock_articles, suppliers
 
-    def get_article_categories(self):
+    def get_stock_article_details(self, no):
+        """
+        Returns deposit and note of a stock article, which are only shown on its detail page.
+        """
+        article_details_page = self._get_html(f"{self._url}stock_articles/{no}", only=STOCK_ARTICLE_DETAILS_STRAINER)
+        details_dl = article_details_page.find(id="stockArticleDetails").find("dl")
+        deposit = float(details_dl.find_all("dd")[5].text.replace(",", ".").replace("€", "").strip())
+        note = details_dl.find_all("dd")[8].text
+        return deposit, note
+
+    def get_article_categories(self, keywords=True):
         """
         Returns a list of base.Category objects.
+        keywords: read the keywords of the categories from their descriptions; otherwise their keywords are empty lists,
+            which saves fetching the edit pages of categories with truncated descriptions.
         """
-        parsed_html_body = bs(self._get(f"{self._url}article_categories", self._default_header).content, 'html.parser').body
+        parsed_html_body = self._get_html(f"{self._url}article_categories", only=TABLE_BODY_STRAINER)
         rows = parsed_html_body.find("tbody").find_all("tr")
         article_categories = []
         for row in rows:
@@ -312,10 +923,25 @@ class FSConnector:
             category = base.Category(name=name, number=number)
             category.keywords = []
             description = row.find_all("td")[1].text
-            if description:
+            if description and keywords:
                 if description.endswith("..."):
-                    edit_body = bs(self._get(f"{self._url}article_categories/{number}/edit", self._default_header).content, 'html.parser').body
+                    edit_body = self._get_html(f"{self._url}article_categories/{number}/edit", only=ARTICLE_CATEGORY_DESCRIPTION_STRAINER)
                     description = edit_body.find(id="article_category_description").text
                 category.keywords = [kw.strip() for kw in description.split(",")]
             article_categories.append(category)
         return article_categories
+
+    def get_last_closed_order_id(self, supplier_id):
+        """
+        Returns the ID of the last closed order of the supplier, or None if there is none.
+        """
+        supplier_page = self._get_html(f"{self._url}suppliers/{str(supplier_id)}", only=SUPPLIER_ORDERS_STRAINER) # get list of existing orders
+        columns = supplier_page.find_all("div", class_="span6")
+        if not columns or not columns[-1].find("tbody"):
+            return None
+        for row in columns[-1].find("tbody").find_all("tr"):
+            cells = row.find_all("td")
+            if len(cells) < 3 or not cells[2].find("a"):
+                continue # open orders don't have a link to the balancing menu, so we skip those
+            return cells[2].find("a").get("href").split("=")[-1]
+        return None
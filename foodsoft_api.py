@@ -0,0 +1,122 @@
+"""
+Connector using Foodsoft's JSON API (<instance URL>/api/v1/) where it provides the data, instead of rendering and parsing HTML pages.
+FSApiConnector is a drop-in replacement for foodsoft.FSConnector: it logs in like FSConnector (the browser session is still needed
+for the pages the API lacks, the CSVs and posting) and additionally requests an OAuth access token with the user's password.
+
+The API of Foodsoft v1 only replaces one of the scraped calls: get_article_categories without keywords.
+The other data isn't in the API: the user record lacks first and last name, work groups and ordergroup (see add_user_data),
+the order records lack the supplier (so the last closed order of a supplier can't be found), and there are no supplier, article CSV or stock article endpoints.
+If the API isn't available (no token, missing scope, endpoint missing in the instance's Foodsoft version), the page is scraped as before.
+
+Enable it per instance in settings.yaml with `foodsoft_api: true`, or with `foodsoft_api: {client_id: ..., client_secret: ...}`
+if the instance's OAuth application requires client credentials for the password grant.
+"""
+
+import time
+import logging
+
+import base
+import foodsoft
+
+API_PATH = "api/v1/"
+TOKEN_PATH = "oauth/token"
+API_SCOPES = "user:read" # article categories are readable with any scope
+PER_PAGE = 100 # records per page of collections
+
+class FSApiConnector(foodsoft.FSConnector):
+    USER_DATA_ATTRIBUTES = foodsoft.FSConnector.USER_DATA_ATTRIBUTES + ["api_token"] # stored with the session, see foodsoft_session
+
+    def __init__(self, url: str, user: str, password: str, client_id=None, client_secret=None, **kwargs):
+        """
+        client_id, client_secret: credentials of the OAuth application in Foodsoft, if needed for the password grant
+        Other arguments as for foodsoft.FSConnector.
+        """
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_token = None
+        self._unavailable_endpoints = set() # endpoints which answered 403/404, not asked again
+        super().__init__(url, user, password, **kwargs)
+
+    def login(self, user, password):
+        super().login(user, password)
+        self.api_token = self._request_api_token(user, password)
+
+    def logout(self):
+        self.api_token = None
+        super().logout()
+
+    def _request_api_token(self, user, password):
+        data = {"grant_type": "password", "username": user, "password": password, "scope": API_SCOPES}
+        if self.client_id:
+            data["client_id"] = self.client_id
+        if self.client_secret:
+            data["client_secret"] = self.client_secret
+        try:
+            response = self._request("POST", self._url + TOKEN_PATH, data=data, headers={"Accept": "application/json"})
+        except ConnectionError as e:
+            logging.warning(f"Could not request a Foodsoft API token, scraping pages instead: {e}")
+            return None
+        if response.status_code != 200:
+            logging.warning(f"Foodsoft at {self._url} did not grant an API token (status {str(response.status_code)}), scraping pages instead")
+            return None
+        return response.json().get("access_token")
+
+    def _api_get(self, endpoint, params=None):
+        """
+        Returns the parsed JSON of an API endpoint, or None if the API can't provide it, so the caller scrapes the page instead.
+        """
+        if not self.api_token or endpoint in self._unavailable_endpoints:
+            return None
+        self._count("api requests")
+        url = self._url + API_PATH + endpoint
+        response = self._request("GET", url, retries=foodsoft.MAX_GET_RETRIES, params=params, headers={"Authorization": f"Bearer {self.api_token}", "Accept": "application/json"})
+        if response.status_code == 401: # token expired or revoked; a new one needs the password, so scrape until the next login
+            logging.warning(f"Foodsoft API token of {self._user} is not valid anymore, scraping pages instead")
+            self.api_token = None
+            return None
+        if response.status_code in [403, 404]:
+            logging.info(f"Foodsoft API endpoint {endpoint} not available (status {str(response.status_code)}), scraping pages instead")
+            self._unavailable_endpoints.add(endpoint)
+            return None
+        if response.status_code != 200:
+            logging.error('ERROR ' + str(response.status_code) + ' during GET ' + response.url)
+            raise ConnectionError('Cannot get: ' + response.url)
+        start = time.perf_counter()
+        data = response.json()
+        self.request_stats.record_parse("GET", url, time.perf_counter() - start)
+        return data
+
+    def _api_get_collection(self, endpoint, key, params=None):
+        """
+        Returns all records of a paginated collection endpoint as a list, or None (see _api_get).
+        """
+        records = []
+        page = 1
+        while True:
+            data = self._api_get(endpoint, params=dict(params or {}, page=page, per_page=PER_PAGE))
+            if data is None:
+                return None
+            records.extend(data[key])
+            if page >= data.get("meta", {}).get("total_pages", 1):
+                return records
+            page += 1
+
+    def _fall_back(self, method_name):
+        self._count("api fallbacks")
+        logging.debug(f"{method_name}: scraping Foodsoft pages")
+
+    def get_article_categories(self, keywords=True):
+        """
+        As FSConnector.get_article_categories. The API doesn't provide the descriptions of the categories,
+        so the categories are only read from it if no keywords are needed.
+        """
+        categories = None if keywords else self._api_get_collection("article_categories", "article_categories")
+        if categories is None:
+            self._fall_back("get_article_categories")
+            return super().get_article_categories(keywords=keywords)
+        article_categories = []
+        for record in categories:
+            category = base.Category(name=record["name"], number=str(record["id"]))
+            category.keywords = []
+            article_categories.append(category)
+        return article_categories
@@ -130,30 +130,36 @@ def suffix(suffix, suffix_type=""):
     return " (" + word + str(suffix) + ")"
 
 def read_articles_from_csv(csv, version_delimiter=None, prefix_delimiter=None, skip_unavailable_articles=False):
-    articles = []
-    articles_from_csv = list(csv)
-    if len(articles_from_csv) > 1:
-        for row in articles_from_csv[1:]:
-            avail_str = row[0]
-            # yes_strs = ['Yes', 'Ja', 'Sí', 'Oui', 'Ja', 'Evet'] # not needed (yet)
-            no_strs = ['No', 'Nein', 'No', 'Non', 'Nee'] # en, de, es, fr, ne, (tr only yes)
-            if base.equal_strings_check(list1=[avail_str], list2=no_strs):
-                available = False
-                if skip_unavailable_articles:
-                    continue
-            else:
-                available = True
-            order_number = row[1]
-            version = 1
-            if version_delimiter:
-                order_number_strings = order_number.split(version_delimiter)
-                if len(order_number_strings) > 1:
-                    order_number = version_delimiter.join(order_number_strings[:-1])
-                    version = int(order_number_strings[-1])
-            if prefix_delimiter:
-                order_number_strings = order_number.split(prefix_delimiter)
-                if len(order_number_strings) > 1:
-                    order_number = prefix_delimiter.join(order_number_strings[1:])
-            article = Article(order_number=order_number, name=row[2], note=row[3], manufacturer=row[4], origin=row[5], unit=row[6], price_net=row[7], available=available, vat=row[8], deposit=row[9], unit_quantity=row[10], category=row[13], version=version)
-            articles.append(article)
-    return articles
+    """
+    Returns the articles of a Foodsoft articles CSV as a list. csv: any iterator of rows, e.g. a csv.reader of a file or of FSConnector.open_articles_CSV.
+    """
+    return list(iter_articles_from_csv(csv=csv, version_delimiter=version_delimiter, prefix_delimiter=prefix_delimiter, skip_unavailable_articles=skip_unavailable_articles))
+
+def iter_articles_from_csv(csv, version_delimiter=None, prefix_delimiter=None, skip_unavailable_articles=False):
+    """
+    Yields the articles of a Foodsoft articles CSV one by one while reading the rows, skipping the header row.
+    """
+    rows = iter(csv)
+    next(rows, None) # header
+    # yes_strs = ['Yes', 'Ja', 'Sí', 'Oui', 'Ja', 'Evet'] # not needed (yet)
+    no_strs = ['No', 'Nein', 'No', 'Non', 'Nee'] # en, de, es, fr, ne, (tr only yes)
+    for row in rows:
+        avail_str = row[0]
+        if base.equal_strings_check(list1=[avail_str], list2=no_strs):
+            available = False
+            if skip_unavailable_articles:
+                continue
+        else:
+            available = True
+        order_number = row[1]
+        version = 1
+        if version_delimiter:
+            order_number_strings = order_number.split(version_delimiter)
+            if len(order_number_strings) > 1:
+                order_number = version_delimiter.join(order_number_strings[:-1])
+                version = int(order_number_strings[-1])
+        if prefix_delimiter:
+            order_number_strings = order_number.split(prefix_delimiter)
+            if len(order_number_strings) > 1:
+                order_number = prefix_delimiter.join(order_number_strings[1:])
+        yield Article(order_number=order_number, name=row[2], note=row[3], manufacturer=row[4], origin=row[5], unit=row[6], price_net=row[7], available=available, vat=row[8], deposit=row[9], unit_quantity=row[10], category=row[13], version=version)
@@ -2,8 +2,15 @@ import csv
 import copy
 
 import base
+import foodsoft
 import foodsoft_article
 
+whitespace_normalizer = base.Normalizer(collapse=[" "])
+
+# Executable script methods of ArticleImportRun
+upload_to_foodsoft = base.ScriptMethod(name="upload_to_foodsoft")
+confirm_foodsoft_upload = base.ScriptMethod(name="confirm_foodsoft_upload")
+
 def remove_articles_to_ignore(articles):
     return [x for x in articles if not x.ignore]
 
@@ -135,9 +142,10 @@ def get_articles_from_foodsoft(locales, supplier_id, foodsoft_connector=None, ve
 
     if foodsoft_connector and supplier_id:
         # fsc = foodsoft.FSConnector(url=foodsoft_url, user=foodsoft_user, password=foodsoft_password)
-        csv_from_foodsoft = csv.reader(foodsoft_connector.get_articles_CSV(supplier_id=supplier_id).splitlines(), delimiter=';')
-        # fsc.logout()
-        articles_from_foodsoft = foodsoft_article.read_articles_from_csv(csv=csv_from_foodsoft, version_delimiter=version_delimiter, prefix_delimiter=prefix_delimiter, skip_unavailable_articles=skip_unavailable_articles)
+        with foodsoft_connector.open_articles_CSV(supplier_id=supplier_id) as csv_file:
+            csv_from_foodsoft = csv.reader(csv_file, delimiter=';')
+            # fsc.logout()
+            articles_from_foodsoft = foodsoft_article.read_articles_from_csv(csv=csv_from_foodsoft, version_delimiter=version_delimiter, prefix_delimiter=prefix_delimiter, skip_unavailable_articles=skip_unavailable_articles)
     else:
         articles_from_foodsoft = []
         warning = locales["foodsoft_article_import"].get("comparing manual changes failed due to missing foodsoft connector")
@@ -154,13 +162,12 @@ def compare_manual_changes(locales, foodcoop, supplier, articles, articles_from_
     if not notifications:
         notifications = []
 
-    # Extract the configuration for this supplier
-    configuration_config = base.read_config(foodcoop=foodcoop, configuration=supplier)
-    if "manual changes" not in configuration_config:
-        configuration_config["manual changes"] = {}
+    # Extract the manual changes for this supplier
+    configuration_config = {"manual changes": base.read_manual_changes(foodcoop=foodcoop, configuration=supplier)}
+    original_manual_changes = copy.deepcopy(configuration_config["manual changes"])
 
     # Get the last CSV created by the script
-    last_imported_run_name = base.read_in_config(configuration_config, "last imported run", "")
+    last_imported_run_name = base.read_config(foodcoop=foodcoop, configuration=supplier).get("last imported run", "")
     last_imported_csv = None
     if last_imported_run_name:
         last_imported_csv, notifications = base.get_file_path(foodcoop=foodcoop, configuration=supplier, run=last_imported_run_name, folder="download", ending=".csv", notifications=notifications)
@@ -222,7 +229,15 @@ def compare_manual_changes(locales, foodcoop, supplier, articles, articles_from_
                 configuration_config["manual changes"][article_order_number]["category"] = article_from_foodsoft.category
                 article.category = article_from_foodsoft.category
 
-    base.save_config(foodcoop=foodcoop, configuration=supplier, config=configuration_config)
+    # Only write back the manual changes found in this run, as other runs could have changed the config in the meantime
+    def merge_manual_changes(config):
+        if not config.get("manual changes"):
+            config["manual changes"] = {}
+        for article_order_number, changes in configuration_config["manual changes"].items():
+            for string_type, change in changes.items():
+                if original_manual_changes.get(article_order_number, {}).get(string_type) != change:
+                    config["manual changes"].setdefault(article_order_number, {})[string_type] = change
+    base.update_config(foodcoop=foodcoop, configuration=supplier, update=merge_manual_changes)
 
     return articles, notifications
 
@@ -412,7 +427,7 @@ def validate_string(locales, string, string_type, article, notifications):
     """
     Check if unit, name, and other strings exceed the respective character limit, and shorten them if so
     """
-    string = base.remove_double_strings_loop(text=str(string), string=" ", description="whitespaces") # remove unnecessary whitespaces
+    string = whitespace_normalizer(str(string)) # remove unnecessary whitespaces
     if string_type != "unit" and string_type != "name": # Units and names could also be shortened, but Foodsoft will validate them, so it's not necessary.
         max_length = 255
         abort_string = "..."
@@ -498,3 +513,101 @@ def write_articles_csv(locales, file_path, articles, version_delimiter=None, not
         writer.writerows(rows)
 
     return notifications
+
+def upload_methods(supplier_id):
+    # the methods of ArticleImportRun to offer after writing the articles CSV, if the supplier's ID in Foodsoft is known
+    if supplier_id:
+        return [upload_to_foodsoft]
+    else:
+        return []
+
+def compose_upload_message(locales, upload, confirmed=False):
+    # summary of Foodsoft's preview of an uploaded articles CSV (foodsoft.ArticleUpload), or of the changes made if confirmed
+    field_names = locales["foodsoft_article_import"]["article fields"]
+
+    def describe_article(fields):
+        text = fields.get("name", "")
+        if fields.get("unit"):
+            text += " " + fields["unit"]
+        if fields.get("order_number"):
+            text = "#" + fields["order_number"] + " " + text
+        return text
+
+    if upload.errors:
+        text = locales["foodsoft_article_import"]["upload failed"] + "\n"
+        for error in upload.errors:
+            text += "- " + error + "\n"
+        return text
+    if not upload.has_changes():
+        return locales["foodsoft_article_import"]["upload without changes"] + "\n"
+    text = ""
+    if confirmed:
+        text += locales["foodsoft_article_import"]["upload confirmed"] + "\n\n"
+    if upload.new_articles:
+        text += locales["foodsoft_article_import"]["new articles in upload"].format(number=str(len(upload.new_articles))) + ":\n"
+        for fields in upload.new_articles:
+            text += "- " + describe_article(fields) + "\n"
+        text += "\n"
+    if upload.changed_articles:
+        text += locales["foodsoft_article_import"]["changed articles in upload"].format(number=str(len(upload.changed_articles))) + ":\n"
+        for article in upload.changed_articles:
+            changes = []
+            for field, (current_value, new_value) in article["changes"].items():
+                if current_value is None:
+                    changes.append(f"{field_names.get(field, field)} '{new_value}'")
+                else:
+                    changes.append(f"{field_names.get(field, field)} '{current_value}' -> '{new_value}'")
+            text += "- " + describe_article(article["fields"])
+            if changes:
+                text += ": " + ", ".join(changes)
+            text += "\n"
+        text += "\n"
+    if upload.deleted_articles:
+        text += locales["foodsoft_article_import"]["deleted articles in upload"].format(number=str(len(upload.deleted_articles))) + ":\n"
+        for article in upload.deleted_articles:
+            text += "- " + article["name"] + "\n"
+        text += "\n"
+    if not confirmed:
+        text += locales["foodsoft_article_import"]["confirm upload"]
+    return text
+
+class ArticleImportRun(base.Run):
+    """
+    Run of an import script which writes the supplier's articles CSV with write_articles_csv to
+    the download folder as <configuration>_Artikel_<run name>.csv. Instead of downloading the CSV and uploading it in Foodsoft by hand,
+    it can be uploaded from the run page: put upload_methods(supplier_id) into next_possible_methods after writing it.
+    upload_to_foodsoft shows Foodsoft's preview of the changes, confirm_foodsoft_upload applies them and marks the run as imported.
+    """
+    def articles_csv_path(self):
+        return base.file_path(path=self.path, folder="download", file_name=self.configuration + "_Artikel_" + self.name) + ".csv"
+
+    def write_upload_message(self, session, content):
+        base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name=session.locales["foodsoft_article_import"]["foodsoft preview"]), content=content)
+
+    def upload_to_foodsoft(self, session):
+        config = base.read_config(self.foodcoop, self.configuration)
+        upload = session.foodsoft_connector.upload_articles_CSV(supplier_id=config.get("Foodsoft supplier ID"), file_path=self.articles_csv_path())
+        self.foodsoft_upload = upload.as_dict()
+        self.write_upload_message(session, compose_upload_message(locales=session.locales, upload=upload))
+
+        other_methods = [method for method in self.next_possible_methods if method.name != confirm_foodsoft_upload.name]
+        if upload.form_action:
+            self.next_possible_methods = [confirm_foodsoft_upload] + other_methods
+        else:
+            self.next_possible_methods = other_methods
+        self.completion_percentage = 90
+        self.log.append(base.LogEntry(action="uploaded to Foodsoft", done_by=base.full_user_name(session)))
+
+    def confirm_foodsoft_upload(self, session):
+        upload = foodsoft.ArticleUpload.from_dict(self.foodsoft_upload)
+        errors = session.foodsoft_connector.confirm_article_upload(upload)
+        if errors:
+            self.write_upload_message(session, session.locales["foodsoft_article_import"]["upload not confirmed"] + "\n" + "\n".join("- " + error for error in errors))
+            self.next_possible_methods = [method for method in self.next_possible_methods if method.name != confirm_foodsoft_upload.name]
+            return
+        base.set_config_detail(foodcoop=self.foodcoop, configuration=self.configuration, detail="last imported run", value=self.name)
+        self.write_upload_message(session, compose_upload_message(locales=session.locales, upload=upload, confirmed=True))
+
+        self.next_possible_methods = []
+        self.completion_percentage = 100
+        self.log.append(base.LogEntry(action="upload confirmed in Foodsoft", done_by=base.full_user_name(session)))
@@ -1,32 +1,36 @@
 import csv
-from selenium.webdriver.common.by import By
-from selenium.common.exceptions import NoSuchElementException
+import time
 import foodsoft_article
 
-def get_order_id_and_articles(session, driver, supplier_id):
+def get_order_id_and_articles(session, supplier_id, driver=None):
     """
-    Scrapes Foodsoft for the last closed order for a supplier, opens the order CSV, and creates a list of order articles.
+    Looks up the last closed order for a supplier in Foodsoft, downloads the order CSV, and creates a list of order articles.
     Returns the order id AND the list of order articles.
     In case no order is found, returns None and [].
+    Only plain requests are used; driver is not needed anymore and only accepted for compatibility.
     """
-    order_id = None
+    order_id = get_last_closed_order_id(session, supplier_id)
+    if order_id is None:
+        return None, []
+    return order_id, get_order_articles(session, order_id)
+
+def get_last_closed_order_id(session, supplier_id):
+    return session.foodsoft_connector.get_last_closed_order_id(supplier_id)
+
+def get_order_articles(session, order_id):
+    connector = session.foodsoft_connector
+    order_csv_url = f"{get_order_url(session, order_id)}.csv"
+    order_csv = connector._get(order_csv_url, connector._default_header).content.decode('iso8859-15') # not the correct decoding, but works
+    start = time.perf_counter()
     order_articles = []
-    driver.get(f"{session.foodsoft_connector._url}suppliers/{str(supplier_id)}") # get list of existing orders
-    for el in driver.find_elements(By.XPATH, "//div[@class='span6'][last()]//tbody/tr"): # get csv of last closed order
-        try:
-            order_balancing_a = el.find_element(By.XPATH, "//td[3]/a")
-        except NoSuchElementException:
-            continue # open orders don't have a link to the balancing menu, so we skip those
-        order_id = order_balancing_a.get_attribute("href").split("=")[-1]
-        csv_rows = list(csv.reader(session.foodsoft_connector._get(f"{get_order_url(session, order_id)}.csv", session.foodsoft_connector._default_header).content.decode('iso8859-15').splitlines(), delimiter=';')) # not the correct decoding, but works
-        for row in csv_rows[1:]:
-            unit_quantity = row[4]
-            if not unit_quantity:
-                unit_quantity = 1
-            order_article = foodsoft_article.OrderArticle(amount=row[0], order_number=row[1], name=row[2], unit=row[3], price_net=str(row[5]).replace(",", "."), total_price=str(row[6]).replace(",", "."), unit_quantity=unit_quantity)
-            order_articles.append(order_article)
-        break
-    return order_id, order_articles
+    for row in list(csv.reader(order_csv.splitlines(), delimiter=';'))[1:]:
+        unit_quantity = row[4]
+        if not unit_quantity:
+            unit_quantity = 1
+        order_article = foodsoft_article.OrderArticle(amount=row[0], order_number=row[1], name=row[2], unit=row[3], price_net=str(row[5]).replace(",", "."), total_price=str(row[6]).replace(",", "."), unit_quantity=unit_quantity)
+        order_articles.append(order_article)
+    connector.request_stats.record_parse("GET", order_csv_url, time.perf_counter() - start)
+    return order_articles
 
 def get_order_url(session, order_id):
     return f"{session.foodsoft_connector._url}orders/{order_id}"
@@ -0,0 +1,103 @@
+"""
+Reuse of logged-in Foodsoft sessions across logins, requests and runs.
+The SessionManager of an instance keeps the cookie jar and user data of each user's session in data/<instance>/.cache/sessions/,
+readable only by the owner of the process. A stored session is reused as long as Foodsoft still accepts it
+(checked with a single request without body, see FSConnector.is_logged_in); only then the user is logged in again.
+"""
+
+import os
+import json
+import base64
+import hashlib
+import secrets
+
+import base
+import foodsoft
+
+PASSWORD_HASH_ITERATIONS = 200000
+
+class SessionManager:
+    def __init__(self, instance, foodsoft_url, max_concurrent_requests=foodsoft.DEFAULT_MAX_CONCURRENT_REQUESTS, cache=None, supplier_cache=None, connector_class=foodsoft.FSConnector, connector_options=None):
+        """
+        connector_class: foodsoft.FSConnector or a subclass, e.g. foodsoft_api.FSApiConnector, created with connector_options as additional arguments
+        """
+        self.instance = instance
+        self.foodsoft_url = foodsoft_url
+        self.max_concurrent_requests = max_concurrent_requests
+        self.cache = cache
+        self.supplier_cache = supplier_cache
+        self.connector_class = connector_class
+        self.connector_options = connector_options or {}
+        self.folder = base.cache_path(instance, "sessions")
+
+    def _session_file(self, user):
+        key = hashlib.sha256(f"{self.foodsoft_url}\n{user}".encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, key + ".json")
+
+    def _read_session(self, user):
+        try:
+            with open(self._session_file(user), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_session(self, user, session):
+        os.makedirs(self.folder, mode=0o700, exist_ok=True)
+        file_path = self._session_file(user)
+        temporary_path = f"{file_path}.{str(os.getpid())}.tmp"
+        # the cookies grant access to Foodsoft, so create the file readable by the owner only
+        descriptor = os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            json.dump(session, f)
+        os.replace(temporary_path, file_path)
+
+    def _hash_password(self, password, salt):
+        return base64.b64encode(hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, PASSWORD_HASH_ITERATIONS)).decode("ascii")
+
+    def _password_matches(self, session, password):
+        salt = base64.b64decode(session["password salt"])
+        return secrets.compare_digest(self._hash_password(password, salt), session["password hash"])
+
+    def _connector(self, user, password=None, cookies=None):
+        return self.connector_class(url=self.foodsoft_url, user=user, password=password, max_concurrent_requests=self.max_concurrent_requests, cache=self.cache.for_user(user) if self.cache else None, cookies=cookies, supplier_cache=self.supplier_cache, **self.connector_options)
+
+    def _restore(self, user, session):
+        connector = self._connector(user, cookies=session["cookies"])
+        connector.import_user_data(session.get("user data", {}))
+        if connector.is_logged_in():
+            return connector
+        return None
+
+    def _store(self, user, connector, password):
+        salt = secrets.token_bytes(16)
+        session = {"password salt": base64.b64encode(salt).decode("ascii"), "password hash": self._hash_password(password, salt)}
+        session["cookies"] = connector.export_cookies()
+        session["user data"] = connector.export_user_data()
+        self._write_session(user, session)
+
+    def login(self, user, password, **user_data_to_add):
+        """
+        Returns a logged-in FSConnector for the user, reusing the stored session if the password matches the one it was created with and Foodsoft still accepts it.
+        Otherwise logs in and, if successful, stores the new session. user_data_to_add: arguments for FSConnector.add_user_data.
+        If the login failed, the connector's _session is None, as with FSConnector.
+        """
+        session = self._read_session(user)
+        if session and self._password_matches(session, password):
+            connector = self._restore(user, session)
+            requested_user_data = dict(first_name=True, last_name=True, **user_data_to_add) # defaults of add_user_data
+            if connector and all(hasattr(connector, key) for key, requested in requested_user_data.items() if requested):
+                return connector
+        connector = self._connector(user, password=password)
+        connector.add_user_data(**user_data_to_add)
+        if connector._session:
+            self._store(user, connector, password=password)
+        return connector
+
+    def forget(self, user):
+        """
+        Drops the stored session of the user, e.g. on logout.
+        """
+        try:
+            os.remove(self._session_file(user))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,143 @@
+"""
+On-disk cache for HTTP responses, used by foodsoft.FSConnector to avoid downloading unchanged pages again.
+Bodies are stored content-addressed (by their SHA-256 hash) in bodies/, so identical pages are stored once;
+the metadata per URL (validators, time of storage, body hash) is stored as JSON in urls/.
+Pages can depend on the permissions of the logged-in user, so the metadata is kept per user (see for_user).
+Each URL belongs to an endpoint class with its own time to live: within it, a cached response is used without asking the server,
+afterwards it is revalidated with If-None-Match / If-Modified-Since and only downloaded again if it changed.
+"""
+
+import os
+import re
+import time
+import json
+import hashlib
+import requests
+from requests.structures import CaseInsensitiveDict
+
+BODY_FOLDER = "bodies"
+URL_FOLDER = "urls"
+
+class ResponseCache:
+    def __init__(self, folder, ttl, endpoint_classes, user=None):
+        """
+        folder: where the cache is stored
+        ttl: {endpoint class: seconds a cached response is used without revalidation}; URLs of classes not in ttl are not cached
+        endpoint_classes: {endpoint class: regex matching the URL paths of the class}, checked in order
+        user: whose responses are cached, responses of other users are not used
+        """
+        self.folder = folder
+        self.ttl = ttl
+        self.user = user
+        self.endpoint_classes = [(endpoint_class, re.compile(pattern)) for endpoint_class, pattern in endpoint_classes.items()]
+        os.makedirs(os.path.join(folder, BODY_FOLDER), exist_ok=True)
+        os.makedirs(os.path.join(folder, URL_FOLDER), exist_ok=True)
+
+    def for_user(self, user):
+        """
+        Returns a cache in the same folder for the responses of the given user. Invalidating it removes the responses of all users.
+        """
+        cache = ResponseCache.__new__(ResponseCache)
+        cache.__dict__.update(self.__dict__)
+        cache.user = user
+        return cache
+
+    def endpoint_class(self, url):
+        for endpoint_class, pattern in self.endpoint_classes:
+            if pattern.search(url):
+                return endpoint_class
+
+    def cacheable(self, url):
+        return self.endpoint_class(url) in self.ttl
+
+    def _metadata_path(self, url):
+        key = url if self.user is None else f"{self.user}\n{url}"
+        return os.path.join(self.folder, URL_FOLDER, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _body_path(self, body_hash):
+        return os.path.join(self.folder, BODY_FOLDER, body_hash)
+
+    def _write_atomically(self, path, content):
+        temporary_path = f"{path}.{str(os.getpid())}.tmp"
+        with open(temporary_path, "wb") as f:
+            f.write(content)
+        os.replace(temporary_path, path)
+
+    def lookup(self, url):
+        """
+        Returns the stored metadata of the URL, or None if there is no (complete) entry.
+        """
+        try:
+            with open(self._metadata_path(url), "r", encoding="utf-8") as f:
+                metadata = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if not os.path.isfile(self._body_path(metadata["body"])):
+            return None
+        return metadata
+
+    def is_fresh(self, url, metadata):
+        return time.time() - metadata["stored at"] < self.ttl.get(self.endpoint_class(url), 0)
+
+    def conditional_headers(self, metadata):
+        headers = {}
+        if metadata.get("etag"):
+            headers["If-None-Match"] = metadata["etag"]
+        if metadata.get("last modified"):
+            headers["If-Modified-Since"] = metadata["last modified"]
+        return headers
+
+    def store(self, url, response):
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        body_path = self._body_path(body_hash)
+        if not os.path.isfile(body_path):
+            self._write_atomically(body_path, response.content)
+        metadata = {
+            "url": url,
+            "body": body_hash,
+            "stored at": time.time(),
+            "etag": response.headers.get("ETag"),
+            "last modified": response.headers.get("Last-Modified"),
+            "content type": response.headers.get("Content-Type"),
+            "encoding": response.encoding,
+        }
+        self._write_atomically(self._metadata_path(url), json.dumps(metadata).encode("utf-8"))
+
+    def refresh(self, url, metadata):
+        """
+        Marks a cached response as fresh again after the server confirmed (304) it is unchanged.
+        """
+        metadata["stored at"] = time.time()
+        self._write_atomically(self._metadata_path(url), json.dumps(metadata).encode("utf-8"))
+
+    def response(self, url, metadata):
+        """
+        Returns the cached response as a requests.Response, as if it had just been downloaded,
+        or None if it was removed in the meantime (e.g. by invalidate in another thread).
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        try:
+            with open(self._body_path(metadata["body"]), "rb") as f:
+                response._content = f.read()
+        except OSError:
+            return None
+        response.encoding = metadata.get("encoding")
+        response.headers = CaseInsensitiveDict()
+        if metadata.get("content type"):
+            response.headers["Content-Type"] = metadata["content type"]
+        response.from_cache = True
+        return response
+
+    def invalidate(self):
+        """
+        Removes all cached responses, e.g. after changes have been posted.
+        """
+        for folder in [URL_FOLDER, BODY_FOLDER]:
+            path = os.path.join(self.folder, folder)
+            for file_name in os.listdir(path):
+                try:
+                    os.remove(os.path.join(path, file_name))
+                except FileNotFoundError:
+                    pass
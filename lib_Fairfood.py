@@ -3,21 +3,20 @@ Script for reading out the webshop from Fairfood Freiburg (screen-scraping) and
 """
 
 from bs4 import BeautifulSoup
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.common.exceptions import NoSuchElementException, ElementNotInteractableException
-from selenium.webdriver.firefox.service import Service as FirefoxService
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.firefox import GeckoDriverManager
 import re
 import time
+import contextlib
 from decimal import *
 import requests
 import tabula
 from subprocess import CalledProcessError
 
 import base
+import browser_pool
 import foodsoft_article
 import foodsoft_article_import
 import foodsoft_article_order
@@ -33,7 +32,11 @@ generate_csv = base.ScriptMethod(name="generate_csv")
 mark_as_imported = base.ScriptMethod(name="mark_as_imported")
 order = base.ScriptMethod(name="order", inputs=[email, password])
 
-class ScriptRun(base.Run):
+product_name_normalizer = base.Normalizer(removals=[" Fairtrade", "Bio ", "Bio-", "fair for life ", "Faires ", "Fairer ", "Faire "], sequential=True)
+
+class ScriptRun(foodsoft_article_import.ArticleImportRun):
+    category_lists = {"categories": False, "ignored_categories": True, "ignored_products": True}
+
     def __init__(self, foodcoop, configuration):
         super().__init__(foodcoop=foodcoop, configuration=configuration)
 
@@ -49,10 +52,10 @@ class ScriptRun(base.Run):
         self.exclude_categories_from_loose_orders = config.get("exclude categories from loose orders", [])
         self.minimum_parcel_grm = config.get("minimum parcel grm", 100)
 
-        self.categories = [] # like "Nüsse", "Nussmus" etc. with Products as subcategories // previously "product types" like "Cashewkerne", which have Products as subcategories (= "item groups" like "Cashewkerne Chili & Paprika")
+        self.categories = base.CategoryList() # like "Nüsse", "Nussmus" etc. with Products as subcategories // previously "product types" like "Cashewkerne", which have Products as subcategories (= "item groups" like "Cashewkerne Chili & Paprika")
         self.articles = [] # the selection of offers loaded into foodsoft
-        self.ignored_categories = []
-        self.ignored_products = []
+        self.ignored_categories = base.CategoryList(ignored=True)
+        self.ignored_products = base.CategoryList(ignored=True)
         self.offers_out_of_stock = []
         self.offers_below_minimum_parcel_grm = []
         self.notifications = [] # notes for the run's info message
@@ -64,14 +67,13 @@ class ScriptRun(base.Run):
         self.original_vat_reduced = original_vat.get_reduced()
         self.original_vat_standard = original_vat.get_standard()
 
-        self.start_driver()
-
-        if email and password:
-            self.login(email=email, password=password)
-            self.read_shop(b2b=True)
+        with self.borrowed_driver():
+            if email and password:
+                self.login(email=email, password=password)
+                self.read_shop(b2b=True)
 
-        if not self.read_B2B_shop_only:
-            self.read_shop() # B2C shop
+            if not self.read_B2B_shop_only:
+                self.read_shop() # B2C shop
 
         for category in self.categories:
             for product in category.subcategories:
@@ -104,8 +106,6 @@ class ScriptRun(base.Run):
                             break
 
         self.articles, self.notifications = foodsoft_article_import.rename_duplicates(locales=session.locales, articles=self.articles, notifications=self.notifications)
-        self.driver.quit()
-        self.driver = None
 
         self.log.append(base.LogEntry(action="webshop read", done_by=base.full_user_name(session)))
         self.next_possible_methods = [generate_csv]
@@ -131,7 +131,7 @@ class ScriptRun(base.Run):
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Zusammenfassung"), content=message)
 
         self.log.append(base.LogEntry(action="CSV generated", done_by=base.full_user_name(session)))
-        self.next_possible_methods = [mark_as_imported]
+        self.next_possible_methods = foodsoft_article_import.upload_methods(self.supplier_id) + [mark_as_imported]
         self.completion_percentage = 67
 
     def mark_as_imported(self, session):
@@ -149,69 +149,68 @@ class ScriptRun(base.Run):
         self.articles_not_available = []
         self.failed_articles = []
         self.notifications = [] # notes for the run's info message
+        self.driver = None
 
-        self.driver = session.foodsoft_connector.open_driver()
-        order_id, order_articles = foodsoft_article_order.get_order_id_and_articles(session=session, driver=self.driver, supplier_id=self.supplier_id)
+        order_id, order_articles = foodsoft_article_order.get_order_id_and_articles(session=session, supplier_id=self.supplier_id)
 
         if order_articles:
-            if email and password:
-                self.login(email=email, password=password)
-                time.sleep(1)
-                self.accept_cookies()
-                time.sleep(1)
-            for oa in order_articles:
-                order_number_strings = oa.order_number.split("_")
-                shop = order_number_strings[0]
-                number = order_number_strings[1].split("_v")[0] # cut off at version delimiter
-                article_link = self.get_article_link(number, shop)
-                if shop == "b2b":
-                    # self.notifications.append(f"Ordering {str(oa.amount)}x {article_link}")
-                    self.driver.get(article_link)
-                time.sleep(1)
-                if self.get_offer_number() == number:
-                    if shop == "b2c":
-                        self.notifications.append(f"B2B offer found for B2C order article {self.oa_str(number, oa.name, oa.unit_quantity, oa.unit)}: {str(oa.amount)}x {article_link}")
-                    try:
-                        amount_input = self.get_amount_input_field()
-                    except NoSuchElementException:
-                        self.articles_not_available.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
-                        continue
-                    if oa.amount != '1':
-                        amount_input.clear()
-                        amount_input.send_keys(str(oa.amount))
+            with self.borrowed_driver(): # only needed for the webshop
+                if email and password:
+                    self.login(email=email, password=password)
                     time.sleep(1)
-                    name, orig_name, orig_unit = self.parse_product_name()
-                    buy_button = self.driver.find_element(By.XPATH, "//button[@class='btn btn-primary btn-buy']")
-                    self.driver.execute_script("arguments[0].scrollIntoView();", buy_button)
+                    self.accept_cookies()
                     time.sleep(1)
-                    try:
-                        buy_button.click()
-                    except ElementNotInteractableException:
-                        self.failed_articles.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
-                        continue
-                    time.sleep(1)
-                    self.articles_put_in_cart.append(self.ordered_article_str(oa.amount, orig_name))
-                elif shop == "b2c":
-                    self.driver.get(article_link)
+                for oa in order_articles:
+                    order_number_strings = oa.order_number.split("_")
+                    shop = order_number_strings[0]
+                    number = order_number_strings[1].split("_v")[0] # cut off at version delimiter
+                    article_link = self.get_article_link(number, shop)
+                    if shop == "b2b":
+                        # self.notifications.append(f"Ordering {str(oa.amount)}x {article_link}")
+                        self.driver.get(article_link)
                     time.sleep(1)
                     if self.get_offer_number() == number:
-                        name, orig_name, orig_unit = self.parse_product_name()
+                        if shop == "b2c":
+                            self.notifications.append(f"B2B offer found for B2C order article {self.oa_str(number, oa.name, oa.unit_quantity, oa.unit)}: {str(oa.amount)}x {article_link}")
                         try:
                             amount_input = self.get_amount_input_field()
                         except NoSuchElementException:
                             self.articles_not_available.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
                             continue
-                        self.articles_to_order_manually.append(self.ordered_article_str(oa.amount, orig_name))
+                        if oa.amount != '1':
+                            amount_input.clear()
+                            amount_input.send_keys(str(oa.amount))
+                        time.sleep(1)
+                        name, orig_name, orig_unit = self.parse_product_name()
+                        buy_button = self.driver.find_element(By.XPATH, "//button[@class='btn btn-primary btn-buy']")
+                        self.driver.execute_script("arguments[0].scrollIntoView();", buy_button)
+                        time.sleep(1)
+                        try:
+                            buy_button.click()
+                        except ElementNotInteractableException:
+                            self.failed_articles.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
+                            continue
+                        time.sleep(1)
+                        self.articles_put_in_cart.append(self.ordered_article_str(oa.amount, orig_name))
+                    elif shop == "b2c":
+                        self.driver.get(article_link)
+                        time.sleep(1)
+                        if self.get_offer_number() == number:
+                            name, orig_name, orig_unit = self.parse_product_name()
+                            try:
+                                amount_input = self.get_amount_input_field()
+                            except NoSuchElementException:
+                                self.articles_not_available.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
+                                continue
+                            self.articles_to_order_manually.append(self.ordered_article_str(oa.amount, orig_name))
+                        else:
+                            self.failed_articles.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
                     else:
                         self.failed_articles.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
-                else:
-                    self.failed_articles.append(self.failed_oa_str(oa.amount, number, oa.name, oa.unit_quantity, oa.unit))
 
         order_manually_prefix = "Hallo,\n\nzu unserer ebenso abgesendeten B2B-Bestellung bitte folgende Artikel zu B2C-Konditionen anfügen:"
         message = foodsoft_article_order.compose_order_message(session=session, order_id=order_id, articles_put_in_cart=self.articles_put_in_cart, articles_to_order_manually=self.articles_to_order_manually, order_manually_prefix=order_manually_prefix, articles_not_available=self.articles_not_available, failed_articles=self.failed_articles, notifications=self.notifications, prefix=config.get("message prefix", ""))
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Zusammenfassung"), content=message)
-        self.driver.quit()
-        self.driver = None
 
         self.log.append(base.LogEntry(action="order processed", done_by=base.full_user_name(session)))
         self.next_possible_methods = []
@@ -243,8 +242,15 @@ class ScriptRun(base.Run):
             detail = "detail/"
         return f"https://{shop}.fairfood.bio/{detail}{number}"
 
-    def start_driver(self):
-        self.driver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()))
+    @contextlib.contextmanager
+    def borrowed_driver(self):
+        # borrows a browser as self.driver for the block, and returns it to the pool even if the block fails
+        self.driver = browser_pool.firefox().checkout()
+        try:
+            yield self.driver
+        finally:
+            browser_pool.firefox().checkin(self.driver, origins=["https://fairfood.bio", "https://b2b.fairfood.bio", "https://b2c.fairfood.bio"]) # logged in to the B2B shop possibly
+            self.driver = None
 
     def login(self, email, password):
         self.driver.get("https://b2b.fairfood.bio/account/login")
@@ -274,19 +280,16 @@ class ScriptRun(base.Run):
         self.accept_cookies()
         category_links = BeautifulSoup(self.driver.page_source, features="html.parser").body.find(class_="nav main-navigation-menu").find_all("a")
         for cl in category_links:
-            current_category = None
             category_name = cl.get("title")
-            for c in self.categories:
-                if c.name == category_name:
-                    current_category = c
+            current_category = self.categories.find(name=category_name) or self.ignored_categories.find(name=category_name)
             if not current_category:
                 current_category = base.Category(name=category_name)
                 if base.equal_strings_check(list1=[category_name], list2=self.categories_to_ignore_exact, case_sensitive=True, strip=False) or base.containing_strings_check(list1=[category_name], list2=self.categories_to_ignore_containing, case_sensitive=False, strip=False):
-                    if category_name not in [c.name for c in self.ignored_categories]:
-                        self.ignored_categories.append(current_category)
-                    continue
+                    self.ignored_categories.append(current_category)
                 else:
                     self.categories.append(current_category)
+            if current_category.ignored:
+                continue
             page = 0
             products_found = True
             while products_found:
@@ -310,10 +313,9 @@ class ScriptRun(base.Run):
                             parent_id = self.driver.find_element(By.XPATH, "//form[@class='review-filter-form']").get_attribute('action').split("parentId=")[-1]
                         except NoSuchElementException:
                             parent_id = self.driver.find_element(By.XPATH, "//form[@class='product-detail-review-language-form']").get_attribute('action').split("parentId=")[-1]
-                    current_product = None
-                    for p in current_category.subcategories:
-                        if p.number == parent_id:
-                            current_product = p
+                    if self.ignored_products.find(number=parent_id):
+                        continue
+                    current_product = current_category.subcategories.find(number=parent_id)
                     name, orig_name, orig_unit = self.parse_product_name()
                     if not current_product:
                         origin = ""
@@ -348,8 +350,7 @@ class ScriptRun(base.Run):
                             ingredients = ""
                         current_product = Product(number=parent_id, name=name, origin=origin, ingredients=ingredients)
                         if base.equal_strings_check(list1=[orig_name, name], list2=self.products_to_ignore_exact, case_sensitive=True, strip=False) or base.containing_strings_check(list1=[orig_name, name], list2=self.products_to_ignore_containing, case_sensitive=False, strip=False):
-                            if parent_id not in [ip.number for ip in self.ignored_products]:
-                                self.ignored_products.append(current_product)
+                            self.ignored_products.append(current_product)
                             continue
                         else:
                             current_category.subcategories.append(current_product)
@@ -382,7 +383,7 @@ class ScriptRun(base.Run):
 
     def parse_product_name(self):
         orig_name = self.driver.find_element(By.XPATH, "//h1[@class='product-detail-name']").text
-        name = orig_name.replace(" Fairtrade", "").replace("Bio ", "").replace("Bio-", "").replace("fair for life ", "").replace("Faires ", "").replace("Fairer ", "").replace("Faire ", "")
+        name = product_name_normalizer(orig_name)
         if unit_match := re.search(r"\d*x?\d+(?:,\d+)?\s?k?g", name):
             orig_unit = unit_match.group(0)
             name = name.replace(orig_unit, "").strip()
@@ -0,0 +1,194 @@
+"""
+Statistics of the requests foodsoft.FSConnector sends, per endpoint pattern (e.g. "GET suppliers/{id}/edit"):
+number of requests, bytes received, wall time (total and as histogram), retries, status codes, cache hits and time spent parsing the pages.
+They show whether a slow script run waits for Foodsoft, parses pages or spends its time elsewhere.
+
+    with foodsoft_connector.request_stats.recording() as stats:
+        ... # everything the connector requests meanwhile is also recorded in stats
+    print(stats.summary())
+"""
+
+import re
+import threading
+import contextlib
+from collections import Counter
+from urllib.parse import urlsplit
+
+HISTOGRAM_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30] # upper bounds of the wall time buckets in seconds; slower requests are counted in a last bucket
+ID_PATTERN = re.compile(r"(?<=/)\d+(?=[/.]|$)")
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.bytes = 0
+        self.wall_time = 0
+        self.parse_time = 0
+        self.retries = 0
+        self.cache_hits = 0
+        self.status_codes = Counter() # {status code or error: number of requests}
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+
+    def add_wall_time(self, seconds):
+        self.wall_time += seconds
+        bucket = 0
+        while bucket < len(HISTOGRAM_BUCKETS) and seconds > HISTOGRAM_BUCKETS[bucket]:
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def merge(self, other):
+        self.count += other.count
+        self.bytes += other.bytes
+        self.wall_time += other.wall_time
+        self.parse_time += other.parse_time
+        self.retries += other.retries
+        self.cache_hits += other.cache_hits
+        self.status_codes.update(other.status_codes)
+        self.histogram = [a + b for a, b in zip(self.histogram, other.histogram)]
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the histogram bucket containing the given fraction of the requests (None: slower than the last bound).
+        """
+        requests = sum(self.histogram)
+        if not requests:
+            return 0
+        cumulated = 0
+        for bucket, number in enumerate(self.histogram):
+            cumulated += number
+            if cumulated >= fraction * requests:
+                return HISTOGRAM_BUCKETS[bucket] if bucket < len(HISTOGRAM_BUCKETS) else None
+
+    def as_dict(self):
+        return {"count": self.count, "bytes": self.bytes, "wall time": self.wall_time, "parse time": self.parse_time, "retries": self.retries, "cache hits": self.cache_hits, "status codes": {str(status): number for status, number in self.status_codes.items()}, "histogram": list(self.histogram)}
+
+    @classmethod
+    def from_dict(cls, data):
+        endpoint_stats = cls()
+        endpoint_stats.count = data["count"]
+        endpoint_stats.bytes = data["bytes"]
+        endpoint_stats.wall_time = data["wall time"]
+        endpoint_stats.parse_time = data["parse time"]
+        endpoint_stats.retries = data["retries"]
+        endpoint_stats.cache_hits = data["cache hits"]
+        endpoint_stats.status_codes = Counter(data["status codes"])
+        endpoint_stats.histogram = list(data["histogram"])
+        return endpoint_stats
+
+class RequestStats:
+    def __init__(self, base_url=""):
+        """
+        base_url: URL of the Foodsoft instance, left out of the endpoint patterns
+        """
+        self.base_url = base_url
+        self.endpoints = {} # {endpoint pattern: EndpointStats}
+        self._recordings = [] # RequestStats objects of active recording() blocks
+        self._lock = threading.Lock()
+
+    def endpoint(self, method, url):
+        """
+        Returns the endpoint pattern of a request, with numeric IDs replaced by {id} and without query.
+        """
+        path = urlsplit(url).path
+        base_path = urlsplit(self.base_url).path
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        return f"{method} {ID_PATTERN.sub('{id}', path.strip('/')) or '/'}"
+
+    def _update(self, method, url, update):
+        endpoint = self.endpoint(method, url)
+        with self._lock:
+            for stats in [self] + self._recordings:
+                update(stats.endpoints.setdefault(endpoint, EndpointStats()))
+
+    def record_request(self, method, url, status, seconds, size=0, retries=0):
+        """
+        Records a request including its retries. status: the status code of the last response, or a description of the error.
+        """
+        def update(endpoint_stats):
+            endpoint_stats.count += 1
+            endpoint_stats.bytes += size
+            endpoint_stats.retries += retries
+            endpoint_stats.status_codes[str(status)] += 1
+            endpoint_stats.add_wall_time(seconds)
+        self._update(method, url, update)
+
+    def record_stream(self, method, url, seconds, size):
+        """
+        Adds the time and bytes of reading a streamed response body, which are not known yet when the request is recorded.
+        Only add the time spent waiting for the body here, the time of parsing it while it is read belongs to record_parse.
+        """
+        def update(endpoint_stats):
+            endpoint_stats.wall_time += seconds
+            endpoint_stats.bytes += size
+        self._update(method, url, update)
+
+    def record_parse(self, method, url, seconds):
+        def update(endpoint_stats):
+            endpoint_stats.parse_time += seconds
+        self._update(method, url, update)
+
+    def record_cache_hit(self, method, url, size=0):
+        def update(endpoint_stats):
+            endpoint_stats.cache_hits += 1
+            endpoint_stats.bytes += size
+        self._update(method, url, update)
+
+    @contextlib.contextmanager
+    def recording(self):
+        """
+        Yields a new RequestStats which additionally records everything recorded in this one until the block is left.
+        """
+        stats = RequestStats(base_url=self.base_url)
+        with self._lock:
+            self._recordings.append(stats)
+        try:
+            yield stats
+        finally:
+            with self._lock:
+                self._recordings.remove(stats)
+
+    def merge(self, other):
+        with self._lock:
+            for endpoint, endpoint_stats in other.endpoints.items():
+                self.endpoints.setdefault(endpoint, EndpointStats()).merge(endpoint_stats)
+
+    def totals(self):
+        total = EndpointStats()
+        with self._lock:
+            for endpoint_stats in self.endpoints.values():
+                total.merge(endpoint_stats)
+        return total
+
+    def as_dict(self):
+        with self._lock:
+            return {endpoint: endpoint_stats.as_dict() for endpoint, endpoint_stats in self.endpoints.items()}
+
+    @classmethod
+    def from_dict(cls, data, base_url=""):
+        stats = cls(base_url=base_url)
+        stats.endpoints = {endpoint: EndpointStats.from_dict(endpoint_data) for endpoint, endpoint_data in data.items()}
+        return stats
+
+    def summary(self):
+        """
+        Returns a text with one line per endpoint pattern, slowest first, and the totals.
+        """
+        def bound(endpoint_stats, fraction):
+            seconds = endpoint_stats.percentile(fraction)
+            return f"≤ {str(seconds)} s" if seconds is not None else f"> {str(HISTOGRAM_BUCKETS[-1])} s"
+
+        def describe(name, endpoint_stats):
+            text = f"{name}: {str(endpoint_stats.count)} requests, {endpoint_stats.bytes / 1024:.0f} KiB, {endpoint_stats.wall_time:.2f} s waiting for Foodsoft"
+            text += f" (median {bound(endpoint_stats, 0.5)}, 95 % {bound(endpoint_stats, 0.95)}), {endpoint_stats.parse_time:.2f} s parsing"
+            if endpoint_stats.retries:
+                text += f", {str(endpoint_stats.retries)} retries"
+            if endpoint_stats.cache_hits:
+                text += f", {str(endpoint_stats.cache_hits)} from cache"
+            if endpoint_stats.status_codes:
+                text += ", status: " + ", ".join(f"{status} × {str(number)}" for status, number in sorted(endpoint_stats.status_codes.items()))
+            return text
+        with self._lock:
+            endpoints = sorted(self.endpoints.items(), key=lambda item: item[1].wall_time + item[1].parse_time, reverse=True)
+        lines = [describe(endpoint, endpoint_stats) for endpoint, endpoint_stats in endpoints]
+        lines.append(describe("total", self.totals()))
+        return "\n".join(lines)
@@ -46,7 +46,9 @@ def config_variables(): # List of the special config variables this script uses,
         base.Variable(name="article details rest", required=False, example={"origin": "unbekannt", "manufacturer": "unbekannt"})
         ]
 
-class ScriptRun(base.Run):
+class ScriptRun(foodsoft_article_import.ArticleImportRun):
+    category_lists = {"categories": False, "ignored_categories": True}
+
     def __init__(self, foodcoop, configuration):
         super().__init__(foodcoop=foodcoop, configuration=configuration)
         self.next_possible_methods = [convert_price_list]
@@ -61,6 +63,7 @@ class ScriptRun(base.Run):
         articles_without_price = config.get("articles without price", [])
         strings_to_remove_in_names = config.get("strings to remove in names", [])
         strings_to_keep_in_names = config.get("strings to keep in names", []) # TODO: move in article note?
+        name_normalizer = base.Normalizer(removals=[string for string in strings_to_remove_in_names if not [string_to_keep for string_to_keep in strings_to_keep_in_names if string in string_to_keep]], sequential=True) # in the configured order
         mispelled_units = config.get("mispelled units", {})
         articles_to_ignore_exact = config.get("ignore articles by name (exact, case-sensitive)", [])
         articles_to_ignore_containing = config.get("ignore articles by name (containing, case-insensitive)", [])
@@ -95,11 +98,12 @@ class ScriptRun(base.Run):
                 left_table = True
 
         self.articles = []
-        self.categories = []
-        self.ignored_categories = []
+        self.categories = base.CategoryList()
+        self.ignored_categories = base.CategoryList(ignored=True)
         self.ignored_articles = []
         self.notifications = []
         current_category = None
+        schokolade_category = None # the first chocolate category which isn't vegan, to return to after the vegan ones
         pasta_column1 = "Weizen"
         pasta_column2 = "Dinkel"
         prefix_delimiter = "_"
@@ -109,9 +113,8 @@ class ScriptRun(base.Run):
                 if not row[0]:
                     if "vegan" in current_category.name.casefold() and len(self.categories) > 1:
                         old_category_name = current_category.name
-                        schokolade_categories = [cat for cat in self.categories if "schokolade" in cat.name.casefold() and not "vegan" in cat.name.casefold()]
-                        if schokolade_categories:
-                            current_category = schokolade_categories[0]
+                        if schokolade_category:
+                            current_category = schokolade_category
                             print(f"Springe von {old_category_name} zurück zu {current_category.name}")
                         else:
                             current_category = base.Category(name="Schokolade")
@@ -142,9 +145,11 @@ class ScriptRun(base.Run):
                             if "GEMÜSE - " in category.name:
                                 category.name = "Obst & Gemüse"
                             self.categories.append(category)
+                            if not schokolade_category and "schokolade" in category.name.casefold() and not "vegan" in category.name.casefold():
+                                schokolade_category = category
                         current_category = category
                     else:
-                        if current_category in self.ignored_categories:
+                        if current_category.ignored:
                             continue
                         prices = []
                         for price_content in price_contents:
@@ -191,14 +196,7 @@ class ScriptRun(base.Run):
                                         unit = category_unit_regex_match.group(0)
                                         current_category.name = current_category.name.replace(category_unit_regex_match.group(0), "")
                                     name = f"{current_category.name} 100 %"
-                                for string in strings_to_remove_in_names:
-                                    remove_string = True
-                                    for string_to_keep in strings_to_keep_in_names:
-                                        if string in string_to_keep:
-                                            remove_string = False
-                                            break
-                                    if remove_string:
-                                        name = name.replace(string, "")
+                                name = name_normalizer(name)
                                 for piece_unit_string in piece_unit_strings:
                                     if name.casefold().endswith(piece_unit_string.casefold()):
                                         unit = piece_unit_string
@@ -235,7 +233,7 @@ class ScriptRun(base.Run):
                                         self.notifications.append(f"Keine Einheit für '{name}' gefunden, verwende Einheit {unit}.")
                                 if current_category.name == "Äpfel":
                                     if apfel_matches := base.containing_strings_check([name], ["birne", "traube", "pfirsich", "nektarine", "quitte", "zwets"]):
-                                        current_category = [c for c in self.categories if c.name == "Obst & Gemüse"][0]
+                                        current_category = self.categories.find(name="Obst & Gemüse")
                                     else:
                                         name = f"Äpfel {name}"
                                 while name.endswith(".") or name.endswith(","):
@@ -391,7 +389,7 @@ class ScriptRun(base.Run):
         message = foodsoft_article_import.compose_articles_csv_message(locales=session.locales, supplier=self.configuration, foodsoft_url=session.settings.get('foodsoft_url'), supplier_id=supplier_id, categories=self.categories, ignored_categories=self.ignored_categories, ignored_articles=self.ignored_articles, notifications=self.notifications, prefix=message_prefix)
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Zusammenfassung"), content=message)
 
-        self.next_possible_methods = [mark_as_imported]
+        self.next_possible_methods = foodsoft_article_import.upload_methods(supplier_id) + [mark_as_imported]
         self.completion_percentage = 80
         self.log.append(base.LogEntry(action="price list converted", done_by=base.full_user_name(session)))
 
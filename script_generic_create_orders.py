@@ -6,11 +6,8 @@ import importlib
 import datetime
 import time
 import babel.dates
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.firefox import GeckoDriverManager
 
 import base
 import foodsoft_article
@@ -98,9 +95,9 @@ class ScriptRun(base.Run):
         else:
             end_action = "no_end_action"
 
-        driver = session.foodsoft_connector.open_driver()
-        driver.get(f"{session.foodsoft_connector._url}suppliers/{str(self.supplier_id)}") # get list of existing orders
-        date_time = driver.find_element(By.XPATH, "//div[@class='span6'][last()]//tbody/tr/td[2]").text
+        with session.foodsoft_connector.borrowed_driver() as driver:
+            driver.get(f"{session.foodsoft_connector._url}suppliers/{str(self.supplier_id)}") # get list of existing orders
+            date_time = driver.find_element(By.XPATH, "//div[@class='span6'][last()]//tbody/tr/td[2]").text
         last_order_end = get_datetime(date_time)
 
         end, last_weekday_index = get_next_end(last_end=last_order_end, min_interval=min_interval, end_weekday_numbers=end_weekday_numbers)
@@ -125,60 +122,56 @@ class ScriptRun(base.Run):
         message = compose_order_str(message="Folgende Bestellungen werden angelegt:", orders=self.orders_to_create, locale=session.locale)
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Bestellungen"), content=message)
 
-        driver.close()
-
         self.next_possible_methods = [create_prepared_orders]
         self.completion_percentage = 20
         self.log.append(base.LogEntry(action="orders prepared", done_by=base.full_user_name(session)))
 
     def create_prepared_orders(self, session, message_subject_suffix="", message_extra_content=""):
         config = base.read_config(self.foodcoop, self.configuration)
-        driver = session.foodsoft_connector.open_driver()
-        self.created_orders = []
-
-        for order in self.orders_to_create:
-            order.create(driver=driver, session=session)
-            self.created_orders.append(order)
-
-        if config.get("send message"):
-            message_variables = {
-                "number of orders": str(len(self.created_orders)),
-                "first order start": self.created_orders[0].start_str(session.locale),
-                "first order end": self.created_orders[0].end_str(session.locale),
-                "first order pickup": self.created_orders[0].pickup_str(session.locale),
-                "last order start": self.created_orders[-1].start_str(session.locale),
-                "last order end": self.created_orders[-1].end_str(session.locale),
-                "last order pickup": self.created_orders[-1].pickup_str(session.locale)
-            }
-
-            subject = config.get("message subject", "")
-            if subject and message_subject_suffix:
-                subject += " "
-            subject += message_subject_suffix
-            subject = subject.format(**message_variables)
-            content = config.get("message content top", "")
-            if content:
-                content += "\n\n"
-            if message_extra_content:
-                content += message_extra_content
-            bottom_content = config.get("message content bottom", "")
-            if bottom_content:
-                if message_extra_content:
+        with session.foodsoft_connector.borrowed_driver() as driver:
+            self.created_orders = []
+
+            for order in self.orders_to_create:
+                order.create(driver=driver, session=session)
+                self.created_orders.append(order)
+
+            if config.get("send message"):
+                message_variables = {
+                    "number of orders": str(len(self.created_orders)),
+                    "first order start": self.created_orders[0].start_str(session.locale),
+                    "first order end": self.created_orders[0].end_str(session.locale),
+                    "first order pickup": self.created_orders[0].pickup_str(session.locale),
+                    "last order start": self.created_orders[-1].start_str(session.locale),
+                    "last order end": self.created_orders[-1].end_str(session.locale),
+                    "last order pickup": self.created_orders[-1].pickup_str(session.locale)
+                }
+
+                subject = config.get("message subject", "")
+                if subject and message_subject_suffix:
+                    subject += " "
+                subject += message_subject_suffix
+                subject = subject.format(**message_variables)
+                content = config.get("message content top", "")
+                if content:
                     content += "\n\n"
-                content += bottom_content
-            content = content.format(**message_variables)
-            if subject and content:
-                driver.get(session.foodsoft_connector._url + "messages/new")
-                driver.find_element(By.XPATH, "//input[@id='message_send_method_all']").click()
-                driver.find_element(By.ID, "message_subject").send_keys(subject)
-                driver.find_element(By.ID, "message_body").send_keys(content)
-                driver.find_element(By.XPATH, "//input[@name='commit']").click()
+                if message_extra_content:
+                    content += message_extra_content
+                bottom_content = config.get("message content bottom", "")
+                if bottom_content:
+                    if message_extra_content:
+                        content += "\n\n"
+                    content += bottom_content
+                content = content.format(**message_variables)
+                if subject and content:
+                    driver.get(session.foodsoft_connector._url + "messages/new")
+                    driver.find_element(By.XPATH, "//input[@id='message_send_method_all']").click()
+                    driver.find_element(By.ID, "message_subject").send_keys(subject)
+                    driver.find_element(By.ID, "message_body").send_keys(content)
+                    driver.find_element(By.XPATH, "//input[@name='commit']").click()
 
         message = compose_order_str(message="Folgende Bestellungen wurden angelegt:", orders=self.created_orders, locale=session.locale)
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Bestellungen"), content=message)
 
-        driver.close()
-
         self.next_possible_methods = []
         self.completion_percentage = 100
         self.log.append(base.LogEntry(action="orders created", done_by=base.full_user_name(session)))
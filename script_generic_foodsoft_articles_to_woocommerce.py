@@ -100,7 +100,7 @@ class ScriptRun(base.Run):
         unit_suffix_when_unit_quantity_greater_than_1 = config.get("unit suffix when unit quantity greater than 1", "")
 
         suppliers = session.foodsoft_connector.get_supplier_data(name_fields=name_fields, origin_fields=origin_fields, category_fields=category_fields, additional_fields=additional_supplier_fields, exclude_categories=exclude_categories)
-        self.article_categories = session.foodsoft_connector.get_article_categories()
+        self.article_categories = session.foodsoft_connector.get_article_categories(keywords=bool(config.get("resort stock articles into categories")))
 
         self.products = []
         self.product_categories = []
@@ -30,7 +30,7 @@ def config_variables(): # List of the special config variables this script uses,
         # base.Variable(name="strings to replace in article name", required=False, example={"Zwetschen": "Zwetschken", "250g": "", "*": ""})
         ]
 
-class ScriptRun(base.Run):
+class ScriptRun(foodsoft_article_import.ArticleImportRun):
     def __init__(self, foodcoop, configuration):
         super().__init__(foodcoop=foodcoop, configuration=configuration)
         self.next_possible_methods = [convert_price_list]
@@ -105,7 +105,7 @@ class ScriptRun(base.Run):
         message = foodsoft_article_import.compose_articles_csv_message(locales=session.locales, supplier=self.configuration, foodsoft_url=session.settings.get('foodsoft_url'), supplier_id=supplier_id, categories=self.categories, ignored_categories=self.ignored_categories, ignored_articles=self.ignored_articles, notifications=self.notifications, prefix=message_prefix)
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Zusammenfassung"), content=message)
 
-        self.next_possible_methods = [mark_as_imported]
+        self.next_possible_methods = foodsoft_article_import.upload_methods(supplier_id) + [mark_as_imported]
         self.completion_percentage = 80
         self.log.append(base.LogEntry(action="price list converted", done_by=base.full_user_name(session)))
 
@@ -30,7 +30,7 @@ def config_variables(): # List of the special config variables this script uses,
         base.Variable(name="recalculate units", required=False, example={"Obst & Gemüse": {"categories": ["Obst & Gemüse"], "original units": ["kg", "1kg", "1 kg"], "replacement units": {"500g": 0.5}}, "Äpfel": {"categories": ["Äpfel"], "original units": ["kg", "1kg", "1 kg"], "replacement units": {"500g": 0.5}}})
         ]
 
-class ScriptRun(base.Run):
+class ScriptRun(foodsoft_article_import.ArticleImportRun):
     def __init__(self, foodcoop, configuration):
         super().__init__(foodcoop=foodcoop, configuration=configuration)
         self.next_possible_methods = [convert_price_list]
@@ -116,7 +116,7 @@ class ScriptRun(base.Run):
         message = foodsoft_article_import.compose_articles_csv_message(locales=session.locales, supplier=self.configuration, foodsoft_url=session.settings.get('foodsoft_url'), supplier_id=supplier_id, categories=self.categories, ignored_categories=self.ignored_categories, ignored_articles=self.ignored_articles, notifications=self.notifications, prefix=message_prefix)
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Zusammenfassung"), content=message)
 
-        self.next_possible_methods = [mark_as_imported]
+        self.next_possible_methods = foodsoft_article_import.upload_methods(supplier_id) + [mark_as_imported]
         self.completion_percentage = 80
         self.log.append(base.LogEntry(action="price list converted", done_by=base.full_user_name(session)))
 
@@ -8,7 +8,6 @@ Hanföl kaltgepresst: gleiches Produkt 2x eingetragen
 import importlib
 from bs4 import BeautifulSoup
 import requests
-import undetected_chromedriver as uc
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import Select
@@ -23,6 +22,7 @@ import re
 import time
 
 import base
+import browser_pool
 import foodsoft_article
 import foodsoft_article_import
 
@@ -46,7 +46,11 @@ def config_variables(): # List of the special config variables this script uses,
         base.Variable(name="create loose offers", required=False, example={"all products": {"split amounts from": 5, "split amount into": 0.5}}) # of each product, the offer with the smallest amount >= 5 will be split into units of 0.5 (e.g. kg) and corresponding unit_quantity. Larger offers of the same product will be ignored. TODO: Filter for categories and/or articles
         ]
 
-class ScriptRun(base.Run):
+product_name_normalizer = base.Normalizer(removals=["bio ", "Bio ", " 100% 🇦🇹"], sequential=True)
+
+class ScriptRun(foodsoft_article_import.ArticleImportRun):
+    category_lists = {"categories": False, "ignored_categories": True}
+
     def __init__(self, foodcoop, configuration):
         super().__init__(foodcoop=foodcoop, configuration=configuration)
         self.next_possible_methods = [read_webshop]
@@ -62,91 +66,86 @@ class ScriptRun(base.Run):
         create_loose_offers = config.get("create loose offers", {})
 
         self.articles = []
-        self.categories = []
+        self.categories = base.CategoryList()
         self.ignored_articles = []
-        self.ignored_categories = []
+        self.ignored_categories = base.CategoryList(ignored=True)
         self.notifications = []
         base_url = "https://www.biohofmuellner.at"
 
-        driver = uc.Chrome()
-        driver.get(base_url + "/shop")
-        ignored_exceptions = (NoSuchElementException,StaleElementReferenceException,)
-        accept_cookies = WebDriverWait(driver, 20, ignored_exceptions=ignored_exceptions).until(EC.element_to_be_clickable((By.XPATH, "//div[@data-gi-selector='accept-all-cookies']/a")))
-        accept_cookies.click()
-        time.sleep(2)
-        product_links = BeautifulSoup(driver.page_source, features="html.parser").body.find(id="8f0075a4-a2ad-4ab3-8acc-3918472d6d04").find_all("a")
-        for product_link in product_links:
-            driver.get(base_url + product_link.get("href"))
-            time.sleep(1)
-            product_page = BeautifulSoup(driver.page_source, features="html.parser").body
-            product_data = product_page.find("div", {"data-gi-selector": "product-page"})
-            info = product_data.find("div")
-            orig_name = info.find("h1").text.replace("bio ", "").replace("Bio ", "").replace(" 100% 🇦🇹", "")
-            description = info.find("p").get_text()
-            category_name = product_page.find("section").find("ul").find_all("li")[1].get_text() # driver.find_element(By.XPATH, "//section/ul/li[2]/p/a/span").text
-            category_name = foodsoft_article_import.resort_articles_in_categories(article_name=orig_name, category_name=category_name, resort_articles_in_categories=resort_articles_in_categories)
-            category_found = False
-            for c in self.categories + self.ignored_categories:
-                if c.name == category_name:
-                    cat = c
-                    category_found = True
-                    break
-            if not category_found:
-                cat = base.Category(name=category_name)
-                if base.equal_strings_check(list1=[category_name], list2=categories_to_ignore_exact, case_sensitive=True, strip=False) or base.containing_strings_check(list1=[category_name], list2=categories_to_ignore_containing, case_sensitive=False, strip=False):
-                    self.ignored_categories.append(cat)
-                    continue
-                else:
-                    self.categories.append(cat)
-            elif cat in self.ignored_categories:
-                continue
-            product = base.Category(name=orig_name)
-            product.articles = []
-            product.open = True
-            cat.subcategories.append(product)
-
-            price_data = product_data.find_all("div", recursive=False)[-1]
-            select_box_bs = price_data.find("select")
-            if select_box_bs:
-                options = select_box_bs.find_all("option")
-                for option in options:
-                    if option.has_attr("hidden") or option.has_attr("disabled"):
+        with browser_pool.undetected_chrome().borrow(origins=[base_url]) as driver: # the shop blocks browsers which are recognizable as automated
+            driver.get(base_url + "/shop")
+            ignored_exceptions = (NoSuchElementException,StaleElementReferenceException,)
+            accept_cookies = WebDriverWait(driver, 20, ignored_exceptions=ignored_exceptions).until(EC.element_to_be_clickable((By.XPATH, "//div[@data-gi-selector='accept-all-cookies']/a")))
+            accept_cookies.click()
+            time.sleep(2)
+            product_links = BeautifulSoup(driver.page_source, features="html.parser").body.find(id="8f0075a4-a2ad-4ab3-8acc-3918472d6d04").find_all("a")
+            for product_link in product_links:
+                driver.get(base_url + product_link.get("href"))
+                time.sleep(1)
+                product_page = BeautifulSoup(driver.page_source, features="html.parser").body
+                product_data = product_page.find("div", {"data-gi-selector": "product-page"})
+                info = product_data.find("div")
+                orig_name = product_name_normalizer(info.find("h1").text)
+                description = info.find("p").get_text()
+                category_name = product_page.find("section").find("ul").find_all("li")[1].get_text() # driver.find_element(By.XPATH, "//section/ul/li[2]/p/a/span").text
+                category_name = foodsoft_article_import.resort_articles_in_categories(article_name=orig_name, category_name=category_name, resort_articles_in_categories=resort_articles_in_categories)
+                cat = self.categories.find(name=category_name) or self.ignored_categories.find(name=category_name)
+                if not cat:
+                    cat = base.Category(name=category_name)
+                    if base.equal_strings_check(list1=[category_name], list2=categories_to_ignore_exact, case_sensitive=True, strip=False) or base.containing_strings_check(list1=[category_name], list2=categories_to_ignore_containing, case_sensitive=False, strip=False):
+                        self.ignored_categories.append(cat)
                         continue
-                    option_contents = option.get_text().replace("\xa0", " ").split(" - ")
-                    unit = option_contents[0].split(" (")[0]
-                    price = float(option_contents[1].split(" ")[0].replace(",", "."))
-                    order_number = f"{orig_name}_{unit}" # unit incl. unit quanitity here, can be e.g. "8 x 250 ml"
-                    if "x" in unit:
-                        unit_strings = unit.split("x")
-                        unit_quantity = int(unit_strings[0].strip())
-                        unit = unit_strings[1].strip()
-                        price = round(price / unit_quantity, 2)
                     else:
-                        unit_quantity = 1
-                    unit_re = re.search(r"(\d+(?:,\d+)?)\s(\D*)", unit)
-                    amount = float(unit_re.group(1).replace(",", "."))
-                    base_unit = unit_re.group(2).strip()
-                    if base_unit == "g":
-                        amount /= 1000
-                        base_unit = "kg"
-                    elif base_unit == "ml":
-                        amount /= 1000
-                        base_unit = "l"
-                    elif base_unit not in ["kg", "l"]:
-                        if amount == 1:
-                            unit = base_unit
-                        base_unit = None
-                    if base_unit:
-                        base_price = price / amount
-                        name = f"{orig_name} ({foodsoft_article_import.base_price_str(base_price, base_unit)})"
-                    else:
-                        name = orig_name
-                    article = foodsoft_article.Article(order_number=order_number, name=name, unit=unit, unit_quantity=unit_quantity, price_net=price, category=category_name, origin="eigen", note=description, amount=amount, base_unit=base_unit, orig_name=orig_name)
+                        self.categories.append(cat)
+                elif cat.ignored:
+                    continue
+                product = base.Category(name=orig_name)
+                product.articles = []
+                product.open = True
+                cat.subcategories.append(product)
+
+                price_data = product_data.find_all("div", recursive=False)[-1]
+                select_box_bs = price_data.find("select")
+                if select_box_bs:
+                    options = select_box_bs.find_all("option")
+                    for option in options:
+                        if option.has_attr("hidden") or option.has_attr("disabled"):
+                            continue
+                        option_contents = option.get_text().replace("\xa0", " ").split(" - ")
+                        unit = option_contents[0].split(" (")[0]
+                        price = float(option_contents[1].split(" ")[0].replace(",", "."))
+                        order_number = f"{orig_name}_{unit}" # unit incl. unit quanitity here, can be e.g. "8 x 250 ml"
+                        if "x" in unit:
+                            unit_strings = unit.split("x")
+                            unit_quantity = int(unit_strings[0].strip())
+                            unit = unit_strings[1].strip()
+                            price = round(price / unit_quantity, 2)
+                        else:
+                            unit_quantity = 1
+                        unit_re = re.search(r"(\d+(?:,\d+)?)\s(\D*)", unit)
+                        amount = float(unit_re.group(1).replace(",", "."))
+                        base_unit = unit_re.group(2).strip()
+                        if base_unit == "g":
+                            amount /= 1000
+                            base_unit = "kg"
+                        elif base_unit == "ml":
+                            amount /= 1000
+                            base_unit = "l"
+                        elif base_unit not in ["kg", "l"]:
+                            if amount == 1:
+                                unit = base_unit
+                            base_unit = None
+                        if base_unit:
+                            base_price = price / amount
+                            name = f"{orig_name} ({foodsoft_article_import.base_price_str(base_price, base_unit)})"
+                        else:
+                            name = orig_name
+                        article = foodsoft_article.Article(order_number=order_number, name=name, unit=unit, unit_quantity=unit_quantity, price_net=price, category=category_name, origin="eigen", note=description, amount=amount, base_unit=base_unit, orig_name=orig_name)
+                        product.articles.append(article)
+                else:
+                    price = float(price_data.find("span").get_text().replace("\xa0", " ").split(" ")[0].replace(",", "."))
+                    article = foodsoft_article.Article(order_number=orig_name, name=orig_name, unit="Stk", price_net=price, category=category_name, origin="eigen", note=description, amount=None, base_unit=None, orig_name=orig_name)
                     product.articles.append(article)
-            else:
-                price = float(price_data.find("span").get_text().replace("\xa0", " ").split(" ")[0].replace(",", "."))
-                article = foodsoft_article.Article(order_number=orig_name, name=orig_name, unit="Stk", price_net=price, category=category_name, origin="eigen", note=description, amount=None, base_unit=None, orig_name=orig_name)
-                product.articles.append(article)
 
         for c in self.categories:
             for p in c.subcategories:
@@ -176,8 +175,6 @@ class ScriptRun(base.Run):
                     else:
                         self.articles.append(article)
 
-        driver.quit()
-
         self.articles, self.notifications = foodsoft_article_import.rename_duplicates(locales=session.locales, articles=self.articles, notifications=self.notifications, compare_unit=True, keep_full_duplicates=False)
         self.articles, self.notifications = foodsoft_article_import.rename_duplicate_order_numbers(locales=session.locales, articles=self.articles, notifications=self.notifications)
 
@@ -196,7 +193,7 @@ class ScriptRun(base.Run):
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Zusammenfassung"), content=message)
 
         self.log.append(base.LogEntry(action="CSV generated", done_by=base.full_user_name(session)))
-        self.next_possible_methods = [mark_as_imported]
+        self.next_possible_methods = foodsoft_article_import.upload_methods(supplier_id) + [mark_as_imported]
         self.completion_percentage = 67
 
     def mark_as_imported(self, session):
@@ -29,7 +29,17 @@ def config_variables(): # List of the special config variables this script uses,
         base.Variable(name="message prefix", required=False, example="Hallo")
         ]
 
-class ScriptRun(base.Run):
+title_normalizer = base.Normalizer(removals=["Bio-", " Pkg.", " PKG.", " Pkg", " PKG", " Stk.", " Bd.", " Str.", " Fl.", " kg", " Glas", " Dose"], strip=True, sequential=True) # removals can form new matches, e.g. " PKG Pkg.."
+short_note_normalizer = base.Normalizer(removals=["/Pkg.", " Inhaltfüllung"])
+address_normalizer = base.Normalizer(removals=["Österreich", "AT-", "A-"], strip=True)
+price_option_normalizer = base.Normalizer(removals=["ca. ", "ca."], sequential=True)
+unit_normalizer = base.Normalizer(replacements={"1kg kg": "1kg", "Lit.": "L", "Lit": "L"}, sequential=True) # e.g. "Lit.it" -> "Lit" -> "L"
+price_unit_normalizer = base.Normalizer(replacements={"1kg kg": "1kg", "Lit.": "L", "Lit": "L", "ca. ": "", "ca.": ""}, sequential=True)
+long_unit_normalizer = base.Normalizer(replacements={"Flasche": "Fl.", "Packung": "Pkg.", "Stück": "Stk"})
+note_normalizer = base.Normalizer(replacements={".\n": ". ", "!\n": "! ", ";\n": "; ", ",\n": ", ", ":\n": ": ", "\n": ". "}, collapse=["\n", " "])
+origin_normalizer = base.Normalizer(replacements={"\n": " "}, collapse=[" "]) # TODO: testing
+
+class ScriptRun(foodsoft_article_import.ArticleImportRun):
     def __init__(self, foodcoop, configuration):
         super().__init__(foodcoop=foodcoop, configuration=configuration)
         self.next_possible_methods = [read_webshop]
@@ -74,7 +84,7 @@ class ScriptRun(base.Run):
         base.write_txt(file_path=base.file_path(path=self.path, folder="display", file_name="Zusammenfassung"), content=message)
 
         self.log.append(base.LogEntry(action="CSV generated", done_by=base.full_user_name(session)))
-        self.next_possible_methods = [mark_as_imported]
+        self.next_possible_methods = foodsoft_article_import.upload_methods(supplier_id) + [mark_as_imported]
         self.completion_percentage = 67
 
     def mark_as_imported(self, session):
@@ -214,7 +224,7 @@ def get_articles(category, articles, ignored_articles, articles_to_ignore):
             order_number = item_link.split("id=")[-1]
             if [x for x in articles if x.order_number == order_number]:
                 continue
-            title = item.find(class_="font2 ic3 itemname").text.replace("Bio-", "").replace(" Pkg.", "").replace(" PKG.", "").replace(" Pkg", "").replace(" PKG", "").replace(" Stk.", "").replace(" Bd.", "").replace(" Str.", "").replace(" Fl.", "").replace(" kg", "").replace(" Glas", "").replace(" Dose", "").strip()
+            title = title_normalizer(item.find(class_="font2 ic3 itemname").text)
             title_contents = re.split(r"(.+)\s(\d.?\d*.?\S+)\s?([a-zA-Z]*)", title)
             if len(title_contents) > 1:
                 name = title_contents[1]
@@ -223,14 +233,14 @@ def get_articles(category, articles, ignored_articles, articles_to_ignore):
             else:
                 name = title
             producer = get_if_found(item, "ic2 producer")
-            note = get_if_found(item, "ic2 cinfotxt").replace("/Pkg.", "").replace(" Inhaltfüllung", "")
+            note = short_note_normalizer(get_if_found(item, "ic2 cinfotxt"))
             origin = ""
             if producer == "Landwirtschaft Pranger" or producer == "Produktion Biohof A. Pranger e.U." or producer == "Von unserem Biohof":
                 origin = "eigen"
             else:
                 address = get_if_found(item_details, "oo-producer-address")
                 if address:
-                    origin = address.replace("Österreich", "").replace("AT-", "").replace("A-", "").strip()
+                    origin = address_normalizer(address)
                 else:
                     origin = get_if_found(item, "herkunft")
             if not origin:
@@ -244,7 +254,7 @@ def get_articles(category, articles, ignored_articles, articles_to_ignore):
             price_options = item.find(class_="font2 ic2 baseprice")
             prices = []
             for option in price_options.find_all("option") + price_options.find_all(class_="oo-item-price"):
-                price, unit = option.get_text().strip().replace("ca. ", "").replace("ca.", "").split("€/")
+                price, unit = price_option_normalizer(option.get_text().strip()).split("€/")
                 new_option = PriceOption(float(price), unit)
                 prices.append(new_option)
 
@@ -257,7 +267,7 @@ def get_articles(category, articles, ignored_articles, articles_to_ignore):
                     if len(unit_in_note) > 1:
                         unit_info = unit_in_note[1]
                         note = note.replace(unit_in_note[1], "").strip()
-                unit_info = unit_info.replace("1kg kg", "1kg").replace("Lit.", "L").replace("Lit", "L")
+                unit_info = unit_normalizer(unit_info)
                 if unit_info:
                     if prices[0].unit not in unit_info:
                         separator = ""
@@ -269,9 +279,9 @@ def get_articles(category, articles, ignored_articles, articles_to_ignore):
                         prices[0].unit = unit_info
 
             for price in prices:
-                price.unit = price.unit.replace("1kg kg", "1kg").replace("Lit.", "L").replace("Lit", "L").replace("ca. ", "").replace("ca.", "")
+                price.unit = price_unit_normalizer(price.unit)
                 if len(price.unit) > 15:
-                    price.unit = price.unit.replace("Flasche", "Fl.").replace("Packung", "Pkg.").replace("Stück", "Stk")
+                    price.unit = long_unit_normalizer(price.unit)
 
             # Krautkoopf-specific way of finding the best fitting unit/price option for us
             favorite_option = None
@@ -315,12 +325,8 @@ def get_articles(category, articles, ignored_articles, articles_to_ignore):
                         note += "."
                     note += " "
                 note += item_description
-            note = base.remove_double_strings_loop(text=note, string="\n", description="line breaks")
-            note = note.replace(".\n", ". ").replace("!\n", "! ").replace(";\n", "; ").replace(",\n", ", ").replace(":\n", ": ")
-            note = note.replace("\n", ". ")
-            note = base.remove_double_strings_loop(text=note, string=" ", description="whitespaces")
-            origin = origin.replace("\n", " ") # TODO: testing
-            origin = base.remove_double_strings_loop(text=origin, string=" ", description="whitespaces")
+            note = note_normalizer(note)
+            origin = origin_normalizer(origin)
 
             cat_name = match_categories(name=name, note=note, category_number=subcat["number"], cat_name=cat_name)
             article = foodsoft_article.Article(order_number=order_number, name=name, note=note, unit=favorite_option.unit, price_net=favorite_option.price, unit_quantity=favorite_option.unit_quantity, category=cat_name, manufacturer=producer, origin=origin, ignore=ignore, orig_unit=unit_info)
@@ -0,0 +1,549 @@
+"""
+Storage backends for settings, configs, manual changes, runs and run indexes.
+FileStorage keeps everything in files under data/ (the layout this project always had), SQLiteStorage keeps it in one SQLite database.
+The backend is chosen by the environment variable LIEFERSCRAPING_STORAGE ("files" or "sqlite"), see current().
+Run folders with the files of a run (downloads, display texts) are on disk for both backends.
+"""
+
+import os
+import shutil
+import copy
+import json
+import sqlite3
+import threading
+import contextlib
+import yaml
+import dill
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+RUN_METADATA_FILE = "run.meta"
+LEGACY_RUN_FILE = "run.obj"
+PAYLOAD_FOLDER = "payload"
+RUN_INDEX_FILE = "runs.jsonl"
+SQLITE_DATABASE_FILE = "storage.sqlite3"
+
+_yaml_cache = {} # {file path: (file signature, parsed content)}
+
+def file_signature(filename):
+    stat = os.stat(filename)
+    return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+def read_yaml_file(filename):
+    """
+    Returns the parsed content of a YAML file, or None if the file doesn't exist.
+    Parsed files are cached process-wide and only parsed again if their modification time, size or inode changed.
+    The caller gets a copy, so it may modify it without affecting the cache.
+    """
+    try:
+        signature = file_signature(filename)
+    except FileNotFoundError:
+        _yaml_cache.pop(filename, None)
+        return None
+    cached = _yaml_cache.get(filename)
+    if not cached or cached[0] != signature:
+        with open(filename, encoding="UTF8") as yaml_file:
+            content = yaml.safe_load(yaml_file)
+        cached = (signature, content)
+        _yaml_cache[filename] = cached
+    return copy.deepcopy(cached[1])
+
+def write_yaml_file(filename, content):
+    # written to a temporary file first and then renamed, so readers never see a half-written file
+    # write-through: the cache is updated together with the file, so readers never get stale data
+    temp_path = f"{filename}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_path, "w", encoding="UTF8") as yaml_file:
+        yaml.safe_dump(content, yaml_file, allow_unicode=True, indent=4, sort_keys=False)
+    os.replace(temp_path, filename)
+    _yaml_cache[filename] = (file_signature(filename), copy.deepcopy(content))
+
+@contextlib.contextmanager
+def file_lock(path):
+    """
+    Exclusive lock for a file (using a separate .lock file next to it) across processes and threads, e.g. for read-modify-write updates.
+    Not reentrant: don't acquire the lock of the same file again while holding it.
+    """
+    with open(path + ".lock", "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+def read_json_lines(path):
+    # returns ({name: last entry of this name}, number of lines) of a file of JSON lines
+    entries = {}
+    number_of_lines = 0
+    with open(path, encoding="UTF8") as json_lines_file:
+        for line in json_lines_file:
+            if not line.strip():
+                continue
+            number_of_lines += 1
+            entry = json.loads(line)
+            entries[entry["name"]] = entry
+    return entries, number_of_lines
+
+def write_json_lines(path, entries):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="UTF8") as json_lines_file:
+        for entry in entries:
+            json_lines_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    os.replace(temp_path, path)
+
+class FileStorage:
+    """
+    Keeps all data in files under the root folder:
+    <instance>/settings.yaml, <instance>/<configuration>/config.yaml (including the manual changes),
+    <instance>/<configuration>/runs.jsonl (run index), <instance>/<configuration>/<run>/run.meta and payload/<attribute>.obj
+    """
+    def __init__(self, root="data"):
+        self.root = root
+
+    def instance_path(self, foodcoop):
+        return os.path.join(self.root, foodcoop)
+
+    def configuration_path(self, foodcoop, configuration):
+        return os.path.join(self.root, foodcoop, configuration)
+
+    def run_path(self, foodcoop, configuration, run_name):
+        return os.path.join(self.root, foodcoop, configuration, run_name)
+
+    def payload_file_path(self, foodcoop, configuration, run_name, attribute):
+        return os.path.join(self.run_path(foodcoop, configuration, run_name), PAYLOAD_FOLDER, attribute + ".obj")
+
+    # instances and settings
+
+    def find_instances(self):
+        if os.path.isdir(self.root):
+            return [d for d in os.listdir(self.root) if os.path.isfile(os.path.join(self.root, d, "settings.yaml"))]
+        else:
+            return []
+
+    def read_settings(self, foodcoop):
+        # returns None if the instance has no settings yet
+        return read_yaml_file(os.path.join(self.instance_path(foodcoop), "settings.yaml"))
+
+    def save_settings(self, foodcoop, settings):
+        os.makedirs(self.instance_path(foodcoop), exist_ok=True)
+        write_yaml_file(os.path.join(self.instance_path(foodcoop), "settings.yaml"), settings)
+
+    def update_settings(self, foodcoop, update, default):
+        # locked read-modify-write: update is called with the current settings (or default) and may modify them in place
+        os.makedirs(self.instance_path(foodcoop), exist_ok=True)
+        with file_lock(os.path.join(self.instance_path(foodcoop), "settings.yaml")):
+            settings = self.read_settings(foodcoop)
+            if settings is None:
+                settings = default
+            update(settings)
+            self.save_settings(foodcoop, settings)
+        return settings
+
+    # configurations and manual changes
+
+    def find_configurations(self, foodcoop):
+        root_path = self.instance_path(foodcoop)
+        if not os.path.isdir(root_path):
+            return []
+        return [d for d in os.listdir(root_path) if not d.startswith(".") and os.path.isdir(os.path.join(root_path, d))]
+
+    def read_config(self, foodcoop, configuration):
+        # returns None if the configuration has no config yet
+        return read_yaml_file(os.path.join(self.configuration_path(foodcoop, configuration), "config.yaml"))
+
+    def save_config(self, foodcoop, configuration, config):
+        config_path = self.configuration_path(foodcoop, configuration)
+        os.makedirs(config_path, exist_ok=True)
+        write_yaml_file(os.path.join(config_path, "config.yaml"), config)
+
+    def update_config(self, foodcoop, configuration, update):
+        # locked read-modify-write: update is called with the current config and may modify it in place
+        config_path = self.configuration_path(foodcoop, configuration)
+        os.makedirs(config_path, exist_ok=True)
+        with file_lock(os.path.join(config_path, "config.yaml")):
+            config = self.read_config(foodcoop, configuration) or {}
+            update(config)
+            self.save_config(foodcoop, configuration, config)
+        return config
+
+    def read_manual_changes(self, foodcoop, configuration, order_number=None):
+        # returns {order number: manual changes} of a configuration, or only the manual changes of one article
+        manual_changes = (self.read_config(foodcoop, configuration) or {}).get("manual changes") or {}
+        if order_number is None:
+            return manual_changes
+        return manual_changes.get(order_number, {})
+
+    def delete_configuration(self, foodcoop, configuration):
+        shutil.rmtree(self.configuration_path(foodcoop, configuration))
+
+    def rename_configuration(self, foodcoop, old_configuration_name, new_configuration_name):
+        os.rename(self.configuration_path(foodcoop, old_configuration_name), self.configuration_path(foodcoop, new_configuration_name))
+
+    # runs
+
+    def find_runs(self, foodcoop, configuration):
+        path = self.configuration_path(foodcoop, configuration)
+        if not os.path.isdir(path):
+            return []
+        return [run_name for run_name in os.listdir(path) if os.path.isfile(os.path.join(path, run_name, RUN_METADATA_FILE)) or os.path.isfile(os.path.join(path, run_name, LEGACY_RUN_FILE))]
+
+    def move_run(self, foodcoop, old_configuration_name, old_run_name, new_configuration_name, new_run_name):
+        os.rename(self.run_path(foodcoop, old_configuration_name, old_run_name), self.run_path(foodcoop, new_configuration_name, new_run_name))
+
+    def export_run(self, foodcoop, configuration, run_name):
+        # returns {file path relative to the run folder: content} of run data which is not kept in the run folder, e.g. to archive it with the folder
+        return {}
+
+    def remove_run(self, foodcoop, configuration, run_name):
+        shutil.rmtree(self.run_path(foodcoop, configuration, run_name))
+
+    def save_run(self, foodcoop, configuration, run_name, snapshot, payloads):
+        """
+        snapshot: {"format": run format version, "attributes": {metadata attributes}, "payloads": [names of all payloads of the run]}
+        payloads: {attribute: value} of the payloads to write, payloads listed in the snapshot but not given here are left untouched
+        """
+        run_path = self.run_path(foodcoop, configuration, run_name)
+        payload_path = os.path.join(run_path, PAYLOAD_FOLDER)
+        if payloads:
+            os.makedirs(payload_path, exist_ok=True)
+        for attribute, value in payloads.items():
+            with open(self.payload_file_path(foodcoop, configuration, run_name, attribute), 'wb') as file:
+                dill.dump(value, file)
+        if os.path.isdir(payload_path):
+            for file_name in os.listdir(payload_path):
+                if os.path.splitext(file_name)[0] not in snapshot["payloads"]:
+                    os.remove(os.path.join(payload_path, file_name))
+        with open(os.path.join(run_path, RUN_METADATA_FILE), 'wb') as file:
+            dill.dump(snapshot, file)
+        legacy_file_path = os.path.join(run_path, LEGACY_RUN_FILE)
+        if os.path.isfile(legacy_file_path):
+            os.remove(legacy_file_path)
+
+    def load_run(self, foodcoop, configuration, run_name):
+        # returns the snapshot of the run, or None if there is none (e.g. for runs saved before the versioned run format)
+        metadata_file_path = os.path.join(self.run_path(foodcoop, configuration, run_name), RUN_METADATA_FILE)
+        if not os.path.isfile(metadata_file_path):
+            return None
+        with open(metadata_file_path, 'rb') as file:
+            return dill.load(file)
+
+    def load_legacy_run(self, foodcoop, configuration, run_name):
+        # runs saved as a whole pickled object
+        with open(os.path.join(self.run_path(foodcoop, configuration, run_name), LEGACY_RUN_FILE), 'rb') as file:
+            return dill.load(file)
+
+    def load_payload(self, foodcoop, configuration, run_name, attribute):
+        with open(self.payload_file_path(foodcoop, configuration, run_name, attribute), 'rb') as file:
+            return dill.load(file)
+
+    # run indexes
+
+    def read_run_index(self, foodcoop, configuration, rebuild):
+        """
+        Returns {run name: run index entry} of a configuration.
+        If there is no run index yet, rebuild(foodcoop, configuration) is called to create it and its result returned.
+        """
+        index_path = os.path.join(self.configuration_path(foodcoop, configuration), RUN_INDEX_FILE)
+        if not os.path.isfile(index_path):
+            if not os.path.isdir(self.configuration_path(foodcoop, configuration)):
+                return {}
+            with file_lock(index_path):
+                if not os.path.isfile(index_path):
+                    return rebuild(foodcoop, configuration)
+        runs, number_of_lines = read_json_lines(index_path)
+        return runs
+
+    def add_run_index_entry(self, foodcoop, configuration, entry, rebuild):
+        """
+        Appends the entry to the run index (an append-only manifest of JSON lines), which is compacted once it holds far more lines than runs.
+        If there is no run index yet, rebuild(foodcoop, configuration) is called instead, which has to include the entry's run.
+        """
+        index_path = os.path.join(self.configuration_path(foodcoop, configuration), RUN_INDEX_FILE)
+        with file_lock(index_path):
+            if not os.path.isfile(index_path):
+                rebuild(foodcoop, configuration)
+                return
+            with open(index_path, "a", encoding="UTF8") as index_file:
+                index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            runs, number_of_lines = read_json_lines(index_path)
+            if number_of_lines > 2 * len(runs) + 20:
+                write_json_lines(index_path, runs.values())
+
+    def write_run_index(self, foodcoop, configuration, entries):
+        write_json_lines(os.path.join(self.configuration_path(foodcoop, configuration), RUN_INDEX_FILE), entries)
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (foodcoop TEXT PRIMARY KEY, content TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS configurations (foodcoop TEXT, configuration TEXT, content TEXT NOT NULL, PRIMARY KEY (foodcoop, configuration));
+CREATE TABLE IF NOT EXISTS manual_changes (foodcoop TEXT, configuration TEXT, order_number, attribute TEXT, content TEXT NOT NULL, PRIMARY KEY (foodcoop, configuration, order_number, attribute));
+CREATE TABLE IF NOT EXISTS runs (foodcoop TEXT, configuration TEXT, name TEXT, snapshot BLOB NOT NULL, PRIMARY KEY (foodcoop, configuration, name));
+CREATE TABLE IF NOT EXISTS payloads (foodcoop TEXT, configuration TEXT, run TEXT, attribute TEXT, data BLOB NOT NULL, PRIMARY KEY (foodcoop, configuration, run, attribute));
+CREATE TABLE IF NOT EXISTS run_index (foodcoop TEXT, configuration TEXT, name TEXT, entry TEXT NOT NULL, PRIMARY KEY (foodcoop, configuration, name));
+"""
+
+def _dump_yaml(content):
+    return yaml.safe_dump(content, allow_unicode=True, sort_keys=False)
+
+class SQLiteStorage(FileStorage):
+    """
+    Keeps settings, configs, manual changes, runs and run indexes in one SQLite database (default: data/storage.sqlite3).
+    Writes are transactions and lookups (e.g. the manual changes of an article or the runs of a configuration) are indexed queries.
+    Data which only exists in files yet, e.g. runs saved before switching to SQLite, is still read from the files and moved into the database when saved again.
+    """
+    def __init__(self, root="data", database=None):
+        super().__init__(root)
+        if database:
+            self.database = database
+        else:
+            self.database = os.path.join(root, SQLITE_DATABASE_FILE)
+        self._local = threading.local()
+        self.connection().executescript(SQLITE_SCHEMA)
+
+    def connection(self):
+        # one connection per thread, as the web server handles requests in several threads
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.database)), exist_ok=True)
+            connection = sqlite3.connect(self.database, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    @contextlib.contextmanager
+    def transaction(self, write=True):
+        connection = self.connection()
+        if write:
+            connection.execute("BEGIN IMMEDIATE")
+        else:
+            connection.execute("BEGIN")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    # instances and settings
+
+    def find_instances(self):
+        instances = super().find_instances()
+        for (foodcoop,) in self.connection().execute("SELECT foodcoop FROM settings"):
+            if foodcoop not in instances:
+                instances.append(foodcoop)
+        return instances
+
+    def read_settings(self, foodcoop):
+        row = self.connection().execute("SELECT content FROM settings WHERE foodcoop = ?", (foodcoop,)).fetchone()
+        if row:
+            return yaml.safe_load(row[0])
+        return super().read_settings(foodcoop)
+
+    def save_settings(self, foodcoop, settings):
+        with self.transaction() as connection:
+            self._save_settings(connection, foodcoop, settings)
+
+    def _save_settings(self, connection, foodcoop, settings):
+        connection.execute("INSERT OR REPLACE INTO settings (foodcoop, content) VALUES (?, ?)", (foodcoop, _dump_yaml(settings)))
+
+    def update_settings(self, foodcoop, update, default):
+        with self.transaction() as connection:
+            settings = self.read_settings(foodcoop)
+            if settings is None:
+                settings = default
+            update(settings)
+            self._save_settings(connection, foodcoop, settings)
+        return settings
+
+    # configurations and manual changes
+
+    def find_configurations(self, foodcoop):
+        configurations = super().find_configurations(foodcoop)
+        for (configuration,) in self.connection().execute("SELECT configuration FROM configurations WHERE foodcoop = ?", (foodcoop,)):
+            if configuration not in configurations:
+                configurations.append(configuration)
+        return configurations
+
+    def read_config(self, foodcoop, configuration):
+        with self.transaction(write=False) as connection:
+            return self._read_config(connection, foodcoop, configuration)
+
+    def _read_config(self, connection, foodcoop, configuration):
+        row = connection.execute("SELECT content FROM configurations WHERE foodcoop = ? AND configuration = ?", (foodcoop, configuration)).fetchone()
+        if not row:
+            return super().read_config(foodcoop, configuration)
+        config = yaml.safe_load(row[0]) or {}
+        manual_changes = self._read_manual_changes(connection, foodcoop, configuration)
+        if manual_changes:
+            config["manual changes"] = manual_changes
+        return config
+
+    def save_config(self, foodcoop, configuration, config):
+        os.makedirs(self.configuration_path(foodcoop, configuration), exist_ok=True) # for the runs
+        with self.transaction() as connection:
+            self._save_config(connection, foodcoop, configuration, config)
+
+    def _save_config(self, connection, foodcoop, configuration, config):
+        config = dict(config)
+        manual_changes = config.pop("manual changes", None) or {}
+        connection.execute("INSERT OR REPLACE INTO configurations (foodcoop, configuration, content) VALUES (?, ?, ?)", (foodcoop, configuration, _dump_yaml(config)))
+        connection.execute("DELETE FROM manual_changes WHERE foodcoop = ? AND configuration = ?", (foodcoop, configuration))
+        connection.executemany("INSERT INTO manual_changes (foodcoop, configuration, order_number, attribute, content) VALUES (?, ?, ?, ?, ?)",
+            [(foodcoop, configuration, order_number, attribute, _dump_yaml(change)) for order_number, changes in manual_changes.items() for attribute, change in (changes or {}).items()])
+
+    def update_config(self, foodcoop, configuration, update):
+        os.makedirs(self.configuration_path(foodcoop, configuration), exist_ok=True)
+        with self.transaction() as connection:
+            config = self._read_config(connection, foodcoop, configuration) or {}
+            update(config)
+            self._save_config(connection, foodcoop, configuration, config)
+        return config
+
+    def read_manual_changes(self, foodcoop, configuration, order_number=None):
+        if not self.connection().execute("SELECT 1 FROM configurations WHERE foodcoop = ? AND configuration = ?", (foodcoop, configuration)).fetchone():
+            return super().read_manual_changes(foodcoop, configuration, order_number)
+        manual_changes = self._read_manual_changes(self.connection(), foodcoop, configuration, order_number)
+        if order_number is None:
+            return manual_changes
+        return manual_changes.get(order_number, {})
+
+    def _read_manual_changes(self, connection, foodcoop, configuration, order_number=None):
+        query = "SELECT order_number, attribute, content FROM manual_changes WHERE foodcoop = ? AND configuration = ?"
+        parameters = (foodcoop, configuration)
+        if order_number is not None:
+            query += " AND order_number = ?"
+            parameters += (order_number,)
+        query += " ORDER BY rowid"
+        manual_changes = {}
+        for number, attribute, content in connection.execute(query, parameters):
+            manual_changes.setdefault(number, {})[attribute] = yaml.safe_load(content)
+        return manual_changes
+
+    def delete_configuration(self, foodcoop, configuration):
+        with self.transaction() as connection:
+            for table in ["configurations", "manual_changes", "runs", "payloads", "run_index"]:
+                connection.execute(f"DELETE FROM {table} WHERE foodcoop = ? AND configuration = ?", (foodcoop, configuration))
+        if os.path.isdir(self.configuration_path(foodcoop, configuration)):
+            super().delete_configuration(foodcoop, configuration)
+
+    def rename_configuration(self, foodcoop, old_configuration_name, new_configuration_name):
+        with self.transaction() as connection:
+            for table in ["configurations", "manual_changes", "runs", "payloads", "run_index"]:
+                connection.execute(f"UPDATE {table} SET configuration = ? WHERE foodcoop = ? AND configuration = ?", (new_configuration_name, foodcoop, old_configuration_name))
+            super().rename_configuration(foodcoop, old_configuration_name, new_configuration_name)
+
+    # runs
+
+    def find_runs(self, foodcoop, configuration):
+        run_names = super().find_runs(foodcoop, configuration)
+        rows = self.connection().execute("SELECT runs.name, run_index.entry FROM runs LEFT JOIN run_index ON run_index.foodcoop = runs.foodcoop AND run_index.configuration = runs.configuration AND run_index.name = runs.name "
+            "WHERE runs.foodcoop = ? AND runs.configuration = ?", (foodcoop, configuration))
+        for run_name, entry in rows:
+            if entry and json.loads(entry).get("archived"):
+                continue # rows of runs archived before they were removed on archiving
+            if run_name not in run_names:
+                run_names.append(run_name)
+        return run_names
+
+    def export_run(self, foodcoop, configuration, run_name):
+        # the run's rows in the file format, so that the run can be restored from files
+        files = {}
+        row = self.connection().execute("SELECT snapshot FROM runs WHERE foodcoop = ? AND configuration = ? AND name = ?", (foodcoop, configuration, run_name)).fetchone()
+        if row:
+            files[RUN_METADATA_FILE] = row[0]
+        for attribute, data in self.connection().execute("SELECT attribute, data FROM payloads WHERE foodcoop = ? AND configuration = ? AND run = ?", (foodcoop, configuration, run_name)):
+            files[PAYLOAD_FOLDER + "/" + attribute + ".obj"] = data
+        return files
+
+    def remove_run(self, foodcoop, configuration, run_name):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM runs WHERE foodcoop = ? AND configuration = ? AND name = ?", (foodcoop, configuration, run_name))
+            connection.execute("DELETE FROM payloads WHERE foodcoop = ? AND configuration = ? AND run = ?", (foodcoop, configuration, run_name))
+            super().remove_run(foodcoop, configuration, run_name)
+
+    def move_run(self, foodcoop, old_configuration_name, old_run_name, new_configuration_name, new_run_name):
+        with self.transaction() as connection:
+            connection.execute("UPDATE runs SET configuration = ?, name = ? WHERE foodcoop = ? AND configuration = ? AND name = ?", (new_configuration_name, new_run_name, foodcoop, old_configuration_name, old_run_name))
+            connection.execute("UPDATE payloads SET configuration = ?, run = ? WHERE foodcoop = ? AND configuration = ? AND run = ?", (new_configuration_name, new_run_name, foodcoop, old_configuration_name, old_run_name))
+            super().move_run(foodcoop, old_configuration_name, old_run_name, new_configuration_name, new_run_name)
+
+    def save_run(self, foodcoop, configuration, run_name, snapshot, payloads):
+        with self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO runs (foodcoop, configuration, name, snapshot) VALUES (?, ?, ?, ?)", (foodcoop, configuration, run_name, dill.dumps(snapshot)))
+            connection.executemany("INSERT OR REPLACE INTO payloads (foodcoop, configuration, run, attribute, data) VALUES (?, ?, ?, ?, ?)",
+                [(foodcoop, configuration, run_name, attribute, dill.dumps(value)) for attribute, value in payloads.items()])
+            for (attribute,) in connection.execute("SELECT attribute FROM payloads WHERE foodcoop = ? AND configuration = ? AND run = ?", (foodcoop, configuration, run_name)).fetchall():
+                if attribute not in snapshot["payloads"]:
+                    connection.execute("DELETE FROM payloads WHERE foodcoop = ? AND configuration = ? AND run = ? AND attribute = ?", (foodcoop, configuration, run_name, attribute))
+        # remove copies in files, if the run was stored in files before
+        run_path = self.run_path(foodcoop, configuration, run_name)
+        for file_name in [RUN_METADATA_FILE, LEGACY_RUN_FILE]:
+            if os.path.isfile(os.path.join(run_path, file_name)):
+                os.remove(os.path.join(run_path, file_name))
+
+    def load_run(self, foodcoop, configuration, run_name):
+        row = self.connection().execute("SELECT snapshot FROM runs WHERE foodcoop = ? AND configuration = ? AND name = ?", (foodcoop, configuration, run_name)).fetchone()
+        if row:
+            return dill.loads(row[0])
+        return super().load_run(foodcoop, configuration, run_name)
+
+    def load_payload(self, foodcoop, configuration, run_name, attribute):
+        row = self.connection().execute("SELECT data FROM payloads WHERE foodcoop = ? AND configuration = ? AND run = ? AND attribute = ?", (foodcoop, configuration, run_name, attribute)).fetchone()
+        if row:
+            return dill.loads(row[0])
+        return super().load_payload(foodcoop, configuration, run_name, attribute)
+
+    # run indexes
+
+    def read_run_index(self, foodcoop, configuration, rebuild):
+        rows = self.connection().execute("SELECT name, entry FROM run_index WHERE foodcoop = ? AND configuration = ?", (foodcoop, configuration)).fetchall()
+        if not rows:
+            if not os.path.isdir(self.configuration_path(foodcoop, configuration)):
+                return {}
+            return rebuild(foodcoop, configuration)
+        return {name: json.loads(entry) for name, entry in rows}
+
+    def add_run_index_entry(self, foodcoop, configuration, entry, rebuild):
+        if not self.connection().execute("SELECT 1 FROM run_index WHERE foodcoop = ? AND configuration = ? LIMIT 1", (foodcoop, configuration)).fetchone():
+            rebuild(foodcoop, configuration)
+            return
+        with self.transaction() as connection:
+            connection.execute("INSERT OR REPLACE INTO run_index (foodcoop, configuration, name, entry) VALUES (?, ?, ?, ?)", (foodcoop, configuration, entry["name"], json.dumps(entry, ensure_ascii=False)))
+
+    def write_run_index(self, foodcoop, configuration, entries):
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM run_index WHERE foodcoop = ? AND configuration = ?", (foodcoop, configuration))
+            connection.executemany("INSERT INTO run_index (foodcoop, configuration, name, entry) VALUES (?, ?, ?, ?)",
+                [(foodcoop, configuration, entry["name"], json.dumps(entry, ensure_ascii=False)) for entry in entries])
+
+_current_storage = None
+
+def current():
+    """
+    Returns the storage backend of this process, chosen by the environment variable LIEFERSCRAPING_STORAGE: "files" (default) or "sqlite".
+    """
+    global _current_storage
+    if not _current_storage:
+        backend = os.environ.get("LIEFERSCRAPING_STORAGE", "files")
+        if backend == "sqlite":
+            _current_storage = SQLiteStorage()
+        else:
+            if backend != "files":
+                print(f'Unknown storage backend "{backend}", using files.')
+            _current_storage = FileStorage()
+    return _current_storage
+
+def use(storage):
+    # sets the storage backend of this process, e.g. SQLiteStorage(database="other.sqlite3")
+    global _current_storage
+    _current_storage = storage
@@ -0,0 +1,88 @@
+"""
+Per-instance cache of the suppliers' data in Foodsoft, shared by all scripts, so repeated runs don't fetch every supplier's edit page again.
+For each supplier the values of all fields of its edit form are stored, keyed by field id (e.g. "name", "custom_fields_origin"),
+from which foodsoft.supplier_from_fields creates Supplier objects for any configuration of fields.
+
+An entry is used for ttl seconds. Before that, it is dropped as soon as the supplier's row in Foodsoft's list of suppliers changes:
+FSConnector compares a checksum of each row (and of the whole table, to skip the comparison if nothing changed) whenever it reads the list.
+Changes of fields which are not shown in the list are noticed after ttl only, or after clearing the cache (see web.py).
+"""
+
+import os
+import time
+import json
+import hashlib
+import threading
+
+DEFAULT_TTL = 86400
+LIST_FILE = "list.json"
+
+def checksum(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class SupplierCache:
+    def __init__(self, folder, ttl=DEFAULT_TTL):
+        self.folder = folder
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _supplier_path(self, supplier_id):
+        return os.path.join(self.folder, f"{str(int(supplier_id))}.json")
+
+    def _read(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write(self, path, content):
+        os.makedirs(self.folder, exist_ok=True)
+        temporary_path = f"{path}.{str(os.getpid())}.{str(threading.get_ident())}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(content, f)
+        os.replace(temporary_path, path)
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, supplier_id):
+        """
+        Returns the field values of the supplier, or None if they aren't cached or older than ttl.
+        """
+        entry = self._read(self._supplier_path(supplier_id))
+        if entry is None or time.time() - entry["stored at"] >= self.ttl:
+            return None
+        return entry["fields"]
+
+    def store(self, supplier_id, fields):
+        self._write(self._supplier_path(supplier_id), {"stored at": time.time(), "fields": fields})
+
+    def validate(self, rows):
+        """
+        Drops the entries of suppliers whose row in the list of suppliers changed since the last validation, or which weren't validated yet.
+        rows: {supplier ID: checksum of its row}
+        Returns the number of dropped entries.
+        """
+        table_checksum = checksum(json.dumps(sorted(rows.items())))
+        with self._lock:
+            listed = self._read(os.path.join(self.folder, LIST_FILE)) or {"table": None, "rows": {}}
+            if listed["table"] == table_checksum:
+                return 0
+            dropped = 0
+            cached_ids = [file_name[:-5] for file_name in os.listdir(self.folder) if file_name.endswith(".json") and file_name != LIST_FILE] if os.path.isdir(self.folder) else []
+            for supplier_id in cached_ids:
+                if supplier_id in rows and listed["rows"].get(supplier_id) != rows[supplier_id]:
+                    self._remove(self._supplier_path(supplier_id))
+                    dropped += 1
+            self._write(os.path.join(self.folder, LIST_FILE), {"table": table_checksum, "rows": rows})
+            return dropped
+
+    def clear(self):
+        with self._lock:
+            if os.path.isdir(self.folder):
+                for file_name in os.listdir(self.folder):
+                    self._remove(os.path.join(self.folder, file_name))
@@ -11,13 +11,15 @@
             <p>{{messages}}</p>
             <h1>{{configuration}} Konfiguration</h1>
             <form action="/{{fc}}/{{configuration}}" method="post">
-                <label>{{base_locales["configuration name"]}}: <input name="configuration name" type="text" value="{{configuration}}" disabled></label><br/>
+                <label>{{base_locales["configuration name"]}}: <input name="configuration name" type="text" value="{{configuration}}" required></label><br/>
                 <label>{{base_locales["Script name"]}}: 
                     <select name="Script name" required>
                         {{!script_options}}
                     </select>
                 </label><br/>
                 <label>{{base_locales["number of runs to list"]}}: <input name="number of runs to list" type="number" value="{{number_of_runs_to_list}}" required></label><br/>
+                <label>{{base_locales["keep last runs"]}}: <input name="keep last runs" type="number" min="1" value="{{keep_last_runs}}"></label><br/>
+                <label>{{base_locales["keep runs for days"]}}: <input name="keep runs for days" type="number" min="0" value="{{keep_runs_for_days}}"></label><br/>
                 {{!config_content}}
                 <br><br>
                 <input type="submit" value="Speichern">
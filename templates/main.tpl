@@ -14,6 +14,12 @@
             <form action="/{{fc}}" method="post">
                 <input name="new configuration" value="Neue Konfiguration anlegen" type="submit" />
             </form>
+            % if supplier_cache:
+            <br/>
+            <form action="/{{fc}}" method="post">
+                <input name="refresh suppliers" value="{{base_locales['refresh supplier data']}}" type="submit" />
+            </form>
+            % end
             <br/>
             <form action="/{{fc}}" method="post">
                 <input name="logout" value="Abmelden" type="submit" />
@@ -0,0 +1,61 @@
+"""
+Checks that the normalizers of the scripts give the same results as the chains of str.replace calls they replaced.
+
+Run from the repository root: python -m unittest discover tests
+"""
+
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import script_krautkoopf_Pranger_import as pranger
+
+def replace_chain(text, replacements):
+    for string, replacement in replacements:
+        text = text.replace(string, replacement)
+    return text
+
+def remove_doubles(text, string):
+    while string + string in text:
+        text = text.replace(string + string, string)
+    return text
+
+LEGACY_PRANGER_NORMALIZERS = { # as in the script before the normalizers were introduced
+    "title_normalizer": lambda text: replace_chain(text, [("Bio-", ""), (" Pkg.", ""), (" PKG.", ""), (" Pkg", ""), (" PKG", ""), (" Stk.", ""), (" Bd.", ""), (" Str.", ""), (" Fl.", ""), (" kg", ""), (" Glas", ""), (" Dose", "")]).strip(),
+    "short_note_normalizer": lambda text: replace_chain(text, [("/Pkg.", ""), (" Inhaltfüllung", "")]),
+    "address_normalizer": lambda text: replace_chain(text, [("Österreich", ""), ("AT-", ""), ("A-", "")]).strip(),
+    "price_option_normalizer": lambda text: replace_chain(text, [("ca. ", ""), ("ca.", "")]),
+    "unit_normalizer": lambda text: replace_chain(text, [("1kg kg", "1kg"), ("Lit.", "L"), ("Lit", "L")]),
+    "price_unit_normalizer": lambda text: replace_chain(text, [("1kg kg", "1kg"), ("Lit.", "L"), ("Lit", "L"), ("ca. ", ""), ("ca.", "")]),
+    "long_unit_normalizer": lambda text: replace_chain(text, [("Flasche", "Fl."), ("Packung", "Pkg."), ("Stück", "Stk")]),
+    "note_normalizer": lambda text: remove_doubles(replace_chain(remove_doubles(text, "\n"), [(".\n", ". "), ("!\n", "! "), (";\n", "; "), (",\n", ", "), (":\n", ": "), ("\n", ". ")]), " "),
+    "origin_normalizer": lambda text: remove_doubles(text.replace("\n", " "), " "),
+}
+
+PIECES = ["Bio-", "Bio", " Pkg.", " PKG.", " Pkg", " PKG", "PKG", "Pkg", ".", " ", "x", "Lit.", "Lit", "it", "L", "1kg kg", "1kg", " kg", "kg", "ca. ", "ca.", "ca",
+    "\n", "!", ";", ",", ":", "A-", "AT-", "Österreich", "Flasche", "Packung", "Stück", "/Pkg.", " Inhaltfüllung", " Glas", " Dose", " Stk.", " Bd.", " Str.", " Fl."]
+
+class PrangerNormalizerTest(unittest.TestCase):
+    def assert_like_legacy(self, name, texts):
+        normalizer = getattr(pranger, name)
+        legacy_normalizer = LEGACY_PRANGER_NORMALIZERS[name]
+        for text in texts:
+            self.assertEqual(normalizer(text), legacy_normalizer(text), f"{name}({text!r})")
+
+    def test_known_differences_of_a_single_pass(self):
+        self.assert_like_legacy("title_normalizer", [" PKG Pkg..", "Bio-Bio-- Pkg", "x Pk Pkg.g"])
+        self.assert_like_legacy("unit_normalizer", ["xLit.it", "1kg k1kg kgg"])
+        self.assert_like_legacy("price_unit_normalizer", ["xLit.it", "Lca.it", "caca. ."])
+        self.assert_like_legacy("price_option_normalizer", ["caca. .", "cca.a."])
+
+    def test_random_texts(self):
+        randomizer = random.Random(1)
+        texts = ["".join(randomizer.choice(PIECES) for i in range(randomizer.randint(0, 6))) for j in range(5000)]
+        for name in LEGACY_PRANGER_NORMALIZERS:
+            with self.subTest(normalizer=name):
+                self.assert_like_legacy(name, texts)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,6 +2,8 @@ import bottle
 # import waitress
 import re
 import os
+import io
+import mimetypes
 import numbers
 import yaml
 import importlib
@@ -9,7 +11,12 @@ from zipfile import ZipFile
 import babel.dates
 
 import base
+import browser_pool
 import foodsoft
+import foodsoft_api
+import foodsoft_session
+import request_stats
+import supplier_cache
 
 class App(bottle.Bottle):
     def __init__(self):
@@ -19,6 +26,7 @@ class App(bottle.Bottle):
         self.settings = None
         self.locales = None
         self.locale = None
+        self.session_manager = None
         self.messages = []
 
     def switch_to_instance(self, instance):
@@ -27,6 +35,34 @@ class App(bottle.Bottle):
         self.settings = base.read_settings(instance)
         self.locales = base.read_locales(instance)
         self.locale = self.settings["default_locale"]
+        max_concurrent_requests = self.settings.get('foodsoft_max_concurrent_requests', foodsoft.DEFAULT_MAX_CONCURRENT_REQUESTS)
+        cache = None
+        cache_setting = self.settings.get('foodsoft_cache') # True, or {endpoint class: seconds to keep pages without revalidation}
+        if cache_setting:
+            cache = foodsoft.create_response_cache(folder=base.cache_path(instance, "foodsoft"), ttl=cache_setting if isinstance(cache_setting, dict) else None)
+        supplier_cache_setting = self.settings.get('foodsoft_supplier_cache') # True, or seconds to use cached supplier data (only changes of the supplier list's rows are detected earlier)
+        supplier_data_cache = None
+        if supplier_cache_setting:
+            supplier_data_cache = supplier_cache.SupplierCache(folder=base.cache_path(instance, "suppliers"), ttl=supplier_cache_setting if supplier_cache_setting is not True else supplier_cache.DEFAULT_TTL)
+        connector_class = foodsoft.FSConnector
+        connector_options = None
+        api_setting = self.settings.get('foodsoft_api') # True, or {client_id: ..., client_secret: ...} of the OAuth application in Foodsoft
+        if api_setting:
+            connector_class = foodsoft_api.FSApiConnector
+            connector_options = api_setting if isinstance(api_setting, dict) else None
+        self.session_manager = foodsoft_session.SessionManager(instance=instance, foodsoft_url=self.settings.get('foodsoft_url'), max_concurrent_requests=max_concurrent_requests, cache=cache, supplier_cache=supplier_data_cache, connector_class=connector_class, connector_options=connector_options)
+        browser_pool.warm_up_in_background(self.settings.get('warm_browsers', 0)) # number of Firefox browsers to start in advance, none by default
+
+    def logout(self):
+        if self.foodsoft_connector:
+            self.session_manager.forget(self.foodsoft_connector._user)
+            self.foodsoft_connector.logout()
+        self.instance = None
+        self.foodsoft_connector = None
+        self.settings = None
+        self.locales = None
+        self.locale = None
+        self.session_manager = None
 
 app = App()
 # plugin = bottle_session.SessionPlugin(cookie_lifetime=600)#, cookie_secure=True, cookie_httponly=True)
@@ -73,9 +109,7 @@ def check_login(submitted_form, instance):
         feedback = ""
         email = submitted_form.getunicode('email')
         password = submitted_form.getunicode('password')
-        foodsoft_address = app.settings.get('foodsoft_url')
-        app.foodsoft_connector = foodsoft.FSConnector(url=foodsoft_address, user=email, password=password)
-        app.foodsoft_connector.add_user_data(workgroups=True)
+        app.foodsoft_connector = app.session_manager.login(user=email, password=password, workgroups=True) # reuses the stored session if it is still valid
         if app.foodsoft_connector._session:
             message = f"Hallo {app.foodsoft_connector.first_name}!"
             allowed_workgroups = app.settings.get('allowed_workgroups')
@@ -87,6 +121,7 @@ def check_login(submitted_form, instance):
                 else:
                     success = False
                     message += " Deine Anmeldung ist fehlgeschlagen, da du nicht die erforderlichen Berechtigungen besitzt."
+                    app.session_manager.forget(email) # login stored the session already, it must not be reused without the check
             else:
                 success = True
         if success:
@@ -173,23 +208,32 @@ def list_files(path, folder="download"):
     files_path = os.path.join(path, folder)
     if os.path.exists(files_path):
         files = [f for f in os.listdir(files_path)]
+    elif not os.path.isdir(path):
+        files = list(archived_files(path, folder))
     return files
 
+def archived_files(path, folder):
+    # {file name: content} of a folder of an archived run, which is read from the archive instead of being restored just for viewing it
+    foodcoop, configuration, run_name = os.path.normpath(path).split(os.path.sep)[-3:]
+    return {file.split("/", 1)[-1]: content for file, content in base.read_archived_files(foodcoop, configuration, run_name, folder=folder).items() if file.count("/") == 1}
+
+def zip_path(configuration, run_name):
+    return os.path.join(run_path(configuration, run_name), configuration + "_" + run_name + ".zip")
+
 def zip_download(configuration, run_name):
-    path = run_path(configuration, run_name)
-    files = list_files(path)
-    zip_filepath = os.path.join(path, configuration + "_" + run_name + ".zip")
+    # the ZIP file itself is only created when it is requested, see download()
+    return "/download/" + zip_path(configuration, run_name)
+
+def create_zip(run_folder_path, zip_filepath):
+    files = list_files(run_folder_path)
     with ZipFile(zip_filepath, 'w') as zipObj:
         for file in files:
-            download_filepath = os.path.join(path, "download", file)
+            download_filepath = os.path.join(run_folder_path, "download", file)
             zipObj.write(download_filepath, os.path.basename(download_filepath))
-    source = "/download/" + zip_filepath
-    return source
 
-def output_link_with_download_button(configuration, script, run_name):
-    path = run_path(configuration, run_name)
-    run = script.ScriptRun.load(path=path)
-    files = list_files(path)
+def output_link_with_download_button(configuration, run_entry):
+    run_name = run_entry["name"]
+    files = run_entry["files"]
     output_link = display_output_link(configuration, run_name)
     form_content = ""
     source = ""
@@ -199,7 +243,7 @@ def output_link_with_download_button(configuration, script, run_name):
         else:
             source = zip_download(configuration, run_name)
         form_content = f"<input name='origin' value='/{app.instance}/{configuration}/display/{run_name}' hidden><input type='submit' value='⤓'>"
-    progress_bar = '<progress id="run" value="{}" max="100"></progress>'.format(run.completion_percentage)
+    progress_bar = '<progress id="run" value="{}" max="100"></progress>'.format(run_entry["completion_percentage"])
     return bottle.template("<form action='{{source}}' method='post'>{{!form_content}} {{!affix}} {{!progress_bar}}</form>", source=source, form_content=form_content, affix=output_link, progress_bar=progress_bar)
 
 def all_download_buttons(configuration, run_name):
@@ -217,16 +261,30 @@ def display(path, display_type="display"):
     display_content = ""
     file_path = os.path.join(path, display_type)
     if os.path.exists(file_path):
-        files = [f for f in os.listdir(file_path)]
-        for file in files:
+        texts = {}
+        for file in os.listdir(file_path):
             with open(os.path.join(path, display_type, file), encoding="utf-8") as text_file:
-                content = text_file.read()
-                content = convert_urls_to_links(content)
-                content = content.replace("\n", "<br>")
-            title = os.path.splitext(file)[0]
-            display_content += bottle.template('templates/{}_content.tpl'.format(display_type), title=title, content=content)
+                texts[file] = text_file.read()
+    elif not os.path.isdir(path):
+        texts = {file: content.decode("utf-8") for file, content in archived_files(path, display_type).items()}
+    else:
+        texts = {}
+    for file, content in texts.items():
+        content = convert_urls_to_links(content)
+        content = content.replace("\n", "<br>")
+        title = os.path.splitext(file)[0]
+        display_content += bottle.template('templates/{}_content.tpl'.format(display_type), title=title, content=content)
     return display_content
 
+def save_request_stats(run, stats):
+    # adds the Foodsoft requests of a script method to those of the run's earlier methods, and shows them in the run's details
+    if not stats.endpoints:
+        return
+    run_stats = request_stats.RequestStats.from_dict(getattr(run, "request_stats", {}))
+    run_stats.merge(stats)
+    run.request_stats = run_stats.as_dict()
+    base.write_txt(file_path=base.file_path(path=run.path, folder="details", file_name=app.locales["base"]["foodsoft requests"]), content=run_stats.summary())
+
 def add_input_field(ipt, script_name, input_content):
     if input_content:
         input_content += "<br/>"
@@ -344,7 +402,10 @@ def add_instance(submitted_form):
 def add_configuration(submitted_form):
     global app
     new_configuration_name = submitted_form.getunicode('new configuration name').strip()
-    if base.equal_strings_check([new_configuration_name], base.find_configurations(foodcoop=app.instance)):
+    if not valid_configuration_name(new_configuration_name):
+        app.messages.append('"' + new_configuration_name + '" ist kein gültiger Name für eine Konfiguration.')
+        return new_configuration_page()
+    elif base.equal_strings_check([new_configuration_name], base.find_configurations(foodcoop=app.instance)):
         app.messages.append("Es existiert bereits eine Konfiguration namens " + new_configuration_name + " für " + app.instance.capitalize() + ". Bitte wähle einen anderen Namen.")
         return new_configuration_page()
     else:
@@ -384,17 +445,26 @@ def save_configuration_edit(configuration, submitted_form):
         elif name in config:
             config.pop(name)
     base.save_config(foodcoop=app.instance, configuration=configuration, config=config)
-    # TODO: Renaming a configuration sometimes leads to PermissionError: [WinError 5], therefore the input field is disabled for now
-    # configuration_name = submitted_form.getunicode('configuration name')
-    # if configuration_name != configuration:
-    #     renamed_configuration = base.rename_configuration(foodcoop=app.instance, old_configuration_name=configuration, new_configuration_name=configuration_name)
-    #     if renamed_configuration:
-    #         global app
-    #         app.messages.append('Konfiguration "{}" erfolgreich in "{}" umbenannt.'.format(configuration, renamed_configuration))
-    #     return configuration_name
-    # else:
+    configuration_name = (submitted_form.getunicode('configuration name') or "").strip()
+    if configuration_name != configuration and not valid_configuration_name(configuration_name):
+        app.messages.append('Konfiguration "{}" wurde nicht umbenannt: "{}" ist kein gültiger Name.'.format(configuration, configuration_name))
+    elif configuration_name != configuration:
+        try:
+            renamed_configuration = base.rename_configuration(foodcoop=app.instance, old_configuration_name=configuration, new_configuration_name=configuration_name)
+        except OSError as e: # e.g. PermissionError on Windows if a file of the configuration is still opened
+            app.messages.append('Konfiguration "{}" konnte nicht umbenannt werden: {}'.format(configuration, e))
+            return configuration
+        if renamed_configuration:
+            app.messages.append('Konfiguration "{}" erfolgreich in "{}" umbenannt.'.format(configuration, renamed_configuration))
+            return renamed_configuration
     return configuration
 
+def valid_configuration_name(name):
+    # configuration names are folder names, so they must not be empty, leave their folder or be hidden
+    if not name or name.startswith(".") or ".." in name:
+        return False
+    return not any(separator and separator in name for separator in [os.sep, os.altsep])
+
 def del_configuration(submitted_form):
     global app
     configuration_to_delete = submitted_form.getunicode('delete configuration')
@@ -441,7 +511,7 @@ def main_page():
             content += "<br/>"
         content += configuration_link(configuration)
 
-    return bottle.template('templates/main.tpl', messages=read_messages(), base_locales=app.locales["base"], fc=app.instance, foodcoop=app.instance.capitalize(), configurations=content)
+    return bottle.template('templates/main.tpl', messages=read_messages(), base_locales=app.locales["base"], fc=app.instance, foodcoop=app.instance.capitalize(), configurations=content, supplier_cache=app.session_manager.supplier_cache is not None)
 
 def login_page(fc, request_path=None, submitted_form=None):
     if not request_path:
@@ -465,9 +535,9 @@ def switch_instance_page(requested_instance, request_path=None, submitted_form=N
 def configuration_page(configuration):
     config = base.read_config(foodcoop=app.instance, configuration=configuration)
     script_name = base.read_in_config(config, "Script name")
-    script = import_script(configuration=configuration)
     output_content = ""
-    outputs = base.get_outputs(foodcoop=app.instance, configuration=configuration)
+    runs = base.read_run_index(foodcoop=app.instance, configuration=configuration)
+    outputs = list(runs.values())
     if not outputs:
         output_content += "Keine Ausführungen gefunden."
     outputs.reverse()
@@ -477,7 +547,7 @@ def configuration_page(configuration):
             break
         if output_content:
             output_content += "<br/>"
-        output_content += output_link_with_download_button(configuration=configuration, script=script, run_name=outputs[index])
+        output_content += output_link_with_download_button(configuration=configuration, run_entry=outputs[index])
     config_content = ""
     for detail in config:
         if config_content:
@@ -507,7 +577,7 @@ def run_page(configuration, script, run):
 
     continue_content = ""
     for option in run.next_possible_methods:
-        option_locales = app.locales[script_name][option.name]
+        option_locales = app.locales[script_name].get(option.name) or app.locales["base"][option.name] # methods shared by scripts have their locales in base
         inputs = ""
         for ipt in option.inputs:
             inputs = add_input_field(ipt=ipt, script_name=script_name, input_content=inputs)
@@ -523,7 +593,7 @@ def edit_configuration_page(configuration):
     script_name = base.read_in_config(config, "Script name")
     script = import_script(configuration=configuration)
     config_variables = script.config_variables()
-    special_variables = ["Script name", "number of runs to list", "last imported run"]
+    special_variables = ["Script name", "number of runs to list", "last imported run", "keep last runs", "keep runs for days"]
 
     if "last imported run" in [c_v.name for c_v in config_variables]:
         runs = base.get_outputs(foodcoop=app.instance, configuration=configuration)
@@ -553,8 +623,10 @@ def edit_configuration_page(configuration):
         config_content = add_config_variable_field(detail=variable.name, config=config, config_variables=config_variables, special_variables=special_variables, script_name=script_name, config_content=config_content)
 
     number_of_runs_to_list = base.read_in_config(config, "number of runs to list", 5)
+    keep_last_runs = config.get("keep last runs", "")
+    keep_runs_for_days = config.get("keep runs for days", "")
 
-    return bottle.template('templates/edit_configuration.tpl', messages=read_messages(), fc=app.instance, foodcoop=app.instance.capitalize(), base_locales=app.locales["base"], configuration=configuration, number_of_runs_to_list=number_of_runs_to_list, config_content=config_content, script_options=script_options(selected_script=config["Script name"]))
+    return bottle.template('templates/edit_configuration.tpl', messages=read_messages(), fc=app.instance, foodcoop=app.instance.capitalize(), base_locales=app.locales["base"], configuration=configuration, number_of_runs_to_list=number_of_runs_to_list, keep_last_runs=keep_last_runs, keep_runs_for_days=keep_runs_for_days, config_content=config_content, script_options=script_options(selected_script=config["Script name"]))
 
 def delete_configuration_page(configuration):
     return bottle.template('templates/delete_configuration.tpl', messages=read_messages(), fc=app.instance, foodcoop=app.instance.capitalize(), configuration=configuration)
@@ -583,9 +655,7 @@ def login(fc):
 def do_main(fc):
     submitted_form = bottle.request.forms
     if 'logout' in submitted_form:
-        global app
-        app = App()
-        app.instance = None
+        app.logout()
         app.messages.append("Logout erfolgreich.")
         request_path = submitted_form.getunicode("request_path")
         if request_path:
@@ -599,6 +669,10 @@ def do_main(fc):
             return add_configuration(submitted_form)
         elif 'delete configuration' in submitted_form:
             return del_configuration(submitted_form)
+        elif 'refresh suppliers' in submitted_form and app.session_manager.supplier_cache is not None:
+            number_of_suppliers = app.foodsoft_connector.refresh_supplier_cache()
+            app.messages.append(app.locales["base"]["supplier data refreshed"].format(number=str(number_of_suppliers)))
+            return main_page()
         else:
             return main_page()
     else:
@@ -624,7 +698,15 @@ def display_run(fc, configuration, run_name):
         importlib.invalidate_caches()
         script = import_script(configuration=configuration)
         path = run_path(configuration, run_name)
-        run = script.ScriptRun.load(path=path)
+        if os.path.isdir(path):
+            run = script.ScriptRun.load(path=path)
+        elif "method" in submitted_form: # continuing an archived run brings it back
+            base.restore_run(foodcoop=app.instance, configuration=configuration, run_name=run_name)
+            run = script.ScriptRun.load(path=path)
+        else: # only viewing it leaves it in the archive
+            run = script.ScriptRun.load_archived(foodcoop=app.instance, configuration=configuration, run_name=run_name)
+            if run is None:
+                raise bottle.HTTPError(404, "Run not found")
         if "method" in submitted_form:
             method = submitted_form.getunicode('method')
             parameters = {}
@@ -648,10 +730,12 @@ def display_run(fc, configuration, run_name):
                     if value:
                         parameters[ipt.name] = value
             func = getattr(run, method)
-            func(app, **parameters)
+            with app.foodsoft_connector.request_stats.recording() as stats:
+                func(app, **parameters)
+            save_request_stats(run, stats)
             run.save()
             script_name = base.read_in_config(base.read_config(fc, configuration), "Script name")
-            app.messages.append(app.locales[script_name][method]["name"] + " wurde ausgeführt.")
+            app.messages.append(get_locale_string(term=method, script_name=script_name, substring="name", enforce_return=True) + " wurde ausgeführt.")
         return run_page(configuration, script, run)
     else:
         return login_page(fc, bottle.request.path, submitted_form)
@@ -664,6 +748,7 @@ def start_script_run(fc, configuration):
         script = import_script(configuration=configuration)
         run = script.ScriptRun(foodcoop=app.instance, configuration=configuration)
         run.save()
+        base.apply_retention(foodcoop=app.instance, configuration=configuration)
         return run_page(configuration, script, run)
     else:
         return login_page(fc, bottle.request.path, submitted_form)
@@ -690,10 +775,33 @@ def download(filename):
     dir_array = os.path.normpath(filename).split(os.path.sep)
     fc = dir_array[1]
     if check_login(submitted_form, fc):
+        if len(dir_array) >= 5 and not os.path.isdir(os.path.join(*dir_array[:4])):
+            return download_archived(run_folder_path=os.path.join(*dir_array[:4]), file="/".join(dir_array[4:]))
+        if filename.endswith(".zip") and len(dir_array) == 5 and os.path.isdir(os.path.dirname(filename)):
+            create_zip(run_folder_path=os.path.dirname(filename), zip_filepath=filename)
         return bottle.static_file(filename, root="", download=filename)
     else:
         return login_page(fc=fc, request_path=submitted_form.getunicode("origin"))
 
+def download_archived(run_folder_path, file):
+    # serves a file of an archived run, or the ZIP file of its downloads, straight from the archive
+    if file.endswith(".zip") and "/" not in file:
+        downloads = archived_files(run_folder_path, "download")
+        if not downloads:
+            raise bottle.HTTPError(404, "File not found")
+        content = io.BytesIO()
+        with ZipFile(content, 'w') as zipObj:
+            for file_name, file_content in downloads.items():
+                zipObj.writestr(file_name, file_content)
+        content = content.getvalue()
+    else:
+        foodcoop, configuration, run_name = os.path.normpath(run_folder_path).split(os.path.sep)[-3:]
+        content = base.read_archived_files(foodcoop, configuration, run_name, folder=file.rpartition("/")[0] or None).get(file)
+        if content is None:
+            raise bottle.HTTPError(404, "File not found")
+    headers = {"Content-Disposition": f'attachment; filename="{os.path.basename(file)}"', "Content-Type": mimetypes.guess_type(file)[0] or "application/octet-stream"}
+    return bottle.HTTPResponse(body=content, **headers)
+
 @app.route("/templates/styles.css")
 def send_css(filename='styles.css'):
     return bottle.static_file(filename, root="templates")